@@ -0,0 +1,73 @@
+import argparse
+import time
+
+from benchmarks.generator import ProgramShape, generate_shaped_program
+from benchmarks.c_runtime import RUNTIME_MIX, programs, run_time
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler, PROFILES
+from src.compiler_to_asm import AsmCompiler
+from src.native import NativeBuilder, AsmBuilder, OPT_LEVELS
+
+def latency(ast, symbol_table, generate, builder, repeat):
+    # Meilleur temps de génération et meilleur temps de compilation native.
+    best_generate = best_build = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        source = generate(ast, symbol_table)
+        elapsed = time.perf_counter() - start
+        build = builder.build(source)
+        best_generate = elapsed if best_generate is None else min(best_generate, elapsed)
+        best_build = build.compile_seconds if best_build is None else min(best_build, build.compile_seconds)
+    return best_generate, best_build
+
+def generate_c(profile):
+    return lambda ast, symbol_table: CCompiler(ast, symbol_table, profile=profile).generate_c_code()
+
+def generate_asm(ast, symbol_table):
+    return AsmCompiler(ast, symbol_table).generate_asm_code()
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend assembleur x86-64: latence de compilation et temps "
+                                                 "d'exécution comparés au C généré")
+    parser.add_argument('--sizes', default='20000,100000', help="tailles (instructions) pour la latence")
+    parser.add_argument('--outer', type=int, default=20000)
+    parser.add_argument('--inner', type=int, default=1000)
+    parser.add_argument('--instructions', type=int, default=2000)
+    parser.add_argument('--loop-depth', type=int, default=3)
+    parser.add_argument('--iterations', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--assembler', default='as')
+    parser.add_argument('--cc', default='cc')
+    parser.add_argument('--copt', default='2', choices=OPT_LEVELS, help="niveau -O du C pour l'exécution")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    asm_builder = AsmBuilder(args.assembler, args.cc, use_cache=False)
+    c_builders = {copt: NativeBuilder(args.cc, copt, use_cache=False) for copt in ('0', args.copt)}
+
+    print("Latence de compilation (génération + outil natif):")
+    print(f"{'instructions':>12} {'backend':<14} {'génération':>11} {'natif':>9} {'total':>9}")
+    for size in [int(n) for n in args.sizes.split(',')]:
+        shape = ProgramShape(size, variables=8, arrays=0, jump_density=0.15, loop_depth=args.loop_depth,
+                             loop_iterations=args.iterations, mix=RUNTIME_MIX)
+        ast, symbol_table = analyze(generate_shaped_program(shape, args.seed))
+        rows = [('asm', generate_asm, asm_builder)]
+        rows += [(f'C checked -O{copt}', generate_c('checked'), builder) for copt, builder in c_builders.items()]
+        for name, generate, builder in rows:
+            generated, built = latency(ast, symbol_table, generate, builder, args.repeat)
+            print(f"{size:>12} {name:<14} {generated:10.3f}s {built:8.3f}s {generated + built:8.3f}s", flush=True)
+
+    print(f"\nTemps d'exécution (C en -O{args.copt}):")
+    print(f"{'programme':<10} {'asm':>9} " + " ".join(f"{'C ' + profile:>10}" for profile in PROFILES)
+          + f" {'asm / C checked':>16}")
+    builder = c_builders[args.copt]
+    for name, source in programs(args):
+        ast, symbol_table = analyze(source)
+        asm_time = run_time(asm_builder.build(generate_asm(ast, symbol_table)), args.repeat)
+        times = {profile: run_time(builder.build(generate_c(profile)(ast, symbol_table)), args.repeat)
+                 for profile in PROFILES}
+        print(f"{name:<10} {asm_time:8.3f}s " + " ".join(f"{times[profile]:9.3f}s" for profile in PROFILES)
+              + f" {asm_time / times['checked']:15.2f}x", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks.generator import generate_program
+from src.lexer import Lexer
+from src.parser import Parser
+from src.instruction_table import InstructionTable
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire occupée par les tokens et l'AST")
+    parser.add_argument('--instructions', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    source = generate_program(args.instructions, seed=args.seed)
+
+    tokens, size, _ = measure(lambda: Lexer(source).tokenize())
+    print(f"tokens          : {len(tokens):>9} tokens, {size / len(tokens):7.1f} octets/token")
+    del tokens
+
+    def parse(compact):
+        parser = Parser(Lexer(source).iter_tokens())
+        parser.parse_declarations()
+        if compact:
+            return InstructionTable.from_instructions(parser.iter_instructions())
+        return parser.parse_instructions()
+
+    instructions, size, peak = measure(lambda: parse(False))
+    count = len(instructions)
+    print(f"liste de noeuds : {count:>9} instructions, {size / count:7.1f} octets/instruction (pic {peak / count:.1f})")
+    del instructions
+
+    table, size, _ = measure(lambda: parse(True))
+    print(f"table compacte  : {len(table):>9} instructions, {size / count:7.1f} octets/instruction "
+          f"(colonnes {table.nbytes() / count:.1f})")
+
+if __name__ == "__main__":
+    main()
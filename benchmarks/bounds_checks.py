@@ -0,0 +1,59 @@
+import argparse
+
+from benchmarks.c_runtime import run_time
+from benchmarks.generator import ProgramShape, generate_array_program, generate_loop_program, \
+    generate_shaped_program
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler
+from src.native import NativeBuilder, OPT_LEVELS
+from src.ranges import analyze_array_bounds
+
+# Variantes comparées: toutes les vérifications d'index, seulement celles que
+# l'analyse d'intervalles n'a pas éliminées, aucune.
+VARIANTS = [
+    ('checked, sans analyse', {'profile': 'checked', 'range_analysis': False}),
+    ('checked', {'profile': 'checked'}),
+    ('fast', {'profile': 'fast'}),
+]
+
+def programs(args):
+    yield 'tableau', generate_loop_program(args.outer, args.size)
+    yield 'deux tableaux', generate_array_program(args.outer, args.size)
+
+def main():
+    parser = argparse.ArgumentParser(description="Accès aux tableaux prouvés dans les bornes et coût des vérifications")
+    parser.add_argument('--outer', type=int, default=20000)
+    parser.add_argument('--size', type=int, default=1000)
+    parser.add_argument('--random', type=int, default=20,
+                        help="nombre de programmes aléatoires pour la proportion d'accès prouvés")
+    parser.add_argument('--cc', default='cc')
+    parser.add_argument('--copt', default='2', choices=OPT_LEVELS)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    total = proven = 0
+    for seed in range(args.random):
+        shape = ProgramShape(500, variables=4, arrays=2, array_size=16, loop_depth=2, loop_iterations=16)
+        ast, symbol_table = analyze(generate_shaped_program(shape, seed))
+        report = analyze_array_bounds(ast.instructions, symbol_table)
+        total += report.total
+        proven += report.proven
+    if total:
+        print(f"Programmes aléatoires: {proven}/{total} accès prouvés ({100.0 * proven / total:.1f}%)\n")
+
+    builder = NativeBuilder(args.cc, args.copt, use_cache=False)
+    print(f"{'programme':<14} {'variante':<22} {'prouvés':>8} {'exécution':>10} {'vs sans analyse':>16}")
+    for name, source in programs(args):
+        ast, symbol_table = analyze(source)
+        baseline = None
+        for variant, options in VARIANTS:
+            compiler = CCompiler(ast, symbol_table, **options)
+            build = builder.build(compiler.generate_c_code())
+            seconds = run_time(build, args.repeat)
+            baseline = baseline or seconds
+            proven = f"{compiler.bounds.percent():.0f}%" if compiler.bounds else '-'
+            print(f"{name:<14} {variant:<22} {proven:>8} {seconds:9.3f}s {baseline / seconds:15.2f}x",
+                  flush=True)
+
+if __name__ == "__main__":
+    main()
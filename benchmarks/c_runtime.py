@@ -0,0 +1,62 @@
+import argparse
+import subprocess
+import time
+
+from benchmarks.generator import (ProgramShape, generate_loop_program, generate_stack_program,
+                                  generate_flag_program, generate_shaped_program)
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler, PROFILES
+from src.native import NativeBuilder, OPT_LEVELS
+
+# Mélange sans input ni div et programme sans tableau: les exécutables tournent
+# sans entrée standard et ne peuvent pas s'arrêter sur une erreur d'exécution.
+RUNTIME_MIX = {'mov': 4, 'add': 3, 'sub': 3, 'mult': 1, 'and': 1, 'or': 1, 'not': 1,
+               'print': 0.2, 'push': 1, 'pop': 1, 'isFull': 0.2, 'jmp': 1, 'jz': 1, 'js': 1, 'jo': 1}
+
+def programs(args):
+    yield 'tableau', generate_loop_program(args.outer, args.inner)
+    yield 'pile', generate_stack_program(args.outer, args.inner)
+    yield 'flags', generate_flag_program(args.outer, args.inner)
+    shape = ProgramShape(args.instructions, variables=8, arrays=0, jump_density=0.15,
+                         loop_depth=args.loop_depth, loop_iterations=args.iterations, mix=RUNTIME_MIX)
+    yield 'aléatoire', generate_shaped_program(shape, args.seed)
+
+def run_time(build, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([build.executable], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise Exception(f"L'exécutable s'est terminé avec le code {result.returncode}")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'exécution du C généré selon le profil")
+    parser.add_argument('--outer', type=int, default=20000)
+    parser.add_argument('--inner', type=int, default=1000)
+    parser.add_argument('--instructions', type=int, default=2000)
+    parser.add_argument('--loop-depth', type=int, default=3)
+    parser.add_argument('--iterations', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cc', default='cc')
+    parser.add_argument('--copt', default='2', choices=OPT_LEVELS)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    builder = NativeBuilder(args.cc, args.copt, use_cache=False)
+    print(f"{'programme':<10} {'profil':<8} {'compilation':>12} {'exécution':>10} {'accélération':>13}")
+    for name, source in programs(args):
+        ast, symbol_table = analyze(source)
+        times = {}
+        for profile in PROFILES:
+            build = builder.build(CCompiler(ast, symbol_table, profile=profile).generate_c_code())
+            times[profile] = run_time(build, args.repeat)
+            speedup = times['checked'] / times[profile]
+            print(f"{name:<10} {profile:<8} {build.compile_seconds:11.3f}s {times[profile]:9.3f}s "
+                  f"{speedup:12.2f}x", flush=True)
+
+if __name__ == "__main__":
+    main()
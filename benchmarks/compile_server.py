@@ -0,0 +1,141 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.generator import generate_program
+from src.client import CompileClient
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def report(name, samples, total=None):
+    line = (f"{name:<34} {percentile(samples, 0.5) * 1000:8.1f} {percentile(samples, 0.99) * 1000:8.1f} "
+            f"{max(samples) * 1000:8.1f}")
+    if total:
+        line += f" {len(samples) / total:10.1f}"
+    print(line, flush=True)
+
+def process_times(command, sources, directory):
+    samples = []
+    for i, source in enumerate(sources):
+        output = os.path.join(directory, f'sortie{i}.c')
+        start = time.perf_counter()
+        result = subprocess.run([*command(source), '-o', output], stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True)
+        samples.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise Exception(f"La compilation de '{source}' a échoué: {result.stderr.strip()}")
+    return samples
+
+def client_times(socket, sources, texts):
+    samples = []
+    with CompileClient(socket) as client:
+        for text in texts:
+            start = time.perf_counter()
+            response = client.request('compile', text)
+            samples.append(time.perf_counter() - start)
+            if not response.ok:
+                raise Exception(f"Compilation refusée: {response.diagnostics}")
+    return samples
+
+def concurrent_times(socket, texts, clients, pipeline):
+    # clients connexions en parallèle; chacune garde pipeline requêtes en vol.
+    samples = []
+    errors = []
+
+    def worker(offset):
+        try:
+            with CompileClient(socket) as client:
+                sent = {}
+                mine = texts[offset::clients]
+                next_index = 0
+                while next_index < len(mine) or sent:
+                    while next_index < len(mine) and len(sent) < pipeline:
+                        sent[client.send('compile', mine[next_index])] = time.perf_counter()
+                        next_index += 1
+                    response = client.receive()
+                    samples.append(time.perf_counter() - sent.pop(response['id']))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return samples, time.perf_counter() - start
+
+def start_server(socket, args):
+    command = [sys.executable, 'main.py', '--serve', '--socket', socket, '--max-pending', str(args.max_pending)]
+    if args.workers:
+        command += ['-j', str(args.workers)]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            CompileClient(socket).close()
+            return server
+        except Exception:
+            time.sleep(0.05)
+    server.kill()
+    raise Exception("Le serveur de compilation n'a pas démarré")
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence de compilation: processus main.py à chaque appel "
+                                                 "contre serveur persistant (socket Unix)")
+    parser.add_argument('--instructions', type=int, default=200, help="taille de chaque programme")
+    parser.add_argument('--requests', type=int, default=20, help="appels mesurés par variante en processus")
+    parser.add_argument('--server-requests', type=int, default=400, help="requêtes mesurées par variante serveur")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--pipeline', type=int, default=4, help="requêtes en vol par connexion")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-pending', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Programmes tous différents: pas de réponse servie par le cache du front end.
+        texts = [generate_program(args.instructions, seed=seed) for seed in range(args.server_requests)]
+        sources = []
+        for i, text in enumerate(texts[:args.requests]):
+            sources.append(os.path.join(directory, f'programme{i}.projet'))
+            with open(sources[-1], 'w') as f:
+                f.write(text)
+        cache = os.path.join(directory, 'cache')
+        os.environ['PROJET_CACHE_DIR'] = cache
+        socket = os.path.join(directory, 'serveur.sock')
+
+        print(f"{'variante':<34} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'requêtes/s':>10}")
+        cold = process_times(lambda source: [sys.executable, 'main.py', source, '--no-cache'], sources, directory)
+        report('main.py (démarrage à froid)', cold)
+        server = start_server(socket, args)
+        try:
+            thin = process_times(lambda source: [sys.executable, 'client.py', '--socket', socket, 'compile', source],
+                                 sources, directory)
+            report('client.py (processus par appel)', thin)
+            warm = client_times(socket, sources, texts)
+            report('connexion persistante', warm)
+            samples, total = concurrent_times(socket, texts, args.clients, args.pipeline)
+            report(f'{args.clients} clients x {args.pipeline} en vol', samples, total)
+            with CompileClient(socket) as client:
+                stats = client.request('stats')
+                client.request('shutdown')
+            print(f"\nServeur: {stats['requests']} requêtes, p50 {stats['p50_ms']:.1f} ms, "
+                  f"p99 {stats['p99_ms']:.1f} ms (réception -> dernier octet envoyé)")
+            print(f"Accélération p50 (connexion persistante / main.py): "
+                  f"{percentile(cold, 0.5) / percentile(warm, 0.5):.1f}x")
+        finally:
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+if __name__ == "__main__":
+    main()
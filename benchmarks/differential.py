@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from benchmarks.generator import ProgramShape, DEFAULT_MIX, generate_shaped_program, generate_collatz_program, \
+    generate_loop_program, generate_array_program
+from src.differential import (BACKENDS, DEFAULT_MAX_STEPS, SOURCE_SUFFIX, INPUTS_SUFFIX, DifferentialHarness,
+                              load_corpus, regressions, variants)
+
+def generate_corpus(directory, count, seed=0, runs=4, values=256):
+    # Programmes aléatoires (avec input, div et tableaux: erreurs d'exécution
+    # comprises) et quelques boucles fixes, chacun avec runs flux d'entrées.
+    rng = random.Random(seed)
+    mix = dict(DEFAULT_MIX, input=1, halt=0.05)
+    programs = [('collatz', generate_collatz_program(8)), ('tableau', generate_loop_program(200, 100)),
+                ('deux_tableaux', generate_array_program(100, 200))]
+    for i in range(count):
+        shape = ProgramShape(rng.randint(20, 400), variables=rng.randint(1, 6), arrays=rng.randint(0, 2),
+                             array_size=rng.randint(1, 16), jump_density=rng.random() * 0.25,
+                             loop_depth=rng.randint(0, 3), loop_iterations=rng.randint(2, 40), mix=mix)
+        programs.append((f'aleatoire_{i:03d}', generate_shaped_program(shape, seed + i)))
+    os.makedirs(directory, exist_ok=True)
+    for name, source in programs:
+        with open(os.path.join(directory, name + SOURCE_SUFFIX), 'w') as f:
+            f.write(source)
+        with open(os.path.join(directory, name + INPUTS_SUFFIX), 'w') as f:
+            for _ in range(runs):
+                f.write(' '.join(str(rng.randint(-40000, 40000) if name != 'collatz' else rng.randint(1, 5000))
+                                 for _ in range(values)) + '\n')
+
+def show(entry):
+    if 'error' in entry:
+        print(f"{entry['name']:<28} front end: {entry['error']}", flush=True)
+        return
+    results = entry['variants'][1:]
+    statuses = [result['status'] for result in results]
+    reference = entry['variants'][0]
+    rate = reference.get('instructions_per_second') or 0
+    print(f"{entry['name']:<28} {entry['compared_runs']}/{entry['runs']} exécution(s) "
+          f"{entry['steps']:>11,} instr. VM {rate:>12,.0f}/s  "
+          f"{statuses.count('ok')} ok, {statuses.count('différence')} différence(s), "
+          f"{statuses.count('erreur')} erreur(s)", flush=True)
+    for result in results:
+        if result['status'] in ('différence', 'erreur'):
+            print(f"    {result['variant']}: {result.get('detail')}", flush=True)
+
+def fastest(report):
+    # Débit moyen de chaque variante sur les programmes où elle est comparée
+    # (C: sans le lancement des processus).
+    totals = {}
+    for entry in report['programs']:
+        for result in entry['variants']:
+            if result.get('seconds'):
+                steps, seconds = totals.get(result['variant'], (0, 0.0))
+                totals[result['variant']] = (steps + result['steps'],
+                                             seconds + result.get('net_seconds', result['seconds']))
+    return sorted(((steps / seconds, name) for name, (steps, seconds) in totals.items() if seconds), reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Exécution différentielle d'un corpus: chaque backend et "
+                                                 "réglage de génération contre le VM, temps et débit")
+    parser.add_argument('corpus', nargs='*', help=f"fichiers {SOURCE_SUFFIX} ou répertoires (entrées "
+                                                  f"enregistrées dans le {INPUTS_SUFFIX} voisin)")
+    parser.add_argument('--generate', type=int, default=None, metavar='N',
+                        help="générer un corpus de N programmes aléatoires (plus quelques boucles fixes)")
+    parser.add_argument('--corpus-dir', default=None, help="où écrire le corpus généré (par défaut: temporaire)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report', default='differential.json', help="rapport JSON")
+    parser.add_argument('--baseline', default=None, help="rapport précédent: signaler les variantes plus lentes")
+    parser.add_argument('--threshold', type=float, default=1.25, help="ralentissement signalé (x le temps de base)")
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--opt-levels', default='0,2', help="niveaux -O du programme")
+    parser.add_argument('--copt', default='0,2', help="niveaux -O de cc")
+    parser.add_argument('--cc', default='cc')
+    parser.add_argument('--repeat', type=int, default=3, help="meilleur temps sur N exécutions")
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS)
+    parser.add_argument('--timeout', type=float, default=None, help="délai par exécution (s)")
+    args = parser.parse_args()
+    if not args.corpus and args.generate is None:
+        parser.error("donner un corpus ou --generate N")
+
+    selected = variants(args.backends.split(','), [int(n) for n in args.opt_levels.split(',')],
+                        args.copt.split(','))
+    harness = DifferentialHarness(selected, args.cc, args.repeat, args.max_steps, args.timeout)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = list(args.corpus)
+        if args.generate is not None:
+            corpus_dir = args.corpus_dir or os.path.join(directory, 'corpus')
+            generate_corpus(corpus_dir, args.generate, args.seed)
+            paths.append(corpus_dir)
+        programs = load_corpus(paths)
+        print(f"{len(programs)} programme(s), {len(selected)} variante(s) comparée(s) au VM\n")
+        report = harness.run(programs, show)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = regressions(report, json.load(f), args.threshold)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    summary = report['summary']
+    print(f"\n{summary['variants']} comparaison(s): {summary['ok']} ok, {summary['différence']} différence(s), "
+          f"{summary['erreur']} erreur(s), {summary['ignoré']} ignorée(s)")
+    overhead = report['environment'].get('process_seconds')
+    print("\nDébit (instructions VM par seconde, programmes comparés" +
+          (f"; natifs: lancement d'un processus, {overhead * 1000:.2f} ms, déduit):" if overhead else "):"))
+    for rate, name in fastest(report):
+        print(f"  {name:<40} {rate:>14,.0f}/s")
+    for regression in report.get('regressions', []):
+        print(f"Ralentissement: {regression['program']} {regression['variant']} "
+              f"{regression['before']:.3f}s -> {regression['after']:.3f}s ({regression['ratio']:.2f}x)")
+    print(f"\nRapport écrit dans '{args.report}'")
+    return 1 if summary['différence'] or summary['erreur'] or report.get('regressions') else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,342 @@
+import random
+from src.token import KEYWORDS
+
+BINARY_OPS = ['mov', 'add', 'sub', 'mult', 'and', 'or']
+UNARY_OPS = ['not', 'print', 'push', 'pop']
+JUMP_OPS = ['jmp', 'jz', 'js', 'jo']
+
+def generate_program(instructions, seed=0, variables=8, array_size=16):
+    rng = random.Random(seed)
+    names = [f'v{i}' for i in range(variables)]
+    declarations = [f'{name}:byte' for name in names] + [f'tab:Array[{array_size}]']
+    lines = ['Var', ', '.join(declarations), 'Instructions']
+
+    def operand(writable=False):
+        choice = rng.random()
+        if choice < 0.5:
+            return rng.choice(names)
+        if choice < 0.65:
+            return rng.choice(['AX', 'BX', 'CX', 'DX'])
+        if choice < 0.8:
+            return f'tab[{rng.choice(names)}]' if rng.random() < 0.5 else f'tab[{rng.randrange(array_size)}]'
+        return rng.choice(names) if writable else str(rng.randint(0, 100))
+
+    for number in range(instructions):
+        choice = rng.random()
+        if choice < 0.7:
+            op = f'{rng.choice(BINARY_OPS)} {operand(True)},{operand()}'
+        elif choice < 0.85:
+            op = f'{rng.choice(UNARY_OPS)} {operand(True)}'
+        else:
+            op = f'{rng.choice(JUMP_OPS)} {rng.randrange(instructions)}'
+        lines.append(f'{number}: {op};')
+    lines.append(f'{instructions}: halt;')
+    return '\n'.join(lines) + '\n'
+
+def generate_loop_program(outer, inner):
+    # Deux boucles imbriquées: remplit tab[j] et accumule la somme, puis l'affiche.
+    lines = ['Var', f'i:byte, j:byte, t:byte, sum:byte, tab:Array[{inner}]', 'Instructions']
+    body = [
+        'mov i,0',
+        'mov t,i',          # 1: tête de la boucle externe
+        f'sub t,{outer}',
+        'jz 15',
+        'mov j,0',
+        'mov t,j',          # 5: tête de la boucle interne
+        f'sub t,{inner}',
+        'jz 13',
+        'add tab[j],j',
+        'add sum,tab[j]',
+        'and sum,1023',
+        'add j,1',
+        'jmp 5',
+        'add i,1',          # 13
+        'jmp 1',
+        'print sum',        # 15
+        'halt',
+    ]
+    lines.extend(f'{number}: {op};' for number, op in enumerate(body))
+    return '\n'.join(lines) + '\n'
+
+def generate_array_program(passes, size):
+    # Parcours répétés de deux tableaux, l'un à l'endroit (a[j]), l'autre à
+    # l'envers (b[k] avec k = size-1-j).
+    lines = ['Var', f'i:byte, j:byte, k:byte, t:byte, sum:byte, a:Array[{size}], b:Array[{size}]',
+             'Instructions']
+    body = [
+        'mov i,0',
+        'mov t,i',          # 1: tête de la boucle externe
+        f'sub t,{passes}',
+        'jz 19',
+        'mov j,0',
+        'mov t,j',          # 5: tête de la boucle interne
+        f'sub t,{size}',
+        'jz 17',
+        f'mov k,{size - 1}',
+        'sub k,j',
+        'add a[j],b[k]',
+        'add b[k],j',
+        'and a[j],255',
+        'add sum,a[j]',
+        'and sum,1023',
+        'add j,1',
+        'jmp 5',
+        'add i,1',          # 17
+        'jmp 1',
+        'print sum',        # 19
+        'halt',
+    ]
+    lines.extend(f'{number}: {op};' for number, op in enumerate(body))
+    return '\n'.join(lines) + '\n'
+
+def generate_stack_program(outer, inner):
+    # Deux boucles imbriquées qui empilent et dépilent à chaque tour.
+    lines = ['Var', 'i:byte, j:byte, t:byte, sum:byte', 'Instructions']
+    body = [
+        'mov i,0',
+        'mov t,i',          # 1: tête de la boucle externe
+        f'sub t,{outer}',
+        'jz 20',
+        'mov j,0',
+        'mov t,j',          # 5: tête de la boucle interne
+        f'sub t,{inner}',
+        'jz 18',
+        'push j',
+        'push i',
+        'isFull',
+        'jz 20',            # jamais pris: la pile ne dépasse pas deux cases
+        'pop t',
+        'add sum,t',
+        'pop t',
+        'sub sum,t',
+        'add j,1',
+        'jmp 5',
+        'add i,1',          # 18
+        'jmp 1',
+        'print sum',        # 20
+        'halt',
+    ]
+    lines.extend(f'{number}: {op};' for number, op in enumerate(body))
+    return '\n'.join(lines) + '\n'
+
+def generate_flag_program(outer, inner):
+    # Multiplications qui débordent régulièrement: chemins jo/js dans la boucle interne.
+    lines = ['Var', 'i:byte, j:byte, t:byte, x:byte, sum:byte', 'Instructions']
+    body = [
+        'mov i,0',
+        'mov t,i',          # 1: tête de la boucle externe
+        f'sub t,{outer}',
+        'jz 22',
+        'mov j,0',
+        'mov x,1',
+        'mov t,j',          # 6: tête de la boucle interne
+        f'sub t,{inner}',
+        'jz 20',
+        'mult x,3',
+        'jo 16',
+        'js 18',
+        'add sum,x',
+        'and sum,1023',
+        'add j,1',          # 14
+        'jmp 6',
+        'mov x,1',          # 16: dépassement
+        'jmp 14',
+        'not x',            # 18: négatif
+        'jmp 14',
+        'add i,1',          # 20
+        'jmp 1',
+        'print sum',        # 22
+        'halt',
+    ]
+    lines.extend(f'{number}: {op};' for number, op in enumerate(body))
+    return '\n'.join(lines) + '\n'
+
+def generate_branch_program(outer, inner, branches=8):
+    # Boucles imbriquées dont chaque tour enchaîne branches tests très biaisés sur
+    # le compteur: l'un saute rarement vers un bloc froid placé après les boucles,
+    # le suivant saute presque toujours par-dessus un bloc froid.
+    lines = ['Var', 'i:byte, j:byte, t:byte, x:byte, sum:byte', 'Instructions']
+    body = ['mov i,0', 'mov t,i', f'sub t,{outer}', 'jz @end', 'mov j,0',
+            '@inner', 'mov t,j', f'sub t,{inner}', 'jz @next']
+    cold = []
+    for k in range(branches):
+        mask = (1 << (4 + k % 4)) - 1
+        body += ['mov t,j', f'add t,{k}', f'and t,{mask}']
+        if k % 2 == 0:
+            body += [f'jz @cold{k}', f'@back{k}']
+            cold += [f'@cold{k}', f'mult x,{k + 3}', 'add sum,x', 'and sum,1023', f'jmp @back{k}']
+        else:
+            body += [f'sub t,{mask}', f'js @skip{k}', 'mult x,5', 'add sum,x', 'not x', f'@skip{k}']
+        body += ['add x,j']
+    body += ['add j,1', 'jmp @inner', '@next', 'add i,1', 'jmp 1', '@end', 'print sum', 'halt'] + cold
+    labels = {}
+    operations = []
+    for item in body:
+        if item.startswith('@') and ' ' not in item:
+            labels[item] = len(operations)
+        else:
+            operations.append(item)
+    for number, op in enumerate(operations):
+        name, _, operand = op.partition(' ')
+        lines.append(f'{number}: {name} {labels.get(operand, operand)};')
+    return '\n'.join(lines) + '\n'
+
+def generate_collatz_program(values):
+    # Lit `values` entiers et additionne leurs temps de vol de Collatz: le nombre
+    # de tours dépend de l'entrée, les exécutions divergent.
+    lines = ['Var', 'i:byte, n:byte, t:byte, count:byte', 'Instructions']
+    body = [
+        'mov t,i',          # 0: tête de la boucle sur les entrées
+        f'sub t,{values}',
+        'jz 19',
+        'input n',
+        'mov t,n',          # 4: tête de la boucle de Collatz
+        'sub t,1',
+        'jz 17',
+        'js 17',            # n <= 0 (ou débordement): arrêt
+        'add count,1',
+        'mov t,n',
+        'and t,1',
+        'jz 15',
+        'mult n,3',
+        'add n,1',
+        'jmp 4',
+        'div n,2',          # 15: n pair
+        'jmp 4',
+        'add i,1',          # 17
+        'jmp 0',
+        'print count',      # 19
+        'halt',
+    ]
+    lines.extend(f'{number}: {op};' for number, op in enumerate(body))
+    return '\n'.join(lines) + '\n'
+
+# Opérations tirées de KEYWORDS et poids par défaut. call n'y figure pas: aucune
+# procédure ne peut être déclarée, un call ne serait jamais valide. Les sauts sont
+# réglés à part par jump_density.
+OPERATIONS = ['mov', 'add', 'sub', 'mult', 'div', 'and', 'or', 'not', 'input', 'print',
+              'push', 'pop', 'isFull', 'halt', 'jmp', 'jz', 'js', 'jo']
+DEFAULT_MIX = {'mov': 4, 'add': 3, 'sub': 3, 'mult': 1, 'div': 1, 'and': 1, 'or': 1, 'not': 1,
+               'print': 1, 'push': 1, 'pop': 1, 'isFull': 0.2,
+               'jmp': 1, 'jz': 1, 'js': 1, 'jo': 1}
+WRITE_OPERATIONS = {'not', 'input', 'pop'}
+READ_OPERATIONS = {'print', 'push'}
+NULLARY_OPERATIONS = {'isFull', 'halt'}
+JUMP_OPERATIONS = {'jmp', 'jz', 'js', 'jo'}
+
+class ProgramShape:
+    def __init__(self, instructions=1000, variables=8, arrays=1, array_size=16, jump_density=0.15,
+                 loop_depth=0, loop_iterations=4, mix=None):
+        mix = dict(DEFAULT_MIX if mix is None else mix)
+        for name in mix:
+            if name not in KEYWORDS or name not in OPERATIONS:
+                raise Exception(f"Opération inconnue dans le mélange: {name}")
+        if not any(weight for name, weight in mix.items() if name not in JUMP_OPERATIONS):
+            raise Exception("Le mélange doit contenir au moins une opération autre qu'un saut")
+        self.instructions = instructions
+        self.variables = max(1, variables)
+        self.arrays = arrays
+        self.array_size = array_size
+        self.jump_density = jump_density
+        self.loop_depth = loop_depth
+        self.loop_iterations = loop_iterations
+        self.mix = mix
+
+    def to_dict(self):
+        return dict(vars(self))
+
+class Label:
+    __slots__ = ('index',)
+
+    def __init__(self):
+        self.index = None
+
+# Générateur paramétrable: nombre de déclarations, taille des tableaux, densité
+# de sauts, profondeur de boucles imbriquées et mélange d'opérations. Les sauts
+# aléatoires vont toujours vers l'avant et restent dans leur bloc, et chaque
+# boucle a son propre compteur: le programme se termine toujours.
+def generate_shaped_program(shape, seed=0):
+    rng = random.Random(seed)
+    names = [f'v{i}' for i in range(shape.variables)]
+    arrays = [f'a{i}' for i in range(shape.arrays)]
+    counters = [f'c{i}' for i in range(shape.loop_depth)]
+    declarations = [f'{name}:byte' for name in names + counters]
+    if shape.loop_depth:
+        declarations.append('lt:byte')
+    declarations += [f'{name}:Array[{shape.array_size}]' for name in arrays]
+
+    plain = [name for name, weight in shape.mix.items() if weight and name not in JUMP_OPERATIONS]
+    plain_weights = [shape.mix[name] for name in plain]
+    jumps = [name for name, weight in shape.mix.items() if weight and name in JUMP_OPERATIONS] or ['jmp']
+    jump_weights = [shape.mix.get(name, 1) for name in jumps]
+
+    def operand(writable=False, divisor=False):
+        choice = rng.random()
+        if arrays and choice < 0.2:
+            array = rng.choice(arrays)
+            if rng.random() < 0.5:
+                return f'{array}[{rng.choice(names)}]'
+            return f'{array}[{rng.randrange(shape.array_size)}]'
+        if choice < 0.35:
+            return rng.choice(['AX', 'BX', 'CX', 'DX'])
+        if writable or choice < 0.8:
+            return rng.choice(names)
+        return str(rng.randint(1 if divisor else 0, 100))
+
+    def operation(name):
+        if name in NULLARY_OPERATIONS:
+            return name
+        if name in WRITE_OPERATIONS:
+            return f'{name} {operand(True)}'
+        if name in READ_OPERATIONS:
+            return f'{name} {operand()}'
+        return f'{name} {operand(True)},{operand(divisor=name == "div")}'
+
+    def straight(count):
+        # Suite d'instructions avec des sauts vers une étiquette plus loin dans la suite.
+        items = []
+        targets = {}
+        for position in range(count):
+            if position in targets:
+                items.append(targets.pop(position))
+            if rng.random() < shape.jump_density:
+                label = targets.setdefault(rng.randint(position + 1, count), Label())
+                items.append((rng.choices(jumps, jump_weights)[0], label))
+            else:
+                items.append(operation(rng.choices(plain, plain_weights)[0]))
+        items.extend(targets.values())
+        return items
+
+    def block(depth, count):
+        if depth == 0:
+            return straight(count)
+        counter = counters[shape.loop_depth - depth]
+        head, end = Label(), Label()
+        body = max(1, (count - 7) // 2)
+        before = max(0, (count - 7 - body) // 2)
+        after = max(0, count - 7 - body - before)
+        return (straight(before)
+                + [f'mov {counter},0', head, f'mov lt,{counter}', f'sub lt,{shape.loop_iterations}',
+                   ('jz', end)]
+                + block(depth - 1, body)
+                + [f'add {counter},1', ('jmp', head), end]
+                + straight(after))
+
+    items = block(shape.loop_depth, shape.instructions)
+    number = 0
+    for item in items:
+        if isinstance(item, Label):
+            item.index = number
+        else:
+            number += 1
+    lines = ['Var', ', '.join(declarations), 'Instructions']
+    number = 0
+    for item in items:
+        if isinstance(item, Label):
+            continue
+        if isinstance(item, tuple):
+            item = f'{item[0]} {item[1].index}'
+        lines.append(f'{number}: {item};')
+        number += 1
+    lines.append(f'{number}: halt;')
+    return '\n'.join(lines) + '\n'
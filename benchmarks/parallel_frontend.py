@@ -0,0 +1,58 @@
+import argparse
+import os
+import time
+
+from benchmarks.generator import generate_program
+from src.lexer import Lexer
+from src.parser import Parser
+from src.parallel_frontend import parse_parallel
+from src.pgo import fingerprint
+
+def sequential(source):
+    return Parser(Lexer(source).iter_tokens()).parse()
+
+def signature(program):
+    # Instructions (opérations et opérandes) et leurs positions dans le source.
+    positions = [(instr.line, instr.column) for instr in program.instructions]
+    return fingerprint(program.instructions), positions
+
+def best_time(parse, repeat):
+    best = program = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        program = parse()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, program
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse syntaxique parallèle par fragments de la section "
+                                                 "Instructions comparée au parser séquentiel")
+    parser.add_argument('--instructions', type=int, default=1000000)
+    parser.add_argument('--workers', default=None,
+                        help="nombres de processus séparés par des virgules (par défaut: 2, 4 et le "
+                             "nombre de coeurs)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = sorted({2, 4, cpus}) if args.workers is None else [int(n) for n in args.workers.split(',')]
+    source = generate_program(args.instructions, args.seed)
+    print(f"{args.instructions:,} instructions, {len(source) / 1e6:.1f} Mo de source, {cpus} coeur(s)")
+
+    reference, program = best_time(lambda: sequential(source), args.repeat)
+    expected = signature(program)
+    del program
+    print(f"{'mode':<18} {'temps':>9} {'instructions/s':>15} {'accélération':>13}")
+    print(f"{'séquentiel':<18} {reference:8.3f}s {args.instructions / reference:15,.0f} {1:12.2f}x", flush=True)
+    for count in workers:
+        elapsed, program = best_time(lambda: parse_parallel(source, count), args.repeat)
+        if signature(program) != expected:
+            raise Exception(f"L'analyse parallèle ({count} processus) diffère de l'analyse séquentielle")
+        del program
+        print(f"{f'{count} processus':<18} {elapsed:8.3f}s {args.instructions / elapsed:15,.0f} "
+              f"{reference / elapsed:12.2f}x", flush=True)
+
+if __name__ == "__main__":
+    main()
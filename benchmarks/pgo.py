@@ -0,0 +1,71 @@
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from benchmarks.generator import ProgramShape, generate_branch_program, generate_flag_program, \
+    generate_shaped_program
+from benchmarks.c_runtime import RUNTIME_MIX, run_time
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler, PROFILES
+from src.native import NativeBuilder, OPT_LEVELS
+from src.pgo import ExecutionProfile
+
+def programs(args):
+    yield 'branches', generate_branch_program(args.outer, args.inner)
+    yield 'flags', generate_flag_program(args.outer, args.inner)
+    shape = ProgramShape(args.instructions, variables=8, arrays=0, jump_density=0.3,
+                         loop_depth=args.loop_depth, loop_iterations=args.iterations, mix=RUNTIME_MIX)
+    yield 'aléatoire', generate_shaped_program(shape, args.seed)
+
+def train(builder, ast, symbol_table, path):
+    # Compile et exécute une fois le programme instrumenté; renvoie son temps.
+    build = builder.build(CCompiler(ast, symbol_table, instrument=path).generate_c_code())
+    start = time.perf_counter()
+    result = subprocess.run([build.executable], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, env=dict(os.environ, PROJET_PROFILE=path))
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise Exception(f"L'exécutable instrumenté s'est terminé avec le code {result.returncode}")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compilation guidée par un profil d'exécution: temps du C "
+                                                 "généré sans et avec le profil, sur des programmes riches "
+                                                 "en sauts")
+    parser.add_argument('--outer', type=int, default=20000)
+    parser.add_argument('--inner', type=int, default=1000)
+    parser.add_argument('--instructions', type=int, default=2000)
+    parser.add_argument('--loop-depth', type=int, default=3)
+    parser.add_argument('--iterations', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cc', default='cc')
+    parser.add_argument('--copt', default='2', choices=OPT_LEVELS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help="instructions les plus exécutées affichées")
+    args = parser.parse_args()
+
+    builder = NativeBuilder(args.cc, args.copt, use_cache=False)
+    with tempfile.TemporaryDirectory() as directory:
+        results = []
+        for name, source in programs(args):
+            ast, symbol_table = analyze(source)
+            path = os.path.join(directory, name + '.profile')
+            training = train(builder, ast, symbol_table, path)
+            profile = ExecutionProfile.load(path, ast.instructions)
+            print(f"== {name}: exécution instrumentée en {training:.3f}s")
+            print(profile.summary(ast.instructions, args.top) + "\n", flush=True)
+            for c_profile in PROFILES:
+                times = []
+                for execution_profile in (None, profile):
+                    compiler = CCompiler(ast, symbol_table, profile=c_profile, execution_profile=execution_profile)
+                    times.append(run_time(builder.build(compiler.generate_c_code()), args.repeat))
+                results.append((name, c_profile, times))
+
+        print(f"{'programme':<10} {'profil':<8} {'sans profil':>12} {'avec profil':>12} {'accélération':>13}")
+        for name, c_profile, (plain, guided) in results:
+            print(f"{name:<10} {c_profile:<8} {plain:11.3f}s {guided:11.3f}s {plain / guided:12.2f}x")
+
+if __name__ == "__main__":
+    main()
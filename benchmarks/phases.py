@@ -0,0 +1,191 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.generator import ProgramShape, generate_shaped_program
+from src.lexer import Lexer
+from src.parser import Parser
+from src.semantic_analyzer import SemanticAnalyzer, SemanticError
+from src.compiler_to_c import CCompiler
+from src.optimizer import optimize
+from src.vm import BytecodeCompiler
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_PHASES = ['lexer', 'parser', 'semantic', 'c', 'bytecode']
+
+# Chaque phase reçoit l'état produit par les phases précédentes (calculé hors
+# mesure) et renvoie son propre résultat.
+def run_lexer(state):
+    return Lexer(state['source']).tokenize()
+
+def run_parser(state):
+    return Parser(state['tokens']).parse()
+
+def run_semantic(state):
+    analyzer = SemanticAnalyzer()
+    diagnostics = analyzer.analyze(state['ast'])
+    if diagnostics:
+        raise SemanticError(diagnostics)
+    return analyzer.symbol_table
+
+def run_optimizer(state):
+    return optimize(state['ast'], state['symbol_table'], 2)
+
+def run_c(state):
+    return CCompiler(state['ast'], state['symbol_table']).generate_c_code()
+
+def run_bytecode(state):
+    return BytecodeCompiler(state['ast'], state['symbol_table']).compile()
+
+PHASES = {
+    'lexer': (run_lexer, 'tokens'),
+    'parser': (run_parser, 'ast'),
+    'semantic': (run_semantic, 'symbol_table'),
+    'optimizer': (run_optimizer, None),
+    'c': (run_c, None),
+    'bytecode': (run_bytecode, None),
+}
+PIPELINE = ['lexer', 'parser', 'semantic', 'optimizer', 'c', 'bytecode']
+
+def measure_time(phase, state, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        phase(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def measure_memory(phase, state):
+    # Exécution séparée: tracemalloc ralentit fortement les allocations.
+    gc.collect()
+    tracemalloc.start()
+    result = phase(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+def benchmark_size(size, phases, shape_options, seed, repeat, log):
+    shape = ProgramShape(size, **shape_options)
+    state = {'source': generate_shaped_program(shape, seed)}
+    results = []
+    for name in PIPELINE:
+        phase, key = PHASES[name]
+        if name not in phases:
+            if key is not None and any(PIPELINE.index(p) > PIPELINE.index(name) for p in phases):
+                state[key] = phase(state)
+            continue
+        result, peak = measure_memory(phase, state)
+        if key is not None:
+            state[key] = result
+        del result
+        seconds = measure_time(phase, state, repeat)
+        results.append({'size': size, 'phase': name, 'seconds': seconds, 'peak_bytes': peak,
+                        'ns_per_instruction': seconds * 1e9 / size})
+        log(f"{size:>9} {name:<10} {seconds:9.4f}s {seconds * 1e9 / size:9.0f} ns/instr "
+            f"{peak / 1024 / 1024:9.1f} Mo")
+    return results
+
+def parse_mix(items):
+    # ['mov=4', 'add=2'] -> {'mov': 4.0, 'add': 2.0}; None garde le mélange par défaut.
+    if not items:
+        return None
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition('=')
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+def run(args):
+    shape_options = {'variables': args.variables, 'arrays': args.arrays, 'array_size': args.array_size,
+                     'jump_density': args.jump_density, 'loop_depth': args.loop_depth,
+                     'mix': parse_mix(args.mix)}
+    phases = args.phases or DEFAULT_PHASES
+    for name in phases:
+        if name not in PHASES:
+            raise Exception(f"Phase inconnue: {name} (phases: {', '.join(PIPELINE)})")
+    report = {
+        'meta': {'python': sys.version.split()[0], 'platform': platform.platform(),
+                 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'seed': args.seed, 'repeat': args.repeat,
+                 'shape': shape_options},
+        'results': [],
+    }
+    print(f"{'taille':>9} {'phase':<10} {'temps':>10} {'par instr':>15} {'pic mémoire':>12}")
+    for size in args.sizes:
+        report['results'].extend(benchmark_size(size, phases, shape_options, args.seed, args.repeat,
+                                                lambda line: print(line, flush=True)))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRésultats écrits dans '{args.output}'")
+    return 0
+
+# Compare deux rapports et signale les phases dont le temps ou la mémoire a
+# augmenté de plus du seuil. Code de retour 1 s'il y a au moins une régression.
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = {(r['size'], r['phase']): r for r in json.load(f)['results']}
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    regressions = 0
+    print(f"{'taille':>9} {'phase':<10} {'temps':>9} {'mémoire':>9}")
+    for result in current:
+        before = baseline.get((result['size'], result['phase']))
+        if before is None:
+            continue
+        time_ratio = result['seconds'] / before['seconds'] if before['seconds'] else 1.0
+        memory_ratio = result['peak_bytes'] / before['peak_bytes'] if before['peak_bytes'] else 1.0
+        flags = []
+        # Les phases trop courtes sont dominées par le bruit de mesure.
+        if time_ratio > 1 + args.threshold and result['seconds'] >= args.min_seconds:
+            flags.append('temps')
+        if memory_ratio > 1 + args.threshold:
+            flags.append('mémoire')
+        regressions += bool(flags)
+        marker = f"  RÉGRESSION ({', '.join(flags)})" if flags else ''
+        print(f"{result['size']:>9} {result['phase']:<10} {time_ratio:8.2f}x {memory_ratio:8.2f}x{marker}")
+    print(f"\n{regressions} régression(s) au-delà de {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Temps et mémoire de chaque phase du compilateur")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="mesurer les phases et écrire un rapport JSON")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--phases', nargs='+', default=None,
+                            help=f"phases à mesurer parmi {', '.join(PIPELINE)} "
+                                 f"(par défaut: {' '.join(DEFAULT_PHASES)})")
+    run_parser.add_argument('--repeat', type=int, default=3, help="meilleur temps sur N exécutions")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--variables', type=int, default=8)
+    run_parser.add_argument('--arrays', type=int, default=1)
+    run_parser.add_argument('--array-size', type=int, default=16)
+    run_parser.add_argument('--jump-density', type=float, default=0.15)
+    run_parser.add_argument('--loop-depth', type=int, default=0)
+    run_parser.add_argument('--mix', nargs='+', default=None, metavar='OP=POIDS',
+                            help="mélange d'opérations, par exemple mov=4 add=2 jz=1")
+    run_parser.add_argument('-o', '--output', default='phases.json')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help="comparer deux rapports JSON")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="hausse relative tolérée (0.10 = 10%%)")
+    compare_parser.add_argument('--min-seconds', type=float, default=0.01,
+                                help="ne pas signaler les temps plus courts que cette durée")
+    compare_parser.set_defaults(handler=compare)
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    return args.handler(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+import argparse
+import tempfile
+import time
+
+from benchmarks.generator import (generate_loop_program, generate_array_program, generate_stack_program,
+                                  generate_flag_program)
+from src.pipeline import analyze
+from src.vm import BytecodeCompiler, VirtualMachine
+from src.compiler_to_python import PythonCompiler, PythonCache, PythonProgram, load
+
+def programs(args):
+    yield 'tableau', generate_loop_program(args.outer, args.inner)
+    yield 'deux tableaux', generate_array_program(args.outer, args.inner)
+    yield 'pile', generate_stack_program(args.outer, args.inner)
+    yield 'flags', generate_flag_program(args.outer, args.inner)
+
+def best_of(repeat, run):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def discard(value):
+    pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend Python comparé à la machine virtuelle")
+    parser.add_argument('--outer', type=int, default=200)
+    parser.add_argument('--inner', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'programme':<14} {'vm':>9} {'python':>9} {'accélération':>13} "
+          f"{'génération':>11} {'cache froid':>12} {'cache chaud':>12}")
+    for name, source in programs(args):
+        ast, symbol_table = analyze(source)
+        bytecode = BytecodeCompiler(ast, symbol_table).compile()
+        vm_seconds = best_of(args.repeat, lambda: VirtualMachine(bytecode, output_fn=discard).run())
+
+        start = time.perf_counter()
+        code, _ = PythonCompiler(ast, symbol_table).compile()
+        codegen = time.perf_counter() - start
+        program = PythonProgram(load(code), None)
+        python_seconds = best_of(args.repeat, lambda: program(output_fn=discard))
+
+        # Cache disque vide puis rempli: le second chargement évite la génération.
+        with tempfile.TemporaryDirectory() as cache_dir:
+            start = time.perf_counter()
+            PythonCache(cache_dir).get(ast, symbol_table)
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            PythonCache(cache_dir).get(ast, symbol_table)
+            warm = time.perf_counter() - start
+
+        print(f"{name:<14} {vm_seconds:8.3f}s {python_seconds:8.3f}s {vm_seconds / python_seconds:12.2f}x "
+              f"{codegen * 1000:9.1f}ms {cold * 1000:10.1f}ms {warm * 1000:10.1f}ms", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import generate_program
+from src.instrumentation import peak_rss
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler
+from src.streaming import compile_file_stream
+
+MODES = ('ast', 'flux')
+
+def peak_memory():
+    # VmHWM repart de zéro à l'exec; ru_maxrss garde le pic du processus parent
+    # (ici celui qui a généré le source).
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return peak_rss()
+
+def child(mode, source, output):
+    # Exécuté dans un processus neuf: le pic mesuré est celui de cette seule compilation.
+    start = time.perf_counter()
+    if mode == 'ast':
+        with open(source, 'r') as f:
+            ast, symbol_table = analyze(f.read())
+        with open(output, 'w') as f:
+            f.write(CCompiler(ast, symbol_table, range_analysis=False).generate_c_code())
+    else:
+        compile_file_stream(source, output)
+    print(json.dumps({'seconds': time.perf_counter() - start, 'peak_rss': peak_memory()}))
+
+def measure(mode, source, output):
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.streaming', '--child', mode, source, output],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"La compilation ({mode}) a échoué: {result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pic de mémoire résidente: compilation avec AST contre "
+                                                 "compilation en flux (mmap, C écrit au fil de l'eau)")
+    parser.add_argument('--sizes', default='100000,1000000,4000000',
+                        help="nombres d'instructions, séparés par des virgules")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'SOURCE', 'SORTIE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'instructions':>12} {'source':>9} {'mode':<5} {'temps':>8} {'pic RSS':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'programme.projet')
+        output = os.path.join(directory, 'programme.c')
+        for size in (int(n) for n in args.sizes.split(',')):
+            with open(source, 'w') as f:
+                f.write(generate_program(size, seed=args.seed))
+            megabytes = os.path.getsize(source) / 1e6
+            for mode in MODES:
+                result = measure(mode, source, output)
+                print(f"{size:>12} {megabytes:>7.1f}Mo {mode:<5} {result['seconds']:7.2f}s "
+                      f"{result['peak_rss'] / 1e6:>7.1f}Mo", flush=True)
+
+if __name__ == "__main__":
+    main()
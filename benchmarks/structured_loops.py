@@ -0,0 +1,51 @@
+import argparse
+
+from benchmarks.c_runtime import RUNTIME_MIX, run_time
+from benchmarks.generator import ProgramShape, generate_array_program, generate_loop_program, \
+    generate_shaped_program
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler, PROFILES
+from src.instrumentation import Instrumentation
+from src.native import NativeBuilder, OPT_LEVELS
+
+def programs(args):
+    # tableau et deux tableaux: boucles imbriquées qui parcourent et somment des
+    # tableaux; aléatoire: sauts quelconques, en partie irréductibles.
+    yield 'tableau', generate_loop_program(args.outer, args.size)
+    yield 'deux tableaux', generate_array_program(args.outer, args.size)
+    shape = ProgramShape(args.instructions, variables=8, arrays=0, jump_density=0.15,
+                         loop_depth=args.loop_depth, loop_iterations=args.iterations, mix=RUNTIME_MIX)
+    yield 'aléatoire', generate_shaped_program(shape, args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'exécution du C structuré (for/if/break) "
+                                                 "contre le C à un label par instruction")
+    parser.add_argument('--outer', type=int, default=30000)
+    parser.add_argument('--size', type=int, default=4000)
+    parser.add_argument('--instructions', type=int, default=2000)
+    parser.add_argument('--loop-depth', type=int, default=3)
+    parser.add_argument('--iterations', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cc', default='cc')
+    parser.add_argument('--copt', default='2', choices=OPT_LEVELS)
+    parser.add_argument('--repeat', type=int, default=9)
+    args = parser.parse_args()
+
+    builder = NativeBuilder(args.cc, args.copt, use_cache=False)
+    print(f"{'programme':<14} {'profil':<8} {'boucles':>8} {'goto':>5} {'goto (s)':>9} {'structuré (s)':>14} "
+          f"{'accélération':>13}")
+    for name, source in programs(args):
+        ast, symbol_table = analyze(source)
+        for profile in PROFILES:
+            times = {}
+            for structured in (False, True):
+                instrumentation = Instrumentation()
+                compiler = CCompiler(ast, symbol_table, instrumentation, profile, structured=structured)
+                build = builder.build(compiler.generate_c_code())
+                times[structured] = run_time(build, args.repeat)
+            counters = instrumentation.counters
+            print(f"{name:<14} {profile:<8} {counters.get('loops', 0):>8} {counters.get('gotos', 0):>5} "
+                  f"{times[False]:9.3f} {times[True]:14.3f} {times[False] / times[True]:12.2f}x", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks.generator import generate_collatz_program, generate_loop_program
+from src.pipeline import analyze
+from src.vm import BytecodeCompiler, VirtualMachine
+from src.vector_vm import VectorMachine
+
+def programs(args):
+    # collatz: voies divergentes; tableau: sans entrée, voies toujours réunies.
+    yield 'collatz', generate_collatz_program(args.values), args.values
+    yield 'tableau', generate_loop_program(args.outer, args.inner), 0
+
+def sequential_time(bytecode, inputs):
+    start = time.perf_counter()
+    for row in inputs.tolist():
+        values = iter(row)
+        VirtualMachine(bytecode, lambda: next(values), lambda value: None).run()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Exécutions par seconde: machine virtuelle vectorisée "
+                                                 "(NumPy) contre exécutions séquentielles")
+    parser.add_argument('--lanes', default='1,10,100,1000,10000',
+                        help="nombres d'exécutions simultanées, séparés par des virgules")
+    parser.add_argument('--values', type=int, default=4, help="entrées lues par exécution")
+    parser.add_argument('--max-value', type=int, default=1000)
+    parser.add_argument('--outer', type=int, default=5)
+    parser.add_argument('--inner', type=int, default=50)
+    parser.add_argument('--sequential', type=int, default=200,
+                        help="exécutions séquentielles mesurées au plus (le débit est extrapolé)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    counts = [int(n) for n in args.lanes.split(',')]
+    print(f"{'programme':<10} {'voies':>7} {'séquentiel':>13} {'vectorisé':>13} {'accélération':>13} "
+          f"{'occupation':>11}")
+    for name, source, values in programs(args):
+        ast, symbol_table = analyze(source)
+        bytecode = BytecodeCompiler(ast, symbol_table).compile()
+        for lanes in counts:
+            inputs = np.array([[rng.randint(1, args.max_value) for _ in range(values)] for _ in range(lanes)],
+                              dtype=np.int64).reshape(lanes, values)
+            sample = inputs[:args.sequential]
+            sequential = len(sample) / sequential_time(bytecode, sample)
+
+            machine = VectorMachine(bytecode, inputs)
+            start = time.perf_counter()
+            machine.run()
+            vectorized = lanes / (time.perf_counter() - start)
+            occupancy = machine.executed / (machine.cycles * lanes) if machine.cycles else 1.0
+            print(f"{name:<10} {lanes:>7} {sequential:>11,.0f}/s {vectorized:>11,.0f}/s "
+                  f"{vectorized / sequential:12.2f}x {100 * occupancy:10.1f}%", flush=True)
+
+if __name__ == "__main__":
+    main()
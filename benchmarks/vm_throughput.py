@@ -0,0 +1,28 @@
+import argparse
+import time
+
+from benchmarks.generator import generate_loop_program
+from src.pipeline import analyze
+from src.vm import BytecodeCompiler, VirtualMachine
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de la machine virtuelle (instructions/s)")
+    parser.add_argument('--outer', type=int, default=1000)
+    parser.add_argument('--inner', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ast, symbol_table = analyze(generate_loop_program(args.outer, args.inner))
+    bytecode = BytecodeCompiler(ast, symbol_table).compile()
+
+    best = None
+    for _ in range(args.repeat):
+        vm = VirtualMachine(bytecode, output_fn=lambda value: None)
+        start = time.perf_counter()
+        vm.run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{vm.steps} instructions, meilleur temps {best:.3f}s, {vm.steps / best:,.0f} instructions/s")
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,316 @@
-from src.lexer import Lexer
-from src.parser import Parser
-from src.semantic_analyzer import SemanticAnalyzer
-from src.compiler_to_c import CCompiler
-import subprocess
+import argparse
+from src.pipeline import analyze
+from src.frontend_cache import FrontendCache
+from src.compiler_to_c import CCompiler, PROFILES
+from src.vm import run_program
+from src.compiler_to_python import PythonCache, run_python
+from src.vector_vm import read_input_matrix, run_vectorized
+from src.streaming import compile_file_stream
+from src.native import NativeBuilder, AsmBuilder, OPT_LEVELS
+from src.compiler_to_asm import AsmCompiler
+from src.optimizer import optimize, LEVELS
+from src.batch import collect_sources, compile_batch, BatchSummary
+from src.incremental import CompilationSession
+from src.server import serve
+from src.instrumentation import Instrumentation, NO_INSTRUMENTATION
+from src.pgo import ExecutionProfile
+import glob
+import os
+import time
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"entier strictement positif attendu: {text}")
+    return value
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compilateur micro-assembleur")
+    parser.add_argument('sources', nargs='*', default=['examples/test.projet'],
+                        help="fichiers, répertoires ou motifs glob; plusieurs sources lancent une compilation par lot")
+    parser.add_argument('-o', '--output', default='output.c', help="fichier C généré")
+    parser.add_argument('--vm', action='store_true',
+                        help="exécuter le programme dans la machine virtuelle au lieu de générer du C")
+    parser.add_argument('--python', action='store_true',
+                        help="exécuter le programme compilé en fonction Python au lieu de générer du C")
+    parser.add_argument('--inputs', metavar='FICHIER', default=None,
+                        help="exécuter le programme une fois par ligne d'entrées du fichier, toutes les "
+                             "exécutions ensemble dans la machine virtuelle vectorisée (numpy)")
+    parser.add_argument('-O', dest='opt_level', type=int, default=0, choices=sorted(LEVELS),
+                        help="niveau d'optimisation du programme avant la génération de code")
+    parser.add_argument('--run', action='store_true',
+                        help="compiler le C généré avec cc puis exécuter le programme natif")
+    parser.add_argument('--profile', default='checked', choices=PROFILES,
+                        help="profil du C généré: checked (index vérifiés, rapport des dépassements) "
+                             "ou fast (état en variables locales, sans vérification d'index)")
+    parser.add_argument('--no-range-analysis', action='store_true',
+                        help="garder toutes les vérifications d'index du profil checked")
+    parser.add_argument('--goto', action='store_true',
+                        help="un label par instruction et un goto par saut, sans reconstruire "
+                             "boucles et conditionnelles")
+    parser.add_argument('--instrument', metavar='FICHIER', default=None,
+                        help="générer un C instrumenté qui ajoute à chaque exécution ses compteurs par "
+                             "instruction et par saut au profil FICHIER ($PROJET_PROFILE s'il est défini)")
+    parser.add_argument('--use-profile', metavar='FICHIER', default=None,
+                        help="compiler avec le profil d'exécution FICHIER: sauts LIKELY/UNLIKELY, branche "
+                             "chaude en premier, arène ordonnée selon les exécutions")
+    parser.add_argument('--profile-summary', metavar='FICHIER', default=None,
+                        help="afficher les instructions les plus exécutées d'après le profil FICHIER")
+    parser.add_argument('--top', type=int, default=20, help="instructions affichées par --profile-summary")
+    parser.add_argument('--stream', action='store_true',
+                        help="générer le C en flux sans construire l'AST (source lu par mmap): mémoire "
+                             "indépendante de la taille du programme, sans -O ni analyse d'intervalles")
+    parser.add_argument('--asm', action='store_true',
+                        help="générer de l'assembleur x86-64 (GNU as) au lieu du C (-o output.s par défaut)")
+    parser.add_argument('--assembler', default='as', help="assembleur utilisé par --asm --run")
+    parser.add_argument('--cc', default='cc', help="compilateur C utilisé par --run (édition des liens avec --asm)")
+    parser.add_argument('--copt', default='2', choices=OPT_LEVELS, help="niveau d'optimisation C (-O)")
+    parser.add_argument('--cache-dir', default=None, help="répertoire des caches (front end et exécutables)")
+    parser.add_argument('--cache-size', type=int, default=256, help="taille maximale de chaque cache en Mo")
+    parser.add_argument('--no-cache', action='store_true', help="désactiver les caches")
+    parser.add_argument('--clear-cache', action='store_true', help="vider le cache du front end avant de compiler")
+    parser.add_argument('-j', '--jobs', type=positive_int, default=None,
+                        help="nombre de processus pour la compilation par lot et --parallel-frontend "
+                             "(par défaut: nombre de coeurs)")
+    parser.add_argument('--parallel-frontend', action='store_true',
+                        help="analyser les instructions d'un gros source par fragments dans -j processus")
+    parser.add_argument('--output-dir', default=None,
+                        help="répertoire des fichiers C d'un lot (par défaut: à côté de chaque source)")
+    parser.add_argument('--watch', action='store_true',
+                        help="surveiller le source et regénérer le C de façon incrémentale à chaque modification")
+    parser.add_argument('--serve', action='store_true',
+                        help="lancer le serveur de compilation (requêtes du client: python client.py)")
+    parser.add_argument('--socket', default=None,
+                        help="socket Unix du serveur (par défaut: $PROJET_SOCKET ou projet-<uid>.sock "
+                             "dans $TMPDIR ou /tmp)")
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="requêtes traitées à la fois par le serveur (par défaut: 4 par processus)")
+    parser.add_argument('--max-steps', type=positive_int, default=None,
+                        help="instructions exécutées au plus par une requête run du serveur "
+                             "(par défaut: 10 000 000)")
+    parser.add_argument('--stats', action='store_true',
+                        help="afficher le temps, la mémoire et les compteurs de chaque phase")
+    parser.add_argument('--stats-memory', action='store_true',
+                        help="pic mémoire de chaque phase mesuré avec tracemalloc (plus lent) au lieu du RSS")
+    parser.add_argument('--trace', metavar='FICHIER', default=None,
+                        help="écrire les phases au format Chrome trace-event (chrome://tracing, Perfetto)")
+    return parser.parse_args()
+
+def is_batch(args):
+    if args.vm or args.python or args.inputs or args.run or args.watch:
+        return False
+    return len(args.sources) > 1 or any(os.path.isdir(s) or glob.has_magic(s) for s in args.sources)
+
+# Options propres à un seul programme: un lot ne peut pas les appliquer.
+SINGLE_FILE_OPTIONS = (('stream', '--stream'), ('instrument', '--instrument'), ('use_profile', '--use-profile'),
+                       ('profile_summary', '--profile-summary'))
+
+def main_batch(args):
+    rejected = [option for name, option in SINGLE_FILE_OPTIONS if getattr(args, name)]
+    if rejected:
+        print(f"Erreur: {', '.join(rejected)} incompatible(s) avec la compilation de plusieurs fichiers")
+        return 1
+    sources = collect_sources(args.sources)
+    print(f"Compilation de {len(sources)} fichier(s)")
+    if args.clear_cache and not args.no_cache:
+        FrontendCache(args.cache_dir, args.cache_size * 1024 * 1024).clear()
+    summary = BatchSummary()
+    for result in compile_batch(sources, args.output_dir, args.jobs, args.cache_dir,
+                                not args.no_cache, summary, args.opt_level, args.cache_size * 1024 * 1024,
+                                args.asm, {'profile': args.profile, 'range_analysis': not args.no_range_analysis,
+                                           'structured': not args.goto}):
+        if result.error:
+            print(f"ERREUR {result.source}: {result.error}", flush=True)
+        else:
+            print(f"ok     {result.source} -> {result.output} "
+                  f"({result.instructions} instructions, {result.seconds:.3f}s)", flush=True)
+    print(f"\n{summary.files} fichier(s), {summary.failures} erreur(s) en {summary.seconds:.2f}s: "
+          f"{summary.files_per_second():.1f} fichiers/s, {summary.instructions_per_second():,.0f} instructions/s")
+    return 1 if summary.failures else 0
+
+def compile_session(session, output, seconds, edited):
+    try:
+        session.save_to_file(output)
+        print(f"{edited} fragment(s) réanalysé(s) en {seconds * 1000:.1f} ms -> '{output}'", flush=True)
+    except Exception as e:
+        print(f'Erreur: {e}', flush=True)
+
+def main_watch(args, interval=0.5):
+    print(f"Surveillance de '{args.source}' (Ctrl-C pour arrêter)")
+    mtime = os.stat(args.source).st_mtime_ns
+    with open(args.source, 'r') as file:
+        source_code = file.read()
+    start = time.perf_counter()
+    session = CompilationSession(source_code)
+    compile_session(session, args.output, time.perf_counter() - start, len(session.chunks))
+    try:
+        while True:
+            time.sleep(interval)
+            current = os.stat(args.source).st_mtime_ns
+            if current == mtime:
+                continue
+            mtime = current
+            with open(args.source, 'r') as file:
+                source_code = file.read()
+            start = time.perf_counter()
+            edited = session.update(source_code)
+            compile_session(session, args.output, time.perf_counter() - start, edited)
+    except KeyboardInterrupt:
+        return 0
+
+def main_serve(args):
+    try:
+        serve(args.socket, args.jobs, args.max_pending, args.cache_dir, not args.no_cache, args.max_steps)
+    except Exception as e:
+        print(f'Erreur: {e}')
+        return 1
+    return 0
 
 def main():
+    args = parse_args()
+    if args.serve:
+        return main_serve(args)
+    if is_batch(args):
+        return main_batch(args)
+    args.source = args.sources[0]
+    if args.watch:
+        return main_watch(args)
+    instrumentation = None
+    if args.stats or args.stats_memory or args.trace:
+        instrumentation = Instrumentation(trace_memory=args.stats_memory)
+    try:
+        return compile_file(args, instrumentation)
+    finally:
+        # Aussi en cas d'erreur: c'est souvent là qu'on veut savoir quelle phase a coûté.
+        if instrumentation is not None:
+            if args.stats or args.stats_memory:
+                print("\nStatistiques:")
+                print(instrumentation.summary())
+            if args.trace:
+                instrumentation.write_trace(args.trace)
+                print(f"Trace écrite dans '{args.trace}'")
+
+def compile_file(args, instrumentation=None):
+    instrumentation = instrumentation or NO_INSTRUMENTATION
     print("Compilateur Assembleur - Exécution du fichier source:")
     try:
-        with open('examples/test.projet', 'r') as file:
+        if args.stream:
+            if args.vm or args.python or args.inputs or args.run or args.opt_level or args.asm:
+                raise Exception("--stream ne fait que générer le C: incompatible avec -O, --vm, --python, "
+                                "--inputs, --run et --asm")
+            compile_file_stream(args.source, args.output, args.profile, instrumentation)
+            print(f"\nCode C généré dans '{args.output}'")
+            return
+
+        with open(args.source, 'r') as file:
             source_code = file.read()
-        
-        print("\nCode source:")
-        print(source_code)
-        
-        lexer = Lexer(source_code)
-        tokens = lexer.tokenize()
-        
-        parser = Parser(tokens)
-        ast = parser.parse()
-        
-        semantic_analyzer = SemanticAnalyzer()
-        semantic_analyzer.visit(ast)
-        
-        compiler = CCompiler(ast, semantic_analyzer.symbol_table)
-        compiler.save_to_file("output.c")
-        
-        print("\nCode C généré dans 'output.c'")
+
+        if not (args.vm or args.python or args.inputs or args.run or args.profile_summary):
+            print("\nCode source:")
+            print(source_code)
+
+        frontend_cache = None
+        if not args.no_cache:
+            frontend_cache = FrontendCache(args.cache_dir, args.cache_size * 1024 * 1024)
+            if args.clear_cache:
+                frontend_cache.clear()
+        workers = args.jobs if args.parallel_frontend else 1
+        ast, symbol_table = analyze(source_code, frontend_cache, instrumentation, workers)
+
+        if args.opt_level:
+            with instrumentation.phase(f'optimizer-O{args.opt_level}') as phase:
+                ast, symbol_table, manager = optimize(ast, symbol_table, args.opt_level)
+                phase.count('instructions', len(ast.instructions))
+            print(f"\nOptimisations -O{args.opt_level}:")
+            for name, count in manager.report.items():
+                print(f"  {name}: {count} modification(s)")
+
+        if args.profile_summary:
+            profile = ExecutionProfile.load(args.profile_summary, ast.instructions)
+            print(f"\n{profile.summary(ast.instructions, args.top)}")
+            return
+
+        execution_profile = None
+        if args.use_profile:
+            execution_profile = ExecutionProfile.load(args.use_profile, ast.instructions)
+
+        if args.vm:
+            with instrumentation.phase('vm') as phase:
+                vm, elapsed = run_program(ast, symbol_table)
+                phase.count('steps', vm.steps)
+            rate = vm.steps / elapsed if elapsed else 0
+            print(f"\n{vm.steps} instructions exécutées en {elapsed:.3f}s ({rate:,.0f} instructions/s)")
+            return
+
+        if args.inputs:
+            inputs = read_input_matrix(args.inputs)
+            with instrumentation.phase('vector-vm') as phase:
+                machine, elapsed = run_vectorized(ast, symbol_table, inputs)
+                phase.count('lanes', machine.lanes)
+                phase.count('steps', machine.executed)
+                phase.count('cycles', machine.cycles)
+            for lane, output in enumerate(machine.outputs()):
+                error = machine.errors[lane]
+                print(f"Exécution {lane}: {' '.join(map(str, output))}" + (f" ({error})" if error else ""))
+            failed = sum(error is not None for error in machine.errors)
+            rate = machine.lanes / elapsed if elapsed else 0
+            print(f"\n{machine.lanes} exécutions ({failed} en erreur) en {elapsed:.3f}s ({rate:,.0f} exécutions/s)")
+            return
+
+        if args.python:
+            cache = PythonCache(args.cache_dir, args.cache_size * 1024 * 1024, use_disk=not args.no_cache)
+            with instrumentation.phase('python') as phase:
+                _, elapsed = run_python(ast, symbol_table, cache=cache, instrumentation=instrumentation)
+                phase.count('cache_hits', cache.hits)
+                phase.count('cache_misses', cache.misses)
+            print(f"\nCache: {'hit' if cache.hits else 'miss'}, exécution en {elapsed:.3f}s")
+            return
+
+        if args.asm:
+            compiler = AsmCompiler(ast, symbol_table, instrumentation, range_analysis=not args.no_range_analysis)
+            if args.run:
+                builder = AsmBuilder(args.assembler, args.cc, args.cache_dir, args.cache_size * 1024 * 1024,
+                                     use_cache=not args.no_cache)
+                asm_code = compiler.generate_asm_code()
+                with instrumentation.phase('as') as phase:
+                    build = builder.build(asm_code)
+                    phase.count('cache_hits' if build.cache_hit else 'cache_misses')
+                if build.cache_hit:
+                    print(f"Cache: hit, assemblage évité ({build.saved_seconds:.3f}s économisées)", flush=True)
+                else:
+                    print(f"Cache: miss, assemblage et édition des liens en {build.compile_seconds:.3f}s",
+                          flush=True)
+                return builder.run(build).returncode
+            output = 'output.s' if args.output == 'output.c' else args.output
+            compiler.save_to_file(output)
+            print(f"\nAssembleur généré dans '{output}'")
+            return
+
+        compiler = CCompiler(ast, symbol_table, instrumentation, args.profile,
+                             range_analysis=not args.no_range_analysis, structured=not args.goto,
+                             instrument=args.instrument, execution_profile=execution_profile)
+
+        if args.run:
+            builder = NativeBuilder(args.cc, args.copt, args.cache_dir, args.cache_size * 1024 * 1024,
+                                    use_cache=not args.no_cache)
+            c_code = compiler.generate_c_code()
+            with instrumentation.phase('cc') as phase:
+                build = builder.build(c_code)
+                phase.count('cache_hits' if build.cache_hit else 'cache_misses')
+            if build.cache_hit:
+                print(f"Cache: hit, compilation C évitée ({build.saved_seconds:.3f}s économisées)", flush=True)
+            else:
+                print(f"Cache: miss, compilation C en {build.compile_seconds:.3f}s", flush=True)
+            return builder.run(build).returncode
+
+        compiler.save_to_file(args.output)
+        if compiler.bounds is not None and compiler.bounds.total:
+            print(f"\nAnalyse d'intervalles: {compiler.bounds}")
+
+        print(f"\nCode C généré dans '{args.output}'")
     except Exception as e:
         print(f'Erreur: {e}')
+        return 1
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
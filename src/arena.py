@@ -0,0 +1,81 @@
+from .ast import Variable, Register, ArrayAccess
+from .cfg import immediate_dominators, natural_loops
+
+REGISTERS = ('AX', 'BX', 'CX', 'DX')
+# Poids d'une référence par niveau de boucle qui l'entoure.
+LOOP_WEIGHT = 8
+
+def reference_counts(instructions, cfg=None, executions=None):
+    # Références statiques à chaque nom; avec le graphe de flot, une référence
+    # dans une boucle compte LOOP_WEIGHT fois plus par niveau d'imbrication.
+    # executions (profil d'exécution, une valeur par instruction) remplace
+    # cette estimation par les exécutions mesurées.
+    weights = executions
+    if weights is None and cfg is not None and cfg.blocks:
+        depth = [0] * len(cfg.blocks)
+        for body in natural_loops(cfg, immediate_dominators(cfg)).values():
+            for block in body:
+                depth[block] += 1
+        weights = [LOOP_WEIGHT ** min(depth[cfg.block_of[i]], 6) for i in range(len(cfg.instructions))]
+        instructions = cfg.instructions
+    counts = {}
+    for index, instr in enumerate(instructions):
+        op = instr.operation
+        if op is None:
+            continue
+        weight = weights[index] if weights is not None else 1
+        for operand in (op.operand1, op.operand2):
+            if isinstance(operand, ArrayAccess):
+                counts[operand.name] = counts.get(operand.name, 0) + weight
+                operand = operand.index
+            if isinstance(operand, (Variable, Register)):
+                counts[operand.name] = counts.get(operand.name, 0) + weight
+    return counts
+
+# Tout l'état d'un programme dans un seul tableau de cases int16: registres,
+# cases de contrôle propres au backend (flags, pointeur de pile), variables,
+# tableaux puis régions de fin (pile). Les variables les plus utilisées sont
+# placées juste après les registres, sur les mêmes lignes de cache; les
+# tableaux suivent, les plus utilisés d'abord. Sans instructions (compilation
+# en flux), l'ordre est celui des déclarations.
+#   offsets:  registre ou symbole -> première case
+#   reserved: case de contrôle ou région de fin -> première case (noms à part:
+#             une variable peut s'appeler comme elles)
+#   slots:    case de chaque symbole, indexée par Symbol.slot
+class ArenaLayout:
+    def __init__(self, symbol_table, instructions=(), cfg=None, control=(), tail=(), executions=None):
+        counts = reference_counts(instructions, cfg, executions)
+        symbols = sorted(symbol_table.symbols.values(), key=lambda symbol: symbol.slot)
+        scalars = [symbol for symbol in symbols if symbol.type == 'byte']
+        arrays = [symbol for symbol in symbols if symbol.type == 'array']
+        scalars.sort(key=lambda symbol: -counts.get(symbol.name, 0))
+        arrays.sort(key=lambda symbol: -counts.get(symbol.name, 0))
+
+        self.offsets = {}
+        self.reserved = {}
+        self.sizes = {}
+        self.size = 0
+        for name in REGISTERS:
+            self.allocate(self.offsets, name, 1)
+        for name in control:
+            self.allocate(self.reserved, name, 1)
+        for symbol in scalars:
+            self.allocate(self.offsets, symbol.name, 1)
+        for symbol in arrays:
+            self.allocate(self.offsets, symbol.name, symbol.size)
+        self.data_size = self.size
+        for name, size in tail:
+            self.allocate(self.reserved, name, size)
+        self.slots = [self.offsets[symbol.name] for symbol in symbols]
+
+    def allocate(self, table, name, size):
+        table[name] = self.size
+        if table is self.offsets:
+            self.sizes[name] = size
+        self.size += size
+
+    def __getitem__(self, name):
+        return self.offsets[name]
+
+    def __contains__(self, name):
+        return name in self.offsets
@@ -1,49 +1,74 @@
 
 class AST:
-    pass
+    __slots__ = ()
 
 class Program(AST):
+    __slots__ = ('declarations', 'instructions')
+
     def __init__(self, declarations, instructions):
         self.declarations = declarations
         self.instructions = instructions
 
 class VarDeclaration(AST):
-    def __init__(self, name, type_):
+    __slots__ = ('name', 'type', 'line', 'column')
+
+    def __init__(self, name, type_, line=0, column=0):
         self.name = name
         self.type = type_
+        self.line = line
+        self.column = column
 
 class ArrayDeclaration(AST):
-    def __init__(self, name, size):
+    __slots__ = ('name', 'size', 'line', 'column')
+
+    def __init__(self, name, size, line=0, column=0):
         self.name = name
         self.size = size
+        self.line = line
+        self.column = column
 
 class Instruction(AST):
-    def __init__(self, number, operation):
+    # line/column: position du numéro de l'instruction dans le source.
+    __slots__ = ('number', 'operation', 'line', 'column')
+
+    def __init__(self, number, operation, line=0, column=0):
         self.number = number
         self.operation = operation
+        self.line = line
+        self.column = column
 
 class Operation(AST):
+    __slots__ = ('type', 'operand1', 'operand2')
+
     def __init__(self, type_, operand1=None, operand2=None):
         self.type = type_
         self.operand1 = operand1
         self.operand2 = operand2
 
 class Operand(AST):
-    pass
+    __slots__ = ()
 
 class Number(Operand):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
 class Variable(Operand):
+    __slots__ = ('name',)
+
     def __init__(self, name):
         self.name = name
 
 class Register(Operand):
+    __slots__ = ('name',)
+
     def __init__(self, name):
         self.name = name
 
 class ArrayAccess(Operand):
+    __slots__ = ('name', 'index')
+
     def __init__(self, name, index):
         self.name = name
         self.index = index # type: ignore
\ No newline at end of file
@@ -0,0 +1,118 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .pipeline import analyze
+from .frontend_cache import FrontendCache
+from .compiler_to_c import CCompiler
+from .compiler_to_asm import AsmCompiler
+from .optimizer import optimize
+
+SOURCE_SUFFIX = '.projet'
+
+def collect_sources(patterns):
+    sources = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, '**', '*' + SOURCE_SUFFIX), recursive=True))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                sources.append(path)
+    return sources
+
+def output_path(source, output_dir=None, root=None, suffix='.c'):
+    base = os.path.splitext(source)[0] + suffix
+    if output_dir is None:
+        return base
+    relative = os.path.relpath(base, root) if root else os.path.basename(base)
+    return os.path.join(output_dir, relative)
+
+class FileResult:
+    def __init__(self, source, output=None, instructions=0, seconds=0.0, error=None):
+        self.source = source
+        self.output = output
+        self.instructions = instructions
+        self.seconds = seconds
+        self.error = error
+
+_worker_cache = None
+
+def init_worker(cache_dir, use_cache, max_cache_bytes=256 * 1024 * 1024):
+    global _worker_cache
+    _worker_cache = FrontendCache(cache_dir, max_cache_bytes) if use_cache else None
+
+# options: profile, range_analysis et structured du CCompiler; avec asm, seul
+# range_analysis s'applique.
+def compile_file(source, output, opt_level=0, asm=False, options=None):
+    start = time.perf_counter()
+    try:
+        with open(source, 'r') as file:
+            source_code = file.read()
+        ast, symbol_table = analyze(source_code, _worker_cache)
+        if opt_level:
+            ast, symbol_table, _ = optimize(ast, symbol_table, opt_level)
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        options = options or {}
+        if asm:
+            AsmCompiler(ast, symbol_table, range_analysis=options.get('range_analysis', True)).save_to_file(output)
+        else:
+            CCompiler(ast, symbol_table, **options).save_to_file(output)
+        return FileResult(source, output, len(ast.instructions), time.perf_counter() - start)
+    except Exception as e:
+        return FileResult(source, None, 0, time.perf_counter() - start, str(e))
+
+class BatchSummary:
+    def __init__(self):
+        self.files = 0
+        self.failures = 0
+        self.instructions = 0
+        self.seconds = 0.0
+
+    def add(self, result):
+        self.files += 1
+        self.instructions += result.instructions
+        if result.error:
+            self.failures += 1
+
+    def files_per_second(self):
+        return self.files / self.seconds if self.seconds else 0.0
+
+    def instructions_per_second(self):
+        return self.instructions / self.seconds if self.seconds else 0.0
+
+# Compile chaque fichier dans un processus du pool et renvoie les FileResult au
+# fur et à mesure qu'ils se terminent; une erreur n'arrête pas le lot.
+def compile_batch(sources, output_dir=None, workers=None, cache_dir=None, use_cache=True, summary=None,
+                  opt_level=0, max_cache_bytes=256 * 1024 * 1024, asm=False, options=None):
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(s)) for s in sources]) if sources else None
+    suffix = '.s' if asm else '.c'
+    jobs = [(source, output_path(os.path.abspath(source) if output_dir else source, output_dir, root, suffix))
+            for source in sources]
+    summary = summary if summary is not None else BatchSummary()
+    start = time.perf_counter()
+
+    if workers == 1:
+        init_worker(cache_dir, use_cache, max_cache_bytes)
+        for source, output in jobs:
+            result = compile_file(source, output, opt_level, asm, options)
+            summary.add(result)
+            summary.seconds = time.perf_counter() - start
+            yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(cache_dir, use_cache, max_cache_bytes)) as pool:
+        futures = [pool.submit(compile_file, source, output, opt_level, asm, options) for source, output in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            summary.add(result)
+            summary.seconds = time.perf_counter() - start
+            yield result
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import tempfile
+
+DEFAULT_CACHE_DIR = os.environ.get('PROJET_CACHE_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'projet_ds')
+
+def content_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+# Cache disque adressé par contenu: une entrée par clé, éviction LRU sur la date
+# de modification (rafraîchie à chaque lecture) dès que la taille totale dépasse
+# max_bytes. L'entrée que put vient d'écrire n'est jamais évincée par ce put. Les écritures passent par un fichier temporaire puis os.replace pour
+# que plusieurs processus puissent partager le même répertoire.
+class DiskCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, suffix=''):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key, suffix=''):
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, data, suffix='', mode=None):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            if mode is not None:
+                os.chmod(tmp, mode)
+            os.replace(tmp, self.path(key, suffix))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        path = self.path(key, suffix)
+        self.evict(keep=path)
+        return path
+
+    def remove(self, key, suffix=''):
+        try:
+            os.unlink(self.path(key, suffix))
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith('.tmp-') or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,521 @@
+from collections import deque
+from .token import TokenType
+from .ast import Number, Variable, Register, ArrayAccess
+
+# Tuples plutôt qu'ensembles: le test d'appartenance compare par identité sans
+# passer par TokenType.__hash__, nettement plus lent sur les gros programmes.
+JUMPS = (TokenType.JMP, TokenType.JZ, TokenType.JS, TokenType.JO)
+CONDITIONAL_JUMPS = (TokenType.JZ, TokenType.JS, TokenType.JO)
+ARITHMETIC = (TokenType.ADD, TokenType.SUB, TokenType.MULT, TokenType.DIV,
+              TokenType.AND, TokenType.OR, TokenType.NOT)
+BINARY = (TokenType.MOV, TokenType.ADD, TokenType.SUB, TokenType.MULT, TokenType.DIV,
+          TokenType.AND, TokenType.OR)
+READS = (TokenType.PRINT, TokenType.PUSH)
+REGISTER_NAMES = ('AX', 'BX', 'CX', 'DX')
+
+# Bits des flags dans les ensembles de vivacité; les variables scalaires suivent.
+ZF, SF, OF = 1, 2, 4
+FLAGS = ZF | SF | OF
+FLAG_READS = {TokenType.JZ: ZF, TokenType.JS: SF, TokenType.JO: OF}
+
+def wrap16(value):
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+def evaluate(op_type, a, b):
+    if op_type == TokenType.ADD:
+        result = a + b
+    elif op_type == TokenType.SUB:
+        result = a - b
+    elif op_type == TokenType.MULT:
+        result = a * b
+    elif op_type == TokenType.DIV:
+        if b == 0:
+            return None
+        result = abs(a) // abs(b)
+        if (a < 0) != (b < 0):
+            result = -result
+    elif op_type == TokenType.AND:
+        result = a & b
+    elif op_type == TokenType.OR:
+        result = a | b
+    else:
+        result = ~a
+    return wrap16(result)
+
+def scalar_name(operand):
+    if isinstance(operand, (Variable, Register)):
+        return operand.name
+    return None
+
+def jump_target(instruction):
+    op = instruction.operation
+    if op is not None and op.type in JUMPS:
+        return op.operand1.value
+    return None
+
+class BasicBlock:
+    def __init__(self, index, start, end):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.successors = []
+        self.predecessors = []
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f'BasicBlock({self.index}, [{self.start}:{self.end}], succ={self.successors})'
+
+# Blocs de base d'une liste d'instructions: un bloc commence à l'instruction 0, à
+# chaque cible de saut et après chaque saut ou halt. Le bloc 0 est l'entrée; un
+# bloc sans successeur termine le programme (halt ou fin du code).
+class ControlFlowGraph:
+    def __init__(self, instructions):
+        self.instructions = instructions if isinstance(instructions, list) else list(instructions)
+        self.labels = {}
+        for index, instr in enumerate(self.instructions):
+            self.labels.setdefault(instr.number, index)
+        self.blocks = []
+        self.block_of = [0] * len(self.instructions)
+        self.build()
+
+    def target_index(self, label):
+        index = self.labels.get(label)
+        if index is None:
+            raise Exception(f"Erreur sémantique: Label d'instruction {label} non défini")
+        return index
+
+    def build(self):
+        count = len(self.instructions)
+        if not count:
+            return
+        leaders = [False] * (count + 1)
+        leaders[0] = True
+        for index, instr in enumerate(self.instructions):
+            op = instr.operation
+            if op is None:
+                continue
+            if op.type in JUMPS:
+                leaders[self.target_index(op.operand1.value)] = True
+                leaders[index + 1] = True
+            elif op.type == TokenType.HALT:
+                leaders[index + 1] = True
+
+        start = 0
+        for index in range(1, count + 1):
+            if index == count or leaders[index]:
+                block = BasicBlock(len(self.blocks), start, index)
+                self.blocks.append(block)
+                for i in range(start, index):
+                    self.block_of[i] = block.index
+                start = index
+
+        for block in self.blocks:
+            last = self.instructions[block.end - 1].operation
+            following = block.index + 1 if block.end < count else None
+            successors = []
+            if last is not None and last.type in JUMPS:
+                successors.append(self.block_of[self.labels[last.operand1.value]])
+                if last.type in CONDITIONAL_JUMPS and following is not None:
+                    successors.append(following)
+            elif (last is None or last.type != TokenType.HALT) and following is not None:
+                successors.append(following)
+            for s in successors:
+                if s not in block.successors:
+                    block.successors.append(s)
+                    self.blocks[s].predecessors.append(block.index)
+
+    def instruction_successors(self, index):
+        block = self.blocks[self.block_of[index]]
+        if index + 1 < block.end:
+            return [index + 1]
+        return [self.blocks[s].start for s in block.successors]
+
+    def reachable(self):
+        if not self.blocks:
+            return set()
+        seen = {0}
+        stack = [0]
+        while stack:
+            for s in self.blocks[stack.pop()].successors:
+                if s not in seen:
+                    seen.add(s)
+                    stack.append(s)
+        return seen
+
+    def reverse_postorder(self):
+        if not self.blocks:
+            return []
+        order = []
+        visited = [False] * len(self.blocks)
+        visited[0] = True
+        stack = [(0, iter(self.blocks[0].successors))]
+        while stack:
+            block, successors = stack[-1]
+            for s in successors:
+                if not visited[s]:
+                    visited[s] = True
+                    stack.append((s, iter(self.blocks[s].successors)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        # Les blocs inaccessibles sont placés à la fin pour que l'analyse les couvre aussi.
+        order.extend(i for i in range(len(self.blocks)) if not visited[i])
+        return order
+
+def immediate_dominators(cfg):
+    # Cooper, Harvey et Kennedy, « A Simple, Fast Dominance Algorithm »: idom de
+    # chaque bloc accessible, None pour les autres; le bloc 0 est son propre idom.
+    reachable = cfg.reachable()
+    order = [b for b in cfg.reverse_postorder() if b in reachable]
+    position = {b: i for i, b in enumerate(order)}
+    idom = [None] * len(cfg.blocks)
+    if not order:
+        return idom
+    idom[0] = 0
+    changed = True
+    while changed:
+        changed = False
+        for b in order[1:]:
+            new = None
+            for p in cfg.blocks[b].predecessors:
+                if idom[p] is None:
+                    continue
+                if new is None:
+                    new = p
+                    continue
+                a = p
+                while a != new:
+                    while position[a] > position[new]:
+                        a = idom[a]
+                    while position[new] > position[a]:
+                        new = idom[new]
+            if idom[b] != new:
+                idom[b] = new
+                changed = True
+    return idom
+
+def dominates(idom, a, b):
+    while b != a:
+        parent = idom[b]
+        if parent == b or parent is None:
+            return False
+        b = parent
+    return True
+
+def natural_loops(cfg, idom):
+    # Tête de boucle -> blocs de la boucle naturelle, pour chaque arc arrière
+    # p -> h où h domine p. Un arc qui remonte sans que sa cible domine sa
+    # source (flot irréductible) ne forme pas de boucle.
+    loops = {}
+    for block in cfg.blocks:
+        if idom[block.index] is None:
+            continue
+        for h in block.successors:
+            if not dominates(idom, h, block.index):
+                continue
+            body = loops.setdefault(h, {h})
+            stack = [block.index]
+            while stack:
+                b = stack.pop()
+                if b in body:
+                    continue
+                body.add(b)
+                stack.extend(p for p in cfg.blocks[b].predecessors if idom[p] is not None)
+    return loops
+
+# Moteur générique: une analyse fournit la direction, la valeur aux bornes, la
+# valeur initiale, la rencontre (meet) et la fonction de transfert d'un bloc.
+# solve() renvoie les valeurs en entrée et en sortie de chaque bloc, dans le sens
+# du programme quelle que soit la direction.
+class DataflowAnalysis:
+    forward = True
+    # Analyse en avant seulement: edge() donne la valeur transmise le long d'un
+    # arc, par exemple raffinée selon la branche prise par un saut conditionnel.
+    refines_edges = False
+
+    def edge(self, block, successor, value):
+        return value
+
+    def boundary(self):
+        raise NotImplementedError
+
+    def initial(self):
+        raise NotImplementedError
+
+    def meet(self, values):
+        raise NotImplementedError
+
+    def join(self, block, values):
+        # Rencontre à l'entrée (en avant) ou à la sortie (en arrière) de block.
+        return self.meet(values)
+
+    def transfer(self, block, value):
+        raise NotImplementedError
+
+    def solve(self, cfg):
+        blocks = cfg.blocks
+        count = len(blocks)
+        before = [self.initial() for _ in range(count)]
+        after = [self.initial() for _ in range(count)]
+        order = cfg.reverse_postorder()
+        if not self.forward:
+            order.reverse()
+        worklist = deque(order)
+        queued = [True] * count
+
+        while worklist:
+            index = worklist.popleft()
+            queued[index] = False
+            block = blocks[index]
+            if self.forward:
+                if self.refines_edges:
+                    sources = [self.edge(blocks[p], index, after[p]) for p in block.predecessors]
+                else:
+                    sources = [after[p] for p in block.predecessors]
+                if index == 0:
+                    sources.append(self.boundary())
+                dependents = block.successors
+            else:
+                sources = [before[s] for s in block.successors]
+                if not block.successors:
+                    sources.append(self.boundary())
+                dependents = block.predecessors
+            incoming = self.join(block, sources) if sources else self.initial()
+            outgoing = self.transfer(block, incoming)
+            if self.forward:
+                changed = outgoing != after[index]
+                before[index], after[index] = incoming, outgoing
+            else:
+                changed = outgoing != before[index]
+                after[index], before[index] = incoming, outgoing
+            if changed:
+                for d in dependents:
+                    if not queued[d]:
+                        queued[d] = True
+                        worklist.append(d)
+        return before, after
+
+def scalar_bits(symbol_table):
+    names = list(REGISTER_NAMES) + [name for name, symbol in symbol_table.symbols.items()
+                                    if symbol.type == 'byte']
+    return {name: (FLAGS + 1) << i for i, name in enumerate(names)}
+
+def operand_uses(operand, bits):
+    used = bits.get(scalar_name(operand), 0)
+    if isinstance(operand, ArrayAccess) and isinstance(operand.index, Variable):
+        used |= bits.get(operand.index.name, 0)
+    return used
+
+def instruction_effects(instr, bits):
+    # (utilisations, définitions) de l'instruction en bitsets flags + scalaires.
+    op = instr.operation
+    if op is None or op.type in (TokenType.HALT, TokenType.JMP, TokenType.CALL):
+        return 0, 0
+    if op.type in FLAG_READS:
+        return FLAG_READS[op.type], 0
+    if op.type == TokenType.IS_FULL:
+        return 0, ZF
+    if op.type in READS:
+        return operand_uses(op.operand1, bits), 0
+    dest = op.operand1
+    uses = operand_uses(dest, bits) if op.type in ARITHMETIC else 0
+    if isinstance(dest, ArrayAccess):
+        uses |= operand_uses(dest, bits)
+    if op.type in BINARY:
+        uses |= operand_uses(op.operand2, bits)
+    defs = bits.get(scalar_name(dest), 0)
+    if op.type in ARITHMETIC:
+        defs |= FLAGS
+    return uses, defs
+
+class Liveness(DataflowAnalysis):
+    forward = False
+
+    def __init__(self, cfg, symbol_table):
+        self.bits = scalar_bits(symbol_table)
+        self.effects = [instruction_effects(instr, self.bits) for instr in cfg.instructions]
+        self.gen = []
+        self.kill = []
+        for block in cfg.blocks:
+            gen = kill = 0
+            for i in range(block.end - 1, block.start - 1, -1):
+                uses, defs = self.effects[i]
+                gen = uses | (gen & ~defs)
+                kill |= defs
+            self.gen.append(gen)
+            self.kill.append(kill)
+
+    def boundary(self):
+        return 0
+
+    def initial(self):
+        return 0
+
+    def meet(self, values):
+        result = 0
+        for value in values:
+            result |= value
+        return result
+
+    def transfer(self, block, value):
+        return self.gen[block.index] | (value & ~self.kill[block.index])
+
+    def live_out(self, cfg):
+        # Vivacité en sortie de chaque instruction.
+        _, block_out = self.solve(cfg)
+        result = [0] * len(cfg.instructions)
+        for block in cfg.blocks:
+            live = block_out[block.index]
+            for i in range(block.end - 1, block.start - 1, -1):
+                result[i] = live
+                uses, defs = self.effects[i]
+                live = uses | (live & ~defs)
+        return result
+
+class ReachingDefinitions(DataflowAnalysis):
+    # Une définition est l'indice d'une instruction qui écrit une variable
+    # scalaire. Représentation creuse, à la façon des phi de la forme SSA: chaque
+    # bloc associe à chaque variable un seul noeud, soit une définition (>= 0),
+    # soit le phi de la variable en tête d'un bloc b (-1 - b) quand plusieurs
+    # noeuds s'y rejoignent. Taille proportionnelle au nombre de blocs fois le
+    # nombre de variables, au lieu d'un bitset sur toutes les définitions par
+    # bloc; les ensembles de définitions ne sont développés qu'à la demande.
+    def __init__(self, cfg, symbol_table):
+        self.cfg = cfg
+        self.bits = scalar_bits(symbol_table)
+        self.gen = [{} for _ in cfg.blocks]
+        for index, instr in enumerate(cfg.instructions):
+            name = self.defined_name(index)
+            if name is not None:
+                self.gen[cfg.block_of[index]][name] = index
+        # (bloc, variable) -> noeuds qui se rejoignent dans le phi.
+        self.phis = {}
+
+    def defined_name(self, index):
+        instr = self.cfg.instructions[index]
+        _, defs = instruction_effects(instr, self.bits)
+        return scalar_name(instr.operation.operand1) if defs & ~FLAGS else None
+
+    def boundary(self):
+        return {}
+
+    def initial(self):
+        return {}
+
+    def join(self, block, values):
+        incoming = {}
+        for value in values:
+            for name, node in value.items():
+                incoming.setdefault(name, set()).add(node)
+        result = {}
+        for name, nodes in incoming.items():
+            if len(nodes) == 1:
+                result[name] = nodes.pop()
+            else:
+                self.phis[(block.index, name)] = nodes
+                result[name] = -1 - block.index
+        return result
+
+    def transfer(self, block, value):
+        gen = self.gen[block.index]
+        if not gen:
+            return value
+        state = dict(value)
+        state.update(gen)
+        return state
+
+    def definitions(self, name, node):
+        # Définitions désignées par un noeud: la définition elle-même ou, pour
+        # un phi, celles de ses opérandes (phi compris, les boucles en créent).
+        result = set()
+        seen = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node >= 0:
+                result.add(node)
+            elif node not in seen:
+                seen.add(node)
+                stack.extend(self.phis[(-1 - node, name)])
+        return result
+
+    def reaching(self, before, index):
+        # Définitions de chaque variable qui atteignent l'instruction index
+        # (avant son exécution), before étant le résultat de solve().
+        block = self.cfg.blocks[self.cfg.block_of[index]]
+        state = dict(before[block.index])
+        for i in range(block.start, index):
+            name = self.defined_name(i)
+            if name is not None:
+                state[name] = i
+        return {name: self.definitions(name, node) for name, node in state.items()}
+
+NOT_A_CONSTANT = object()
+
+class ConstantPropagation(DataflowAnalysis):
+    # Treillis des constantes: une variable absente du dictionnaire n'a pas encore
+    # de valeur (haut), NOT_A_CONSTANT est le bas. Toutes les variables valent 0
+    # au début du programme.
+    def __init__(self, cfg, symbol_table):
+        self.cfg = cfg
+        self.names = list(REGISTER_NAMES) + [name for name, symbol in symbol_table.symbols.items()
+                                             if symbol.type == 'byte']
+
+    def boundary(self):
+        return {name: 0 for name in self.names}
+
+    def initial(self):
+        return {}
+
+    def meet(self, values):
+        result = dict(values[0])
+        for value in values[1:]:
+            for name, constant in value.items():
+                current = result.get(name)
+                if current is None:
+                    result[name] = constant
+                elif current is not NOT_A_CONSTANT and current != constant:
+                    result[name] = NOT_A_CONSTANT
+        return result
+
+    def transfer(self, block, value):
+        state = dict(value)
+        for i in range(block.start, block.end):
+            self.step(self.cfg.instructions[i], state)
+        return state
+
+    def value(self, operand, state):
+        if isinstance(operand, Number):
+            return wrap16(operand.value)
+        name = scalar_name(operand)
+        if name is None:
+            return NOT_A_CONSTANT
+        return state.get(name, NOT_A_CONSTANT)
+
+    def step(self, instr, state):
+        op = instr.operation
+        if op is None or op.type in JUMPS or op.type in READS or op.type in (TokenType.HALT, TokenType.IS_FULL):
+            return
+        if op.type == TokenType.CALL:
+            for name in self.names:
+                state[name] = NOT_A_CONSTANT
+            return
+        name = scalar_name(op.operand1)
+        if name is None:
+            return
+        if op.type == TokenType.MOV:
+            state[name] = self.value(op.operand2, state)
+        elif op.type in ARITHMETIC:
+            a = state.get(name, NOT_A_CONSTANT)
+            b = self.value(op.operand2, state) if op.type != TokenType.NOT else 0
+            if a is NOT_A_CONSTANT or b is NOT_A_CONSTANT:
+                state[name] = NOT_A_CONSTANT
+            else:
+                result = evaluate(op.type, a, b)
+                state[name] = NOT_A_CONSTANT if result is None else result
+        else:
+            state[name] = NOT_A_CONSTANT
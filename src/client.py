@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import socket
+import sys
+
+# Client léger du serveur de compilation: bibliothèque standard seulement, pour
+# que le démarrage d'un appel scripté ne paie ni les imports du compilateur ni
+# ses caches froids.
+
+def default_socket_path():
+    # TMPDIR plutôt que tempfile, dont l'import coûte à chaque appel du client.
+    return os.environ.get('PROJET_SOCKET') or os.path.join(
+        os.environ.get('TMPDIR') or '/tmp', f'projet-{os.getuid()}.sock')
+
+# Protocole (une connexion peut enchaîner plusieurs requêtes sans attendre les
+# réponses, qui reviennent dans l'ordre où elles se terminent):
+#   requête: une ligne JSON {"id", "command", "source" ou "path", options...}
+#   réponse: une ligne JSON d'en-tête {"id", "status", "length", ...} suivie de
+#            length octets de C (UTF-8), vide hors compile.
+def encode_request(request):
+    return json.dumps(request, separators=(',', ':')).encode() + b'\n'
+
+class Response:
+    def __init__(self, header, payload=''):
+        self.header = header
+        self.payload = payload
+
+    @property
+    def ok(self):
+        return self.header.get('status') == 'ok'
+
+    @property
+    def diagnostics(self):
+        return self.header.get('diagnostics', [])
+
+    def __getitem__(self, name):
+        return self.header[name]
+
+    def get(self, name, default=None):
+        return self.header.get(name, default)
+
+class CompileClient:
+    def __init__(self, path=None, timeout=None):
+        self.path = path or default_socket_path()
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(self.path)
+        except OSError as e:
+            self.socket.close()
+            raise Exception(f"Serveur de compilation injoignable sur '{self.path}': {e.strerror or e}")
+        self.file = self.socket.makefile('rb')
+        self.next_id = 0
+
+    def send(self, command, source=None, path=None, **options):
+        # Envoie une requête sans attendre sa réponse; renvoie son id.
+        self.next_id += 1
+        request = {'id': self.next_id, 'command': command, **options}
+        if source is not None:
+            request['source'] = source
+        if path is not None:
+            request['path'] = os.path.abspath(path)
+        self.socket.sendall(encode_request(request))
+        return self.next_id
+
+    def receive(self):
+        line = self.file.readline()
+        if not line:
+            raise Exception("Serveur de compilation: connexion fermée")
+        header = json.loads(line)
+        length = header.get('length', 0)
+        payload = self.file.read(length) if length else b''
+        if len(payload) != length:
+            raise Exception("Serveur de compilation: réponse tronquée")
+        return Response(header, payload.decode())
+
+    def request(self, command, source=None, path=None, **options):
+        self.send(command, source, path, **options)
+        return self.receive()
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_source(path):
+    if path == '-':
+        return sys.stdin.read()
+    with open(path, 'r') as f:
+        return f.read()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Client du serveur de compilation (python main.py --serve)")
+    parser.add_argument('--socket', default=None, help="socket Unix du serveur (par défaut: $PROJET_SOCKET "
+                                                       "ou projet-<uid>.sock dans $TMPDIR ou /tmp)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = commands.add_parser('compile', help="générer le C d'un source")
+    compile_parser.add_argument('source', help="fichier source ('-': entrée standard)")
+    compile_parser.add_argument('-o', '--output', default='output.c', help="fichier C généré ('-': sortie standard)")
+    compile_parser.add_argument('-O', dest='opt_level', type=int, default=0)
+    compile_parser.add_argument('--profile', default='checked')
+    compile_parser.add_argument('--no-range-analysis', action='store_true')
+    compile_parser.add_argument('--goto', action='store_true')
+
+    check_parser = commands.add_parser('check', help="analyser un source sans générer de code")
+    check_parser.add_argument('source')
+
+    run_parser = commands.add_parser('run', help="exécuter un source dans la machine virtuelle du serveur")
+    run_parser.add_argument('source')
+    run_parser.add_argument('inputs', nargs='*', type=int, help="valeurs lues par input, dans l'ordre")
+    run_parser.add_argument('-O', dest='opt_level', type=int, default=0)
+    run_parser.add_argument('--max-steps', type=int, default=None)
+
+    commands.add_parser('stats', help="requêtes traitées et latences du serveur")
+    commands.add_parser('shutdown', help="arrêter le serveur")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        with CompileClient(args.socket) as client:
+            if args.command in ('stats', 'shutdown'):
+                response = client.request(args.command)
+                print(json.dumps(response.header, indent=2, ensure_ascii=False))
+                return 0
+            options = {'opt_level': args.opt_level} if args.command != 'check' else {}
+            if args.command == 'compile':
+                options.update(profile=args.profile, range_analysis=not args.no_range_analysis,
+                               structured=not args.goto)
+            elif args.command == 'run':
+                options.update(inputs=args.inputs, max_steps=args.max_steps)
+            response = client.request(args.command, read_source(args.source), **options)
+    except Exception as e:
+        print(f'Erreur: {e}', file=sys.stderr)
+        return 1
+
+    for diagnostic in response.diagnostics:
+        print(diagnostic, file=sys.stderr)
+    if args.command == 'run':
+        for value in response.get('output', []):
+            print(value)
+    if not response.ok:
+        return 1
+    if args.command == 'compile':
+        if args.output == '-':
+            sys.stdout.write(response.payload)
+        else:
+            with open(args.output, 'w') as f:
+                f.write(response.payload)
+            print(f"Code C généré dans '{args.output}' ({response['instructions']} instructions, "
+                  f"{response['seconds'] * 1000:.1f} ms)", file=sys.stderr)
+    elif args.command == 'check':
+        print(f"{response['instructions']} instructions, aucune erreur", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
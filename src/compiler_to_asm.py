@@ -0,0 +1,412 @@
+from .token import TokenType
+from .ast import Number, Variable, Register, ArrayAccess
+from .cfg import ControlFlowGraph, Liveness, FLAGS, ZF, SF, OF
+from .instrumentation import NO_INSTRUMENTATION
+from .ranges import analyze_array_bounds
+from .semantic_analyzer import LabelSet
+from .vm import STACK_SIZE
+
+REGISTERS = {'AX': '%r12w', 'BX': '%r13w', 'CX': '%r14w', 'DX': '%r15w'}
+SAVED_REGISTERS = ('%rbp', '%rbx', '%r12', '%r13', '%r14', '%r15')
+JUMPS = {TokenType.JMP: 'jmp', TokenType.JZ: 'je', TokenType.JS: 'js', TokenType.JO: 'jo'}
+OPERATORS = {TokenType.ADD: 'addw', TokenType.SUB: 'subw', TokenType.AND: 'andw', TokenType.OR: 'orw'}
+# Instructions qui ne posent pas les flags du langage: si elles les écrasent
+# (vérification d'index, pile, appel du runtime), ils sont sauvegardés autour.
+PRESERVING = (TokenType.MOV, TokenType.INPUT, TokenType.PRINT, TokenType.PUSH, TokenType.POP)
+OVERFLOW_FLAG = 0x800
+ZERO_FLAG = 0x40
+MESSAGES = {
+    'prefix': "Erreur d'exécution à l'instruction %d: ",
+    'index': "index %d hors limites",
+    'division': "division par zéro",
+    'input': "entrée invalide",
+    'print': "%d\n",
+    'prompt': "Input: ",
+    'scan': "%ld",
+    'newline': "\n",
+}
+
+def wrap16(value):
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+def asm_string(text):
+    # Chaîne GNU as: octets UTF-8, hors ASCII imprimable en octal.
+    out = []
+    for byte in text.encode('utf-8'):
+        char = chr(byte)
+        if char in '"\\' or not 32 <= byte < 127:
+            out.append(f'\\{byte:03o}')
+        else:
+            out.append(char)
+    return '"' + ''.join(out) + '"'
+
+# Génère l'assembleur GNU (x86-64 Linux, syntaxe AT&T) du programme, sans passer
+# par le C: les registres AX-DX vivent dans r12w-r15w, les variables, tableaux et
+# la pile dans l'arène (SymbolTable.layout) adressée par rbp, le pointeur de pile
+# dans rbx. Les flags du langage sont les flags du processeur: add/sub/and/or
+# les posent tels quels, mult (imul) et div les complètent; jz/js/jo deviennent
+# je/js/jo. Quand le code d'une instruction qui ne pose pas les flags les écrase
+# alors qu'ils sont vivants (d'après la vivacité du graphe de flot), ils sont
+# sauvegardés dans l'arène et restaurés. Mêmes messages d'erreur que la machine
+# virtuelle; index vérifiés sauf ceux que l'analyse d'intervalles prouve dans
+# les bornes. Entrées et sorties passent par un petit runtime en assembleur qui
+# appelle printf/scanf de la libc.
+class AsmCompiler:
+    def __init__(self, ast, symbol_table, instrumentation=None, range_analysis=True):
+        self.ast = ast
+        self.symbol_table = symbol_table
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        self.range_analysis = range_analysis
+        self.safe_accesses = set()
+        self.proven = ()
+        self.stubs = {}
+        self.clobbers = False
+        self.instruction_count = 0
+
+    def generate_asm_code(self):
+        return "\n".join(self.iter_asm_code()) + "\n"
+
+    def save_to_file(self, filename):
+        with open(filename, "w") as f:
+            f.write(self.generate_asm_code())
+
+    def iter_asm_code(self):
+        with self.instrumentation.phase('codegen-asm') as phase:
+            instructions = list(self.ast.instructions)
+            for instr in instructions:
+                if instr.operation is not None and instr.operation.type == TokenType.CALL:
+                    raise Exception(f"Erreur de génération assembleur: instruction CALL non supportée "
+                                    f"(instruction {instr.number})")
+            cfg = ControlFlowGraph(instructions)
+            live_out = Liveness(cfg, self.symbol_table).live_out(cfg) if instructions else []
+            if self.range_analysis:
+                self.safe_accesses = analyze_array_bounds(instructions, self.symbol_table).safe
+            self.layout = self.symbol_table.layout(instructions, cfg, (), (('flags', 4), ('stack', STACK_SIZE)))
+            self.stubs = {}
+            self.instruction_count = len(instructions)
+
+            size = 0
+            for chunk in self.prologue():
+                size += len(chunk) + 1
+                yield chunk
+            emitted = LabelSet()
+            for index, instr in enumerate(instructions):
+                if instr.number not in emitted:
+                    emitted.add(instr.number)
+                    label = f".L{instr.number}:"
+                    size += len(label) + 1
+                    yield label
+                if instr.operation is not None:
+                    for line in self.compile_instruction(instr, live_out[index], index):
+                        size += len(line) + 1
+                        yield line
+            for chunk in self.epilogue():
+                size += len(chunk) + 1
+                yield chunk
+            phase.count('instructions', len(instructions))
+            phase.count('error_stubs', len(self.stubs))
+            phase.count('asm_bytes', size)
+
+    def prologue(self):
+        code = [
+            "    .text",
+            "    .globl main",
+            "    .type main, @function",
+            "main:",
+        ]
+        code.extend(f"    pushq {register}" for register in SAVED_REGISTERS)
+        code.extend([
+            "    subq $8, %rsp",
+            "    leaq arena(%rip), %rbp",
+            "    xorl %ebx, %ebx",
+        ])
+        code.extend(f"    xorl {register[:-1]}d, {register[:-1]}d" for register in REGISTERS.values())
+        code.extend([
+            # ZF = SF = OF = 0 au départ.
+            "    movl $1, %eax",
+            "    testl %eax, %eax",
+        ])
+        return code
+
+    def epilogue(self):
+        code = [
+            ".Lexit:",
+            "    xorl %eax, %eax",
+            "    addq $8, %rsp",
+        ]
+        code.extend(f"    popq {register}" for register in reversed(SAVED_REGISTERS))
+        code.append("    ret")
+        for (kind, number, register), label in self.stubs.items():
+            code.append(f"{label}:")
+            code.append(f"    movl ${number}, %edi")
+            code.append(f"    leaq .Lmessage_{kind}(%rip), %rsi")
+            code.append(f"    movl {register}, %edx" if register else "    xorl %edx, %edx")
+            code.append("    call projet_error")
+        code.append("    .size main, .-main")
+        code.extend(self.runtime())
+        code.append("    .section .rodata")
+        for name, text in MESSAGES.items():
+            code.append(f".Lmessage_{name}:")
+            code.append(f"    .string {asm_string(text)}")
+        code.extend([
+            "    .bss",
+            "    .p2align 5",
+            "arena:",
+            f"    .zero {2 * max(self.layout.size, 1)}",
+            "    .section .note.GNU-stack,\"\",@progbits",
+        ])
+        return code
+
+    def runtime(self):
+        # print(edi), input(edi = instruction) -> ax, error(edi, rsi = message, edx).
+        return [
+            "projet_print:",
+            "    movl %edi, %esi",
+            "    leaq .Lmessage_print(%rip), %rdi",
+            "    xorl %eax, %eax",
+            "    jmp printf@PLT",
+            "",
+            "projet_input:",
+            "    pushq %rbx",
+            "    subq $16, %rsp",
+            "    movl %edi, %ebx",
+            "    leaq .Lmessage_prompt(%rip), %rdi",
+            "    xorl %eax, %eax",
+            "    call printf@PLT",
+            "    movq stdout@GOTPCREL(%rip), %rax",
+            "    movq (%rax), %rdi",
+            "    call fflush@PLT",
+            "    leaq .Lmessage_scan(%rip), %rdi",
+            "    movq %rsp, %rsi",
+            "    xorl %eax, %eax",
+            "    call scanf@PLT",
+            "    cmpl $1, %eax",
+            "    jne 1f",
+            "    movswl (%rsp), %eax",
+            "    addq $16, %rsp",
+            "    popq %rbx",
+            "    ret",
+            "1:",
+            "    movl %ebx, %edi",
+            "    leaq .Lmessage_input(%rip), %rsi",
+            "    xorl %edx, %edx",
+            "    call projet_error",
+            "",
+            "projet_error:",
+            "    pushq %rbx",
+            "    pushq %r12",
+            "    pushq %r13",
+            "    movl %edi, %ebx",
+            "    movq %rsi, %r12",
+            "    movl %edx, %r13d",
+            "    movq stdout@GOTPCREL(%rip), %rax",
+            "    movq (%rax), %rdi",
+            "    call fflush@PLT",
+            "    movq stderr@GOTPCREL(%rip), %rax",
+            "    movq (%rax), %rdi",
+            "    leaq .Lmessage_prefix(%rip), %rsi",
+            "    movl %ebx, %edx",
+            "    xorl %eax, %eax",
+            "    call fprintf@PLT",
+            "    movq stderr@GOTPCREL(%rip), %rax",
+            "    movq (%rax), %rdi",
+            "    movq %r12, %rsi",
+            "    movl %r13d, %edx",
+            "    xorl %eax, %eax",
+            "    call fprintf@PLT",
+            "    movq stderr@GOTPCREL(%rip), %rax",
+            "    movq (%rax), %rdi",
+            "    leaq .Lmessage_newline(%rip), %rsi",
+            "    xorl %eax, %eax",
+            "    call fprintf@PLT",
+            "    movl $1, %edi",
+            "    call exit@PLT",
+        ]
+
+    def compile_instruction(self, instruction, live, index=None):
+        op = instruction.operation
+        number = instruction.number
+        self.clobbers = False
+        # Opérandes dont l'index est prouvé dans les bornes (instruction index).
+        self.proven = [operand for slot, operand in enumerate((op.operand1, op.operand2), 1)
+                       if (index, slot) in self.safe_accesses]
+        code = []
+        if op.type in JUMPS:
+            target = op.operand1.value
+            return [f"    {JUMPS[op.type]} .L{target}"]
+        if op.type == TokenType.HALT:
+            return ["    jmp .Lexit"]
+        if op.type == TokenType.IS_FULL:
+            return self.is_full(live)
+
+        if op.type == TokenType.PRINT:
+            source = self.operand(op.operand1, number, '%r9', code)
+            code.append(f"    movl {source}, %edi" if source.startswith('$') else f"    movswl {source}, %edi")
+            code.append("    call projet_print")
+            self.clobbers = True
+        elif op.type == TokenType.PUSH:
+            source = self.operand(op.operand1, number, '%r9', code)
+            stack = f"{self.address('stack')}(%rbp,%rbx,2)"
+            code.append(f"    cmpq ${STACK_SIZE}, %rbx")
+            code.append("    jae 1f")
+            if self.is_memory(source):
+                code.append(f"    movw {source}, %ax")
+                source = "%ax"
+            code.append(f"    movw {source}, {stack}")
+            code.append("    leaq 1(%rbx), %rbx")
+            code.append("1:")
+            self.clobbers = True
+        elif op.type == TokenType.POP:
+            dest = self.operand(op.operand1, number, '%r8', code)
+            code.extend([
+                "    xorl %eax, %eax",
+                "    testq %rbx, %rbx",
+                "    je 1f",
+                "    leaq -1(%rbx), %rbx",
+                f"    movw {self.address('stack')}(%rbp,%rbx,2), %ax",
+                "1:",
+                f"    movw %ax, {dest}",
+            ])
+            self.clobbers = True
+        elif op.type == TokenType.INPUT:
+            dest = self.operand(op.operand1, number, '%r8', code)
+            code.append(f"    movl ${number}, %edi")
+            code.append("    call projet_input")
+            if isinstance(op.operand1, ArrayAccess) and not isinstance(op.operand1.index, Number):
+                # r8 n'est pas préservé par l'appel: l'index (déjà vérifié) est relu.
+                dest = self.operand(op.operand1, number, '%r8', code, check=False)
+            code.append(f"    movw %ax, {dest}")
+            self.clobbers = True
+        elif op.type == TokenType.MOV:
+            dest = self.operand(op.operand1, number, '%r8', code)
+            source = self.operand(op.operand2, number, '%r9', code)
+            if self.is_memory(dest) and self.is_memory(source):
+                code.append(f"    movw {source}, %ax")
+                source = "%ax"
+            code.append(f"    movw {source}, {dest}")
+        elif op.type in OPERATORS:
+            dest = self.operand(op.operand1, number, '%r8', code)
+            source = self.operand(op.operand2, number, '%r9', code)
+            if self.is_memory(dest) and self.is_memory(source):
+                code.append(f"    movw {source}, %ax")
+                source = "%ax"
+            code.append(f"    {OPERATORS[op.type]} {source}, {dest}")
+        elif op.type == TokenType.MULT:
+            dest = self.operand(op.operand1, number, '%r8', code)
+            source = self.operand(op.operand2, number, '%r9', code)
+            work = dest if dest in REGISTERS.values() else "%ax"
+            if work != dest:
+                code.append(f"    movw {dest}, %ax")
+            if source.startswith('$'):
+                code.append(f"    imulw {source}, {work}, {work}")
+            else:
+                code.append(f"    imulw {source}, {work}")
+            if live & FLAGS:
+                # imul pose OF (résultat tronqué) mais pas ZF/SF.
+                code.extend(self.result_flags(work, "jo 1f"))
+            if work != dest:
+                code.append(f"    movw %ax, {dest}")
+        elif op.type == TokenType.DIV:
+            dest = self.operand(op.operand1, number, '%r8', code)
+            source = self.operand(op.operand2, number, '%r9', code)
+            code.append(f"    movswl {dest}, %eax")
+            if source.startswith('$'):
+                if int(source[1:]) == 0:
+                    code.append(f"    jmp {self.stub('division', number, None)}")
+                code.append(f"    movl {source}, %ecx")
+            else:
+                code.append(f"    movswl {source}, %ecx")
+                code.append("    testl %ecx, %ecx")
+                code.append(f"    je {self.stub('division', number, None)}")
+            # Division 32 bits: -32768 / -1 ne déborde pas (idivw lèverait #DE).
+            code.append("    cltd")
+            code.append("    idivl %ecx")
+            if live & FLAGS:
+                code.extend(["    movswl %ax, %edx", "    cmpl %eax, %edx"])
+                code.extend(self.result_flags("%ax", "jne 1f"))
+            code.append(f"    movw %ax, {dest}")
+        elif op.type == TokenType.NOT:
+            dest = self.operand(op.operand1, number, '%r8', code)
+            work = dest if dest in REGISTERS.values() else "%ax"
+            if work != dest:
+                code.append(f"    movw {dest}, %ax")
+            code.append(f"    notw {work}")
+            if live & FLAGS:
+                code.append(f"    testw {work}, {work}")
+            if work != dest:
+                code.append(f"    movw %ax, {dest}")
+        else:
+            raise Exception(f"Erreur de génération assembleur: instruction {op.type.name} non supportée "
+                            f"(instruction {number})")
+
+        if op.type in PRESERVING and self.clobbers and live & FLAGS:
+            flags = f"{self.address('flags')}(%rbp)"
+            code = ["    pushfq", f"    popq {flags}"] + code + [f"    pushq {flags}", "    popfq"]
+        return code
+
+    def result_flags(self, work, overflow_jump):
+        # ZF et SF du résultat 16 bits; OF posé seulement quand overflow_jump saute.
+        return [
+            f"    {overflow_jump}",
+            f"    testw {work}, {work}",
+            "    jmp 2f",
+            "1:",
+            f"    testw {work}, {work}",
+            "    pushfq",
+            f"    orq ${OVERFLOW_FLAG}, (%rsp)",
+            "    popfq",
+            "2:",
+        ]
+
+    def is_full(self, live):
+        # ZF = pile pleine; SF et OF gardent leur valeur.
+        if not live & ZF:
+            return []
+        if not live & (SF | OF):
+            return [f"    cmpq ${STACK_SIZE}, %rbx"]
+        return [
+            "    pushfq",
+            f"    andq ${~ZERO_FLAG}, (%rsp)",
+            f"    cmpq ${STACK_SIZE}, %rbx",
+            "    jne 1f",
+            f"    orq ${ZERO_FLAG}, (%rsp)",
+            "1:",
+            "    popfq",
+        ]
+
+    def address(self, name):
+        # Déplacement en octets d'une case de l'arène.
+        if name in self.layout.reserved:
+            return 2 * self.layout.reserved[name]
+        return 2 * self.layout[name]
+
+    def is_memory(self, operand):
+        return '(' in operand
+
+    def stub(self, kind, number, register):
+        # Un bloc d'erreur par (message, instruction, registre d'index), après le code.
+        key = (kind, number, register)
+        if key not in self.stubs:
+            self.stubs[key] = f".Lerror{len(self.stubs)}"
+        return self.stubs[key]
+
+    def operand(self, operand, number, index_register, code, check=True):
+        if isinstance(operand, Number):
+            return f"${wrap16(operand.value)}"
+        if isinstance(operand, Register):
+            return REGISTERS[operand.name]
+        if isinstance(operand, Variable):
+            return f"{self.address(operand.name)}(%rbp)"
+        if isinstance(operand, ArrayAccess):
+            base = self.address(operand.name)
+            if isinstance(operand.index, Number):
+                return f"{base + 2 * operand.index.value}(%rbp)"
+            index = self.operand(operand.index, number, index_register, code)
+            code.append(f"    movswq {index}, {index_register}")
+            if check and not any(operand is proven for proven in self.proven):
+                size = self.symbol_table.lookup(operand.name).size
+                code.append(f"    cmpq ${size}, {index_register}")
+                code.append(f"    jae {self.stub('index', number, index_register + 'd')}")
+                self.clobbers = True
+            return f"{base}(%rbp,{index_register},2)"
+        raise Exception(f"Erreur de génération assembleur: opérande non supportée (instruction {number})")
@@ -2,116 +2,508 @@ import subprocess
 import os
 from .token import TokenType
 from .ast import Number, Variable, Register, ArrayAccess
+from .instruction_table import InstructionTable
+from .instrumentation import NO_INSTRUMENTATION
+from .ranges import analyze_array_bounds
+from .semantic_analyzer import LabelSet
+from .arena import REGISTERS
+from .cfg import ControlFlowGraph
+from .structure import Structurer
+from .vm import STACK_SIZE
+from .pgo import FORMAT_VERSION as PROFILE_FORMAT, MAGIC as PROFILE_MAGIC, fingerprint, c_string
 
+PROFILES = ('checked', 'fast')
+# Cases de l'arène propres au C, placées après les registres.
+CONTROL_CELLS = ('zf', 'sf', 'of', 'stack_ptr')
+JUMP_CONDITIONS = {TokenType.JMP: None, TokenType.JZ: 'zf', TokenType.JS: 'sf', TokenType.JO: 'of'}
+ARITHMETIC_OPERATORS = {TokenType.ADD: '+', TokenType.SUB: '-', TokenType.MULT: '*',
+                        TokenType.AND: '&', TokenType.OR: '|'}
+
+def wrap16(value):
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+# Génère un programme C dont le comportement est celui de la machine virtuelle:
+# entiers 16 bits, flags ZF/SF/OF posés par les opérations arithmétiques,
+# pile de STACK_SIZE cases, mêmes messages d'erreur d'exécution.
+# L'état du programme vit dans une arène: une structure de ARENA_SIZE champs
+# int16_t contigus (ordre de SymbolTable.layout), nommés par des macros; un
+# memset/memcpy suffit pour la remettre à zéro ou la copier.
+#   checked: arène globale, index des tableaux vérifiés sauf ceux que l'analyse
+#            d'intervalles prouve dans les bornes, et à la sortie un rapport
+#            des dépassements de capacité et des débordements de pile.
+#   fast:    registres, flags, pointeur de pile et variables en variables
+#            locales de main() (gardées en registre par le compilateur C),
+#            seuls les tableaux et la pile dans l'arène, static dans main();
+#            pile en fonctions static inline, index des tableaux non vérifiés.
+# structured: boucles et conditionnelles reconstruites depuis le graphe de flot
+# (for/if/break/continue, goto seulement pour le flot irréductible); sinon un
+# label par instruction et un goto par saut.
+# instrument: chemin du profil d'exécution que le programme complète à sa sortie
+# (un compteur par instruction et par saut pris, forme goto). execution_profile:
+# un ExecutionProfile du même programme, qui marque les sauts presque toujours
+# ou presque jamais pris (LIKELY/UNLIKELY), place la branche la plus exécutée
+# d'un if/else en premier et ordonne l'arène selon les exécutions réelles.
 class CCompiler:
-    def __init__(self, ast, symbol_table):
+    def __init__(self, ast, symbol_table, instrumentation=None, profile='checked', range_analysis=True,
+                 structured=True, instrument=None, execution_profile=None):
+        if profile not in PROFILES:
+            raise Exception(f"Profil de génération C inconnu: {profile} (profils: {', '.join(PROFILES)})")
         self.ast = ast
         self.symbol_table = symbol_table
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        self.profile = profile
+        self.checked = profile == 'checked'
+        self.range_analysis = range_analysis
+        self.structured = structured and instrument is None
+        self.instrument = instrument
+        self.execution_profile = execution_profile
+        self.bounds = None
+        self.safe_accesses = set()
+        self.proven = ()
+        self.layout = None
+        self.instruction_count = 0
         self.c_code = []
         self.indent = 0
 
     def generate_c_code(self):
+        return "\n".join(self.iter_c_code())
+
+    def write_c_code(self, out):
+        # Écrit le C dans un flux texte au fur et à mesure de la génération.
+        for chunk in self.iter_c_code():
+            out.write(chunk)
+            out.write("\n")
+
+    def iter_c_code(self):
+        # Morceaux du fichier C, sans fin de ligne. ast.instructions peut être un
+        # itérateur (compilation en flux) si l'analyse d'intervalles et la
+        # structuration sont désactivées.
+        with self.instrumentation.phase('codegen-c') as phase:
+            instructions = self.ast.instructions
+            if isinstance(instructions, InstructionTable):
+                # Une table recrée ses noeuds à chaque parcours: une seule liste
+                # pour l'analyse d'intervalles, le graphe de flot et le corps.
+                instructions = list(instructions)
+            if self.checked and self.range_analysis:
+                with self.instrumentation.phase('ranges') as ranges_phase:
+                    self.bounds = analyze_array_bounds(instructions, self.symbol_table)
+                    self.safe_accesses = self.bounds.safe
+                    ranges_phase.count('indexed_accesses', self.bounds.total)
+                    ranges_phase.count('proven_in_bounds', self.bounds.proven)
+            # Variables chaudes en tête de l'arène, d'après les exécutions du profil
+            # ou les références pondérées par les boucles du graphe de flot. Sans
+            # structuration ni profil, ordre des déclarations: même C qu'en flux
+            # et en session incrémentale.
+            cfg = ControlFlowGraph(instructions) if self.structured else None
+            if cfg is not None or self.execution_profile is not None:
+                counts = self.execution_profile.counts if self.execution_profile is not None else None
+                self.layout = self.symbol_table.layout(cfg.instructions if cfg is not None else instructions,
+                                                       cfg, CONTROL_CELLS, (('stack', STACK_SIZE),), counts)
+            size = 0
+            for chunk in self.prologue(instructions):
+                size += len(chunk) + 1
+                yield chunk
+            if self.structured:
+                with self.instrumentation.phase('structure') as structure_phase:
+                    body = self.structured_body(cfg, structure_phase)
+            else:
+                body = self.goto_body(instructions)
+            for chunk in body:
+                size += len(chunk) + 1
+                yield chunk
+            for chunk in self.epilogue():
+                size += len(chunk) + 1
+                yield chunk
+            phase.count('instructions', self.instruction_count)
+            phase.count('c_bytes', size - 1)
+
+    def goto_body(self, instructions):
+        emitted = LabelSet()
+        count = 0
+        for instr in instructions:
+            # Un label dupliqué désigne la première instruction, comme dans
+            # la machine virtuelle.
+            label = instr.number not in emitted
+            if label:
+                emitted.add(instr.number)
+            if instr.operation or label:
+                yield self.compile_instruction(instr, label, count)
+            count += 1
+        self.instruction_count = count
+
+    def structured_body(self, cfg, phase):
+        self.instruction_count = len(cfg.instructions)
+        weight = None
+        if self.execution_profile is not None:
+            counts = self.execution_profile.counts
+            weight = lambda block: max(counts[cfg.blocks[block].start:cfg.blocks[block].end])
+        structurer = Structurer(cfg, lambda index: self.compile_instruction(cfg.instructions[index], False, index),
+                                lambda index: self.condition(cfg.instructions[index].operation.type, index), weight)
+        try:
+            body = structurer.generate()
+        except RecursionError:
+            # Imbrication trop profonde pour la récursion (et pour le compilateur C):
+            # un label par instruction.
+            phase.count('fallback')
+            return list(self.goto_body(cfg.instructions))
+        phase.count('loops', len(structurer.loops))
+        phase.count('gotos', len(structurer.targets))
+        return body
+
+    def prologue(self, instructions=()):
         code = [
             "#include <stdio.h>",
             "#include <stdint.h>",
             "#include <stdlib.h>",
+            "#include <string.h>",
+            "",
+            f"#define STACK_SIZE {STACK_SIZE}",
             "",
-            "#define STACK_SIZE 1024",
+            "#ifdef __GNUC__",
+            "#define LIKELY(x) __builtin_expect(!!(x), 1)",
+            "#define UNLIKELY(x) __builtin_expect(!!(x), 0)",
+            "#else",
+            "#define LIKELY(x) (x)",
+            "#define UNLIKELY(x) (x)",
+            "#endif",
+            "",
+            "static void runtime_error(int instruction, const char *message, int value) {",
+            "    fflush(stdout);",
+            "    fprintf(stderr, \"Erreur d'exécution à l'instruction %d: \", instruction);",
+            "    fprintf(stderr, message, value);",
+            "    fprintf(stderr, \"\\n\");",
+            "    exit(1);",
+            "}",
+            "",
+            "static int16_t read_input(int instruction) {",
+            "    long value;",
+            "    printf(\"Input: \");",
+            "    fflush(stdout);",
+            "    if (scanf(\"%ld\", &value) != 1) {",
+            "        runtime_error(instruction, \"entrée invalide\", 0);",
+            "    }",
+            "    return (int16_t)(uint16_t)value;",
+            "}",
             "",
-            "int16_t AX = 0, BX = 0, CX = 0, DX = 0;",
-            "int16_t stack[STACK_SIZE];",
-            "int stack_ptr = 0;",
-            ""
         ]
+        if self.instrument is not None:
+            code.extend(self.profile_counters(instructions))
+        if self.checked:
+            code.extend(self.checked_prologue())
+        else:
+            code.extend(self.fast_prologue())
+        if self.instrument is not None:
+            code.append("    atexit(profile_dump);")
+        return code
 
-        for name, symbol in self.symbol_table.symbols.items():
-            if symbol.type == 'byte':
-                code.append(f"int16_t {name} = 0;")
-            elif symbol.type == 'array':
-                code.append(f"int16_t {name}[{symbol.size}];")
-        code.append("")
+    def profile_counters(self, instructions):
+        # Compteurs du programme instrumenté, ajoutés au profil ($PROJET_PROFILE
+        # ou self.instrument) à la sortie si son empreinte est la même.
+        labels = [str(instr.number) for instr in instructions]
+        code = [
+            f"#define PROFILE_INSTRUCTIONS {max(len(labels), 1)}",
+            f"#define PROFILE_FINGERPRINT \"{fingerprint(instructions)}\"",
+            f"#define PROFILE_PATH {c_string(os.path.abspath(self.instrument))}",
+            "static unsigned long profile_counts[PROFILE_INSTRUCTIONS], profile_taken[PROFILE_INSTRUCTIONS];",
+            "static const long profile_labels[PROFILE_INSTRUCTIONS] = {",
+        ]
+        for start in range(0, len(labels), 16):
+            code.append("    " + ", ".join(labels[start:start + 16]) + ",")
+        code.extend([
+            "};",
+            "",
+            "static void profile_dump(void) {",
+            "    const char *path = getenv(\"PROJET_PROFILE\");",
+            "    char previous[64];",
+            "    unsigned long instructions, runs = 0, executions, taken;",
+            "    long index, label;",
+            "    FILE *f;",
+            "    if (!path) {",
+            "        path = PROFILE_PATH;",
+            "    }",
+            "    f = fopen(path, \"r\");",
+            "    if (f) {",
+            f"        if (fscanf(f, \"{PROFILE_MAGIC} {PROFILE_FORMAT} %63s %lu %lu\", previous, &instructions, &runs) == 3",
+            "                && strcmp(previous, PROFILE_FINGERPRINT) == 0 && instructions == PROFILE_INSTRUCTIONS) {",
+            "            while (fscanf(f, \"%ld %ld %lu %lu\", &index, &label, &executions, &taken) == 4) {",
+            "                if (index >= 0 && index < PROFILE_INSTRUCTIONS) {",
+            "                    profile_counts[index] += executions;",
+            "                    profile_taken[index] += taken;",
+            "                }",
+            "            }",
+            "        } else {",
+            "            runs = 0;",
+            "        }",
+            "        fclose(f);",
+            "    }",
+            "    f = fopen(path, \"w\");",
+            "    if (!f) {",
+            "        fprintf(stderr, \"Profil d'exécution: impossible d'écrire '%s'\\n\", path);",
+            "        return;",
+            "    }",
+            f"    fprintf(f, \"{PROFILE_MAGIC} {PROFILE_FORMAT} %s %d %lu\\n\", PROFILE_FINGERPRINT, "
+            f"{len(labels)}, runs + 1);",
+            "    for (index = 0; index < PROFILE_INSTRUCTIONS; index++) {",
+            "        if (profile_counts[index]) {",
+            "            fprintf(f, \"%ld %ld %lu %lu\\n\", index, profile_labels[index], profile_counts[index],",
+            "                    profile_taken[index]);",
+            "        }",
+            "    }",
+            "    fclose(f);",
+            "}",
+            "",
+        ])
+        return code
+
+    def checked_prologue(self):
+        code = self.arena_names()
+        code.extend([
+            "unsigned long overflows = 0, stack_overflows = 0, stack_underflows = 0;",
+            "",
+        ])
 
         code.extend([
             "void push(int16_t value) {",
-            "    if (stack_ptr < STACK_SIZE) {",
-            "        stack[stack_ptr++] = value;",
+            "    if (UNLIKELY(stack_ptr >= STACK_SIZE)) {",
+            "        stack_overflows++;",
+            "        return;",
             "    }",
+            "    stack[stack_ptr++] = value;",
             "}",
             "",
             "int16_t pop(void) {",
-            "    if (stack_ptr > 0) {",
-            "        return stack[--stack_ptr];",
+            "    if (UNLIKELY(stack_ptr == 0)) {",
+            "        stack_underflows++;",
+            "        return 0;",
             "    }",
-            "    return 0;",
+            "    return stack[--stack_ptr];",
+            "}",
+            "",
+            "static int16_t set_flags(int32_t result) {",
+            "    int16_t value = (int16_t)result;",
+            "    zf = value == 0;",
+            "    sf = value < 0;",
+            "    of = value != result;",
+            "    if (UNLIKELY(of)) {",
+            "        overflows++;",
+            "    }",
+            "    return value;",
+            "}",
+            "",
+            "static int check_index(int16_t index, int size, int instruction) {",
+            "    if (UNLIKELY(index < 0 || index >= size)) {",
+            "        runtime_error(instruction, \"index %d hors limites\", index);",
+            "    }",
+            "    return index;",
             "}",
-            ""
+            "",
+            "static void report(void) {",
+            "    if (overflows) {",
+            "        fprintf(stderr, \"%lu dépassement(s) de capacité\\n\", overflows);",
+            "    }",
+            "    if (stack_overflows) {",
+            "        fprintf(stderr, \"%lu push ignoré(s): pile pleine\\n\", stack_overflows);",
+            "    }",
+            "    if (stack_underflows) {",
+            "        fprintf(stderr, \"%lu pop sur pile vide\\n\", stack_underflows);",
+            "    }",
+            "}",
+            "",
+            "int main(void) {",
+            "    atexit(report);",
         ])
+        return code
 
-        code.append("int main(void) {")
-        
-        for instr in self.ast.instructions:
-            if instr.operation:
-                code.append(self.compile_instruction(instr))
-        
-        code.extend([
+    def fast_prologue(self):
+        code = [
+            "static inline int push(int16_t *stack, int stack_ptr, int16_t value) {",
+            "    if (UNLIKELY(stack_ptr >= STACK_SIZE)) {",
+            "        return stack_ptr;",
+            "    }",
+            "    stack[stack_ptr] = value;",
+            "    return stack_ptr + 1;",
+            "}",
+            "",
+            "static inline int16_t pop(const int16_t *stack, int *stack_ptr) {",
+            "    if (UNLIKELY(*stack_ptr == 0)) {",
+            "        return 0;",
+            "    }",
+            "    return stack[--*stack_ptr];",
+            "}",
+            "",
+            "int main(void) {",
+            "    int16_t AX = 0, BX = 0, CX = 0, DX = 0;",
+            "    int stack_ptr = 0;",
+            "    int zf = 0, sf = 0, of = 0;",
+            "    int32_t result;",
+        ]
+        for name, symbol in self.symbol_table.symbols.items():
+            if symbol.type == 'byte':
+                code.append(f"    int16_t {self.c_name(name)} = 0;")
+        # static: hors de la pile de main() et initialisée à zéro. Après
+        # push/pop: leurs paramètres gardent leur nom.
+        code.extend(self.arena_names("static ", "    ", regions_only=True))
+        return code
+
+    def arena_layout(self):
+        if self.layout is None:
+            return self.symbol_table.layout(control=CONTROL_CELLS, tail=(('stack', STACK_SIZE),))
+        return self.layout
+
+    def arena_names(self, storage="", indent="", regions_only=False):
+        # Une structure de champs int16_t sans remplissage: même bloc contigu
+        # qu'un tableau, mais le compilateur C sait qu'un index de tableau ne
+        # touche pas les autres champs.
+        layout = self.arena_layout()
+        cells = [(layout[name], name, None) for name in REGISTERS]
+        cells.extend((offset, name, STACK_SIZE if name == 'stack' else None)
+                     for name, offset in layout.reserved.items())
+        cells.extend((layout[name], self.c_name(name), symbol.size if symbol.type == 'array' else None)
+                     for name, symbol in self.symbol_table.symbols.items())
+        if regions_only:
+            cells = [cell for cell in cells if cell[2] is not None]
+        cells.sort(key=lambda cell: cell[0])
+        code = [f"{indent}{storage}struct {{"]
+        code.extend(f"{indent}    int16_t {c_name};" if size is None else f"{indent}    int16_t {c_name}[{size}];"
+                    for _, c_name, size in cells)
+        code.append(f"{indent}}} arena;")
+        code.append(f"#define ARENA_SIZE {sum(size or 1 for _, _, size in cells)}")
+        code.extend(f"#define {c_name} arena.{c_name}" for _, c_name, _ in cells)
+        return code
+
+    def epilogue(self):
+        return [
             "    return 0;",
             "}"
-        ])
+        ]
 
-        return "\n".join(code)
+    def compile_instruction(self, instruction, label=True, index=None):
+        # index: position de l'instruction dans le programme (compteurs du profil).
+        op = instruction.operation
+        code = [f"L{instruction.number}:"] if label else []
+        counted = self.instrument is not None and index is not None
+        if counted:
+            code.append(f"    profile_counts[{index}]++;")
+        if not op:
+            if not counted:
+                code.append("    ;")
+            return "\n".join(code)
 
-    def compile_instruction(self, instruction):
-        if not instruction.operation:
-            return ""
+        self.proven = self.proven_accesses(op, index)
+        number = instruction.number
+        if op.type in JUMP_CONDITIONS:
+            condition = self.condition(op.type, index)
+            target = f"goto L{op.operand1.value};"
+            if condition is None:
+                code.append(f"    {target}")
+            elif counted:
+                code.append(f"    if ({condition}) {{ profile_taken[{index}]++; {target} }}")
+            else:
+                code.append(f"    if ({condition}) {target}")
 
-        op = instruction.operation
-        code = [f"L{instruction.number}:"]
+        elif op.type == TokenType.MOV:
+            code.append(self.assignment(op, number, lambda dest, src: f"{dest} = {src};"))
 
-        if op.type == TokenType.MOV:
-            dest = self.compile_operand(op.operand1)
-            src = self.compile_operand(op.operand2)
-            code.append(f"    {dest} = {src};")
+        elif op.type in ARITHMETIC_OPERATORS:
+            operator = ARITHMETIC_OPERATORS[op.type]
+            code.append(self.assignment(op, number, lambda dest, src: self.flags(
+                dest, f"(int32_t){dest} {operator} {src}")))
 
-        elif op.type == TokenType.ADD:
-            dest = self.compile_operand(op.operand1)
-            src = self.compile_operand(op.operand2)
-            code.append(f"    {dest} += {src};")
+        elif op.type == TokenType.DIV:
+            code.append(self.assignment(op, number, lambda dest, src: (
+                f"if (UNLIKELY({src} == 0)) runtime_error({number}, \"division par zéro\", 0);\n"
+                f"    " + self.flags(dest, f"(int32_t){dest} / {src}"))))
 
-        elif op.type == TokenType.SUB:
-            dest = self.compile_operand(op.operand1)
-            src = self.compile_operand(op.operand2)
-            code.append(f"    {dest} -= {src};")
+        elif op.type == TokenType.NOT:
+            code.append(self.assignment(op, number, lambda dest, src: self.flags(dest, f"~(int32_t){dest}")))
 
         elif op.type == TokenType.INPUT:
-            dest = self.compile_operand(op.operand1)
-            code.append(f"    printf(\"Input: \");")
-            code.append(f"    scanf(\"%hd\", &{dest});")
+            code.append(self.assignment(op, number, lambda dest, src: f"{dest} = read_input({number});"))
 
         elif op.type == TokenType.PRINT:
-            src = self.compile_operand(op.operand1)
-            code.append(f"    printf(\"%hd\\n\", {src});")
+            src = self.compile_operand(op.operand1, number)
+            code.append(f"    printf(\"%d\\n\", {src});")
+
+        elif op.type == TokenType.PUSH:
+            src = self.compile_operand(op.operand1, number)
+            if self.checked:
+                code.append(f"    push({src});")
+            else:
+                code.append(f"    stack_ptr = push(stack, stack_ptr, {src});")
+
+        elif op.type == TokenType.POP:
+            pop = "pop()" if self.checked else "pop(stack, &stack_ptr)"
+            code.append(self.assignment(op, number, lambda dest, src: f"{dest} = {pop};"))
 
-        elif op.type == TokenType.JMP:
-            code.append(f"    goto L{op.operand1.value};")
+        elif op.type == TokenType.IS_FULL:
+            code.append("    zf = stack_ptr >= STACK_SIZE;")
 
-        elif op.type == TokenType.JZ:
-            code.append(f"    if (AX == 0) goto L{op.operand1.value};")
+        elif op.type == TokenType.HALT:
+            code.append("    return 0;")
+
+        else:
+            raise Exception(f"Erreur de génération C: instruction {op.type.name} non supportée "
+                            f"(instruction {number})")
 
         return "\n".join(code)
 
-    def compile_operand(self, operand):
+    def condition(self, jump, index=None):
+        # Expression C du saut conditionnel, avec l'indication du profil d'exécution.
+        condition = JUMP_CONDITIONS[jump]
+        if condition is None or self.execution_profile is None or index is None:
+            return condition
+        hint = self.execution_profile.hint(index)
+        return f"{hint}({condition})" if hint else condition
+
+    def assignment(self, op, number, statement):
+        # La destination est évaluée (et son index vérifié) avant la source,
+        # dans l'ordre de la machine virtuelle.
+        dest = self.compile_operand(op.operand1, number)
+        src = self.compile_operand(op.operand2, number) if op.operand2 is not None else None
+        if not (self.checked and self.is_checked_access(op.operand1)):
+            return f"    {statement(dest, src)}"
+        if src is None:
+            return f"    {{ int16_t *dest = &{dest};\n    {statement('*dest', src)} }}"
+        return f"    {{ int16_t *dest = &{dest}; int16_t src = {src};\n    {statement('*dest', 'src')} }}"
+
+    def flags(self, dest, expression):
+        if self.checked:
+            return f"{dest} = set_flags({expression});"
+        return (f"result = {expression}; {dest} = (int16_t)result; "
+                f"zf = {dest} == 0; sf = {dest} < 0; of = {dest} != result;")
+
+    def proven_accesses(self, op, index):
+        # Opérandes de l'instruction index dont l'index est prouvé dans les bornes.
+        if index is None or not self.safe_accesses:
+            return ()
+        return [operand for slot, operand in enumerate((op.operand1, op.operand2), 1)
+                if (index, slot) in self.safe_accesses]
+
+    def is_checked_access(self, operand):
+        return (isinstance(operand, ArrayAccess) and not isinstance(operand.index, Number)
+                and not any(operand is proven for proven in self.proven))
+
+    def c_name(self, name):
+        # Préfixe: une variable du programme ne peut pas masquer un nom du runtime C.
+        return f"v_{name}"
+
+    def compile_operand(self, operand, number=0):
         if isinstance(operand, Number):
-            return str(operand.value)
+            return str(wrap16(operand.value))
         elif isinstance(operand, Variable):
-            return operand.name
+            return self.c_name(operand.name)
         elif isinstance(operand, Register):
             return operand.name
         elif isinstance(operand, ArrayAccess):
-            index = self.compile_operand(operand.index)
-            return f"{operand.name}[{index}]"
+            index = self.compile_operand(operand.index, number)
+            symbol = self.symbol_table.lookup(operand.name)
+            # Sans symbole (programme en erreur dans une session incrémentale),
+            # le code produit n'est jamais utilisé.
+            if self.checked and self.is_checked_access(operand) and symbol is not None:
+                index = f"check_index({index}, {symbol.size}, {number})"
+            return f"{self.c_name(operand.name)}[{index}]"
         return ""
 
     def save_to_file(self, filename):
         with open(filename, "w") as f:
-            f.write(self.generate_c_code())
-
+            self.write_c_code(f)
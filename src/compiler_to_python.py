@@ -0,0 +1,302 @@
+import marshal
+import os
+import sys
+import time
+from collections import OrderedDict
+from .token import TokenType
+from .ast import Number, Variable, Register, ArrayAccess
+from .cfg import ControlFlowGraph, Liveness, JUMPS, ZF, SF, OF, REGISTER_NAMES, wrap16
+from .ranges import RangeAnalysis, arithmetic_range, operand_range, FULL
+from .cache import DiskCache, DEFAULT_CACHE_DIR, content_key
+from .instrumentation import NO_INSTRUMENTATION
+
+STACK_SIZE = 1024
+FLAG_CONDITIONS = {TokenType.JZ: 'zf', TokenType.JS: 'sf', TokenType.JO: 'of'}
+OPERATORS = {TokenType.ADD: '+', TokenType.SUB: '-', TokenType.MULT: '*',
+             TokenType.AND: '&', TokenType.OR: '|'}
+
+def backend_fingerprint():
+    # Le code généré change avec ce module et avec la version de Python (marshal).
+    with open(__file__, 'rb') as f:
+        return content_key(f.read(), sys.version)
+
+def operand_text(operand):
+    if operand is None:
+        return ''
+    if isinstance(operand, Number):
+        return str(operand.value)
+    if isinstance(operand, ArrayAccess):
+        return f'{operand.name}[{operand_text(operand.index)}]'
+    return operand.name
+
+def program_key(program, symbol_table):
+    # Empreinte du programme vérifié: déclarations puis instructions sous forme canonique.
+    parts = [f'{name}:{symbol.type}:{symbol.size}' for name, symbol in symbol_table.symbols.items()]
+    parts.append('|')
+    for instr in program.instructions:
+        op = instr.operation
+        if op is None:
+            parts.append(f'{instr.number}:')
+        else:
+            parts.append(f'{instr.number}:{op.type.name} {operand_text(op.operand1)},{operand_text(op.operand2)}')
+    return content_key('\n'.join(parts))
+
+# Programme compilé: appeler avec les fonctions d'entrée et de sortie; renvoie la
+# valeur finale des registres, des variables et des tableaux.
+class PythonProgram:
+    def __init__(self, function, key, source=None):
+        self.function = function
+        self.key = key
+        self.source = source
+
+    def __call__(self, input_fn=None, output_fn=None):
+        return self.function(input_fn or (lambda: int(input("Input: "))), output_fn or print)
+
+# Traduit un Program vérifié en une fonction Python: chaque bloc de base devient
+# une suite d'instructions Python dans une boucle de dispatch (arbre de
+# comparaisons sur le numéro de bloc), registres, variables, tableaux, pile et
+# flags sont des variables locales. Les flags ne sont calculés que lorsqu'un
+# saut peut les lire, et l'analyse d'intervalles supprime les ramenages sur 16
+# bits et les vérifications d'index inutiles.
+class PythonCompiler:
+    def __init__(self, ast, symbol_table, instrumentation=None, range_analysis=True):
+        self.ast = ast
+        self.symbol_table = symbol_table
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        self.range_analysis = range_analysis
+
+    def generate_python_code(self):
+        with self.instrumentation.phase('codegen-python') as phase:
+            instructions = list(self.ast.instructions)
+            for instr in instructions:
+                if instr.operation is not None and instr.operation.type == TokenType.CALL:
+                    raise Exception(f"Erreur d'exécution: instruction CALL non supportée "
+                                    f"(instruction {instr.number})")
+            self.cfg = ControlFlowGraph(instructions)
+            self.live_out = Liveness(self.cfg, self.symbol_table).live_out(self.cfg) if instructions else []
+            self.states = None
+            if self.range_analysis and instructions:
+                self.states = RangeAnalysis(self.cfg, self.symbol_table).states()
+            reachable = sorted(self.cfg.reachable())
+            # Numéros de bloc denses; le dernier termine le programme.
+            self.numbers = {block: number for number, block in enumerate(reachable)}
+            self.end = len(reachable)
+            code = self.prologue()
+            cases = [self.compile_block(self.cfg.blocks[block]) for block in reachable]
+            cases.append(['break'])
+            code.extend(self.dispatch(cases, 0, len(cases), 2))
+            code.extend(self.epilogue())
+            source = '\n'.join(code) + '\n'
+            phase.count('instructions', len(instructions))
+            phase.count('blocks', len(reachable))
+            phase.count('python_bytes', len(source))
+        return source
+
+    def prologue(self):
+        code = ['def program(read, write):',
+                '    AX = BX = CX = DX = 0']
+        for name, symbol in self.symbol_table.symbols.items():
+            if symbol.type == 'byte':
+                code.append(f'    {self.local(name)} = 0')
+            elif symbol.type == 'array':
+                code.append(f'    {self.local(name)} = [0] * {symbol.size}')
+        code.extend([
+            '    stack = []',
+            '    push = stack.append',
+            '    pop = stack.pop',
+            '    zf = sf = of = False',
+            '    block = 0',
+            '    while True:',
+        ])
+        return code
+
+    def epilogue(self):
+        values = [f"'{name}': {name}" for name in REGISTER_NAMES]
+        for name, symbol in self.symbol_table.symbols.items():
+            if symbol.type in ('byte', 'array'):
+                values.append(f"'{name}': {self.local(name)}")
+        return [f"    return {{{', '.join(values)}}}"]
+
+    def dispatch(self, cases, low, high, depth):
+        # Arbre équilibré de comparaisons: log2(blocs) tests par saut.
+        indent = '    ' * depth
+        if high - low == 1:
+            return [indent + line for line in cases[low]]
+        middle = (low + high) // 2
+        return ([f'{indent}if block < {middle}:'] + self.dispatch(cases, low, middle, depth + 1)
+                + [f'{indent}else:'] + self.dispatch(cases, middle, high, depth + 1))
+
+    def local(self, name):
+        return name if name in REGISTER_NAMES else f'v_{name}'
+
+    def compile_block(self, block):
+        code = []
+        instructions = self.cfg.instructions
+        for index in range(block.start, block.end):
+            code.extend(self.compile_instruction(index, instructions[index]))
+        last = instructions[block.end - 1].operation
+        if last is not None and last.type == TokenType.HALT:
+            return code
+        following = self.numbers.get(block.index + 1, self.end) if block.end < len(instructions) else self.end
+        if last is not None and last.type in JUMPS:
+            target = self.numbers[self.cfg.block_of[self.cfg.labels[last.operand1.value]]]
+            if last.type == TokenType.JMP:
+                code.append(f'block = {target}')
+            else:
+                code.append(f'block = {target} if {FLAG_CONDITIONS[last.type]} else {following}')
+        else:
+            code.append(f'block = {following}')
+        return code
+
+    def compile_instruction(self, index, instruction):
+        op = instruction.operation
+        if op is None or op.type in JUMPS:
+            return []
+        number = instruction.number
+        live = self.live_out[index]
+        # None sans analyse, ou pour une instruction que l'analyse juge jamais atteinte.
+        ranges = self.states[index] if self.states is not None else None
+        code = []
+
+        if op.type == TokenType.HALT:
+            return ['break']
+        if op.type == TokenType.IS_FULL:
+            return [f'zf = len(stack) >= {STACK_SIZE}'] if live & ZF else []
+        if op.type == TokenType.PRINT:
+            source = self.operand(op.operand1, number, ranges, code)
+            return code + [f'write({source})']
+        if op.type == TokenType.PUSH:
+            source = self.operand(op.operand1, number, ranges, code)
+            return code + [f'if len(stack) < {STACK_SIZE}: push({source})']
+
+        dest = self.operand(op.operand1, number, ranges, code)
+        if op.type == TokenType.INPUT:
+            return code + [f'{dest} = ((read() + 32768) & 65535) - 32768']
+        if op.type == TokenType.POP:
+            return code + [f'{dest} = pop() if stack else 0']
+        if op.type == TokenType.NOT:
+            code.append(f'{dest} = ~{dest}')
+            return code + self.flags(dest, None, live)
+
+        source = self.operand(op.operand2, number, ranges, code)
+        if op.type == TokenType.MOV:
+            return code + [f'{dest} = {source}']
+        if op.type == TokenType.DIV:
+            if ranges is None or self.may_be_zero(op.operand2, ranges):
+                code.append(f'if {source} == 0: raise Exception("Erreur d\'exécution à l\'instruction {number}: '
+                            f'division par zéro")')
+            code.append(f'result = abs({dest}) // abs({source})')
+            code.append(f'if ({dest} < 0) != ({source} < 0): result = -result')
+            return code + self.store(dest, 'result', op, ranges, live)
+        operator = OPERATORS[op.type]
+        if op.type in (TokenType.AND, TokenType.OR):
+            code.append(f'{dest} {operator}= {source}')
+            return code + self.flags(dest, None, live)
+        return code + self.store(dest, f'{dest} {operator} {source}', op, ranges, live)
+
+    def store(self, dest, expression, op, ranges, live):
+        # Ramenage sur 16 bits seulement si l'analyse ne prouve pas l'absence de débordement.
+        exact = False
+        if ranges is not None and not isinstance(op.operand1, ArrayAccess):
+            a = ranges[op.operand1.name]
+            b = operand_range(op.operand2, ranges)
+            exact = arithmetic_range(op.type, a, b) is not FULL
+        if exact:
+            return [f'{dest} = {expression}'] + self.flags(dest, None, live)
+        if live & OF:
+            return [f'result = {expression}', f'{dest} = ((result + 32768) & 65535) - 32768'] \
+                + self.flags(dest, 'result', live)
+        return [f'{dest} = (({expression}) + 32768 & 65535) - 32768'] + self.flags(dest, None, live)
+
+    def flags(self, dest, result, live):
+        code = []
+        if live & ZF:
+            code.append(f'zf = {dest} == 0')
+        if live & SF:
+            code.append(f'sf = {dest} < 0')
+        if live & OF:
+            code.append(f'of = {dest} != {result}' if result else 'of = False')
+        return code
+
+    def may_be_zero(self, operand, ranges):
+        low, high = operand_range(operand, ranges)
+        return low <= 0 <= high
+
+    def operand(self, operand, number, ranges, code):
+        if isinstance(operand, Number):
+            return str(wrap16(operand.value))
+        if isinstance(operand, (Variable, Register)):
+            return self.local(operand.name)
+        index = operand.index
+        if isinstance(index, Number):
+            return f'{self.local(operand.name)}[{index.value}]'
+        size = self.symbol_table.symbols[operand.name].size
+        name = self.local(index.name)
+        if ranges is None or not (0 <= ranges[index.name][0] and ranges[index.name][1] < size):
+            code.append(f'if not 0 <= {name} < {size}: raise Exception(f"Erreur d\'exécution à '
+                        f'l\'instruction {number}: index {{{name}}} hors limites")')
+        return f'{self.local(operand.name)}[{name}]'
+
+    def compile(self):
+        source = self.generate_python_code()
+        with self.instrumentation.phase('compile-python'):
+            code = compile(source, '<programme>', 'exec')
+        return code, source
+
+def load(code):
+    namespace = {}
+    exec(code, namespace)
+    return namespace['program']
+
+# Fonctions compilées indexées par l'empreinte du programme: en mémoire (LRU)
+# et, si un répertoire est utilisable, objets code sérialisés avec marshal.
+class PythonCache:
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 * 1024, max_entries=64, use_disk=True):
+        self.memory = OrderedDict()
+        self.max_entries = max_entries
+        self.disk = DiskCache(os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'python'), max_bytes) \
+            if use_disk else None
+        self.backend = backend_fingerprint()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, program, symbol_table, instrumentation=None):
+        key = content_key(self.backend, program_key(program, symbol_table))
+        compiled = self.memory.get(key)
+        if compiled is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return compiled
+        code = None
+        if self.disk is not None:
+            path = self.disk.get(key)
+            if path is not None:
+                try:
+                    with open(path, 'rb') as f:
+                        code = marshal.loads(f.read())
+                except (OSError, ValueError, EOFError, TypeError):
+                    self.disk.remove(key)
+                    code = None
+        source = None
+        if code is None:
+            self.misses += 1
+            code, source = PythonCompiler(program, symbol_table, instrumentation).compile()
+            if self.disk is not None:
+                self.disk.put(key, marshal.dumps(code))
+        else:
+            self.hits += 1
+        compiled = PythonProgram(load(code), key, source)
+        self.memory[key] = compiled
+        if len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+        return compiled
+
+def run_python(ast, symbol_table, input_fn=None, output_fn=None, cache=None, instrumentation=None):
+    if cache is not None:
+        program = cache.get(ast, symbol_table, instrumentation)
+    else:
+        code, source = PythonCompiler(ast, symbol_table, instrumentation).compile()
+        program = PythonProgram(load(code), None, source)
+    start = time.perf_counter()
+    values = program(input_fn, output_fn)
+    return values, time.perf_counter() - start
@@ -0,0 +1,422 @@
+import glob
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from .pipeline import analyze
+from .optimizer import optimize
+from .compiler_to_c import CCompiler
+from .compiler_to_asm import AsmCompiler
+from .compiler_to_python import PythonCompiler, PythonProgram, load
+from .native import NativeBuilder, AsmBuilder
+from .vm import BytecodeCompiler, VirtualMachine
+from . import vector_vm
+from .vector_vm import VectorMachine, read_input_matrix, LIMITED
+
+SOURCE_SUFFIX = '.projet'
+INPUTS_SUFFIX = '.inputs'
+BACKENDS = ('vm', 'python', 'vector', 'c', 'asm')
+# Backends qui produisent un exécutable: temps net du lancement d'un processus.
+NATIVE_BACKENDS = ('c', 'asm')
+DEFAULT_MAX_STEPS = 50_000_000
+# Programme qui s'arrête aussitôt: mesure le coût de lancement d'un exécutable.
+EMPTY_PROGRAM = "Var\nx:byte\nInstructions\n0: halt;\n"
+
+# Un programme du corpus et ses entrées enregistrées: prog.projet et, à côté,
+# prog.inputs (une exécution par ligne, format de main.py --inputs). Sans
+# fichier d'entrées, le programme est exécuté une fois sans entrée.
+class CorpusProgram:
+    def __init__(self, name, source, inputs):
+        self.name = name
+        self.source = source
+        self.inputs = inputs
+
+def load_corpus(paths):
+    programs = []
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, '**', '*' + SOURCE_SUFFIX), recursive=True)) \
+            if os.path.isdir(path) else [path]
+        for file in files:
+            with open(file, 'r') as f:
+                source = f.read()
+            inputs_path = os.path.splitext(file)[0] + INPUTS_SUFFIX
+            inputs = read_input_matrix(inputs_path) if os.path.exists(inputs_path) else [[]]
+            programs.append(CorpusProgram(os.path.relpath(file, path) if os.path.isdir(path) else file,
+                                          source, inputs))
+    if not programs:
+        raise Exception(f"Corpus: aucun fichier {SOURCE_SUFFIX} dans {', '.join(paths)}")
+    return programs
+
+# Une façon d'exécuter un programme: backend, niveau d'optimisation du
+# programme et, pour le C, profil, structuration, analyse d'intervalles et -O de cc.
+class Variant:
+    def __init__(self, backend, opt_level=0, profile=None, structured=True, range_analysis=True, copt=None):
+        self.backend = backend
+        self.opt_level = opt_level
+        self.profile = profile
+        self.structured = structured
+        self.range_analysis = range_analysis
+        self.copt = copt
+
+    @property
+    def name(self):
+        parts = [self.backend, f'O{self.opt_level}']
+        if self.backend == 'c':
+            parts.append(self.profile)
+            if not self.structured:
+                parts.append('goto')
+            if not self.range_analysis:
+                parts.append('sans-intervalles')
+            parts.append(f'cc-O{self.copt}')
+        return '/'.join(parts)
+
+    def settings(self):
+        settings = {'backend': self.backend, 'opt_level': self.opt_level}
+        if self.backend == 'c':
+            settings.update(profile=self.profile, structured=self.structured,
+                            range_analysis=self.range_analysis, copt=self.copt)
+        return settings
+
+def variants(backends=BACKENDS, opt_levels=(0, 2), copts=('0', '2')):
+    # Le VM en -O0 est la référence; chaque autre variante est comparée à elle.
+    result = []
+    for level in opt_levels:
+        for backend in backends:
+            if backend == 'vector' and vector_vm.np is None:
+                continue
+            if backend != 'c':
+                if not (backend == 'vm' and level == 0):
+                    result.append(Variant(backend, level))
+                continue
+            for copt in copts:
+                result.append(Variant('c', level, 'checked', copt=copt))
+                result.append(Variant('c', level, 'checked', structured=False, copt=copt))
+                result.append(Variant('c', level, 'checked', range_analysis=False, copt=copt))
+                result.append(Variant('c', level, 'fast', copt=copt))
+                result.append(Variant('c', level, 'fast', structured=False, copt=copt))
+    return result
+
+class MissingInput(Exception):
+    pass
+
+# Résultat d'une exécution: valeurs affichées, message d'erreur d'exécution.
+class Outcome:
+    def __init__(self, output, error=None):
+        self.output = output
+        self.error = error
+
+    def __eq__(self, other):
+        return self.output == other.output and self.error == other.error
+
+    def describe(self):
+        shown = ' '.join(map(str, self.output[:8])) + (' ...' if len(self.output) > 8 else '')
+        return f"[{shown}] ({len(self.output)} valeur(s))" + (f", {self.error}" if self.error else "")
+
+def input_reader(values):
+    values = iter(values)
+
+    def read():
+        for value in values:
+            return value
+        raise MissingInput("entrées enregistrées épuisées")
+    return read
+
+@contextmanager
+def deadline(seconds):
+    # Interrompt un backend en processus (Python) qui ne termine pas, par SIGALRM.
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def expired(signum, frame):
+        raise Exception(f"délai de {seconds:.1f}s dépassé")
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def best_time(repeat, run):
+    # Meilleur temps sur repeat exécutions; le résultat est celui de la dernière.
+    best = None
+    result = None
+    for _ in range(repeat):
+        result, seconds = run()
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+def parse_c_run(result):
+    output = [int(value) for value in result.stdout.replace('Input: ', '').split()]
+    error = None
+    if result.returncode != 0:
+        lines = [line for line in result.stderr.splitlines() if line.startswith("Erreur d'exécution")]
+        error = lines[0] if lines else f"code de sortie {result.returncode}: {result.stderr.strip()}"
+    return Outcome(output, error)
+
+# Exécute chaque programme du corpus avec chaque variante et compare les
+# valeurs affichées et l'erreur d'exécution à celles du VM sur le programme
+# non optimisé. Une exécution que le VM n'a pas terminée (max_steps) ou qui
+# lit plus d'entrées qu'enregistré n'est comparée nulle part. Le profil fast ne
+# vérifie pas les index: une exécution qui sort d'un tableau n'y est pas comparée.
+# Le débit est calculé avec le nombre d'instructions exécutées par le VM; pour
+# les backends natifs (C, assembleur), sur le temps d'exécution moins le coût de lancement d'un processus.
+class DifferentialHarness:
+    def __init__(self, variants, cc='cc', repeat=3, max_steps=DEFAULT_MAX_STEPS, timeout=None, builders=None):
+        self.variants = variants
+        self.cc = cc
+        self.repeat = repeat
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.builders = builders or {}
+        self.overhead = None
+
+    def process_overhead(self):
+        # Temps moyen de lancement d'un exécutable C qui ne fait rien.
+        if self.overhead is None:
+            ast, symbol_table = analyze(EMPTY_PROGRAM)
+            runs = 50
+            _, seconds, _ = self.c_runs(ast, symbol_table, Variant('c', profile='checked', copt='0'),
+                                        [[]] * runs, None)
+            self.overhead = seconds / runs
+        return self.overhead
+
+    def builder(self, copt):
+        if copt not in self.builders:
+            self.builders[copt] = NativeBuilder(self.cc, copt, use_cache=False)
+        return self.builders[copt]
+
+    def vm_runs(self, bytecode, inputs, max_steps):
+        outcomes, steps = [], []
+        start = time.perf_counter()
+        for row in inputs:
+            output = []
+            vm = VirtualMachine(bytecode, input_reader(row), output.append)
+            try:
+                vm.run(max_steps)
+                outcomes.append(Outcome(output) if vm.halted else None)
+            except MissingInput:
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(Outcome(output, str(e)))
+            steps.append(vm.steps)
+        return (outcomes, steps), time.perf_counter() - start
+
+    def python_runs(self, program, inputs, limit):
+        outcomes = []
+        elapsed = 0.0
+        for row in inputs:
+            output = []
+            start = time.perf_counter()
+            try:
+                with deadline(limit):
+                    program(input_reader(row), output.append)
+                outcomes.append(Outcome(output))
+            except Exception as e:
+                outcomes.append(Outcome(output, str(e)))
+            elapsed += time.perf_counter() - start
+        return outcomes, elapsed
+
+    def vector_runs(self, ast, symbol_table, inputs):
+        machine = VectorMachine(BytecodeCompiler(ast, symbol_table).compile(), inputs)
+        start = time.perf_counter()
+        machine.run(self.max_steps)
+        elapsed = time.perf_counter() - start
+        outcomes = [Outcome(output, error) for output, error in zip(machine.outputs(), machine.errors)]
+        for lane in (machine.status == LIMITED).nonzero()[0].tolist():
+            outcomes[lane].error = "exécution non terminée"
+        return outcomes, elapsed
+
+    def asm_builder(self):
+        if 'asm' not in self.builders:
+            self.builders['asm'] = AsmBuilder(cc=self.cc, use_cache=False)
+        return self.builders['asm']
+
+    def c_runs(self, ast, symbol_table, variant, inputs, limit):
+        compiler = CCompiler(ast, symbol_table, profile=variant.profile, range_analysis=variant.range_analysis,
+                             structured=variant.structured)
+        return self.native_runs(self.builder(variant.copt).build(compiler.generate_c_code()), inputs, limit)
+
+    def asm_runs(self, ast, symbol_table, inputs, limit):
+        build = self.asm_builder().build(AsmCompiler(ast, symbol_table).generate_asm_code())
+        return self.native_runs(build, inputs, limit)
+
+    def native_runs(self, build, inputs, limit):
+        outcomes = []
+        elapsed = 0.0
+        try:
+            for row in inputs:
+                stdin = ''.join(f'{value}\n' for value in row)
+                start = time.perf_counter()
+                try:
+                    result = subprocess.run([build.executable], input=stdin, capture_output=True, text=True,
+                                            timeout=limit)
+                except subprocess.TimeoutExpired:
+                    outcomes.append(Outcome([], f"délai de {limit:.1f}s dépassé"))
+                    continue
+                elapsed += time.perf_counter() - start
+                outcomes.append(parse_c_run(result))
+        finally:
+            if build.temporary:
+                os.remove(build.executable)
+                os.rmdir(os.path.dirname(build.executable))
+        return outcomes, elapsed, build.compile_seconds
+
+    def run_variant(self, variant, program, reference, limit):
+        ast, symbol_table = program
+        inputs = reference['inputs']
+        if variant.backend == 'vm':
+            bytecode = BytecodeCompiler(ast, symbol_table).compile()
+            with deadline(limit * len(inputs) * self.repeat):
+                (outcomes, _), seconds = best_time(self.repeat, lambda: self.vm_runs(bytecode, inputs, None))
+            return outcomes, seconds, None
+        if variant.backend == 'python':
+            code, _ = PythonCompiler(ast, symbol_table).compile()
+            function = PythonProgram(load(code), None)
+            outcomes, seconds = best_time(self.repeat, lambda: self.python_runs(function, inputs, limit))
+            return outcomes, seconds, None
+        if variant.backend == 'vector':
+            outcomes, seconds = best_time(self.repeat, lambda: self.vector_runs(ast, symbol_table, inputs))
+            return outcomes, seconds, None
+        compile_seconds = []
+
+        def run():
+            if variant.backend == 'asm':
+                outcomes, seconds, compiled = self.asm_runs(ast, symbol_table, inputs, limit)
+            else:
+                outcomes, seconds, compiled = self.c_runs(ast, symbol_table, variant, inputs, limit)
+            compile_seconds.append(compiled)
+            return outcomes, seconds
+        outcomes, seconds = best_time(self.repeat, run)
+        return outcomes, seconds, min(compile_seconds)
+
+    def run_program(self, program):
+        entry = {'name': program.name, 'runs': len(program.inputs), 'variants': []}
+        try:
+            ast, symbol_table = analyze(program.source)
+        except Exception as e:
+            entry['error'] = str(e)
+            return entry
+
+        bytecode = BytecodeCompiler(ast, symbol_table).compile()
+        (outcomes, steps), seconds = best_time(self.repeat, lambda: self.vm_runs(bytecode, program.inputs,
+                                                                                 self.max_steps))
+        compared = [i for i, outcome in enumerate(outcomes) if outcome is not None]
+        total_steps = sum(steps[i] for i in compared)
+        entry.update(compared_runs=len(compared), steps=total_steps)
+        entry['variants'].append(self.result(Variant('vm'), 'référence', seconds, total_steps, len(compared)))
+        if not compared:
+            return entry
+        inputs = [program.inputs[i] for i in compared]
+        expected = [outcomes[i] for i in compared]
+        # Une variante 100 fois plus lente que le VM a sûrement bouclé.
+        limit = self.timeout or max(10.0, 100 * seconds)
+
+        optimized = {0: (ast, symbol_table)}
+        for variant in self.variants:
+            if variant.opt_level not in optimized:
+                try:
+                    optimized[variant.opt_level] = optimize(*analyze(program.source), variant.opt_level)[:2]
+                except Exception as e:
+                    entry['variants'].append(self.result(variant, 'erreur', detail=f"optimisation: {e}"))
+                    continue
+            runs = list(range(len(inputs)))
+            if variant.backend == 'c' and variant.profile == 'fast':
+                runs = [i for i in runs if not (expected[i].error and 'hors limites' in expected[i].error)]
+            if not runs:
+                entry['variants'].append(self.result(variant, 'ignoré', detail="toutes les exécutions sortent "
+                                                                               "d'un tableau (profil fast)"))
+                continue
+            reference = {'inputs': [inputs[i] for i in runs]}
+            try:
+                actual, seconds, compile_seconds = self.run_variant(variant, optimized[variant.opt_level],
+                                                                    reference, limit)
+            except Exception as e:
+                entry['variants'].append(self.result(variant, 'erreur', detail=str(e)))
+                continue
+            status, detail = 'ok', None
+            for position, i in enumerate(runs):
+                if actual[position] != expected[i]:
+                    status = 'différence'
+                    detail = (f"exécution {compared[i]} (entrées {inputs[i][:8]}): attendu "
+                              f"{expected[i].describe()}, obtenu {actual[position].describe()}")
+                    break
+            net = None
+            if variant.backend in NATIVE_BACKENDS:
+                net = max(seconds - len(runs) * self.process_overhead(), 1e-9)
+            result = self.result(variant, status, seconds, sum(steps[compared[i]] for i in runs), len(runs),
+                                 detail, net)
+            if compile_seconds is not None:
+                result['compile_seconds'] = compile_seconds
+            entry['variants'].append(result)
+        return entry
+
+    def result(self, variant, status, seconds=None, steps=None, runs=None, detail=None, net=None):
+        result = {'variant': variant.name, 'settings': variant.settings(), 'status': status}
+        if seconds is not None:
+            timed = seconds if net is None else net
+            result.update(seconds=seconds, runs=runs, steps=steps,
+                          instructions_per_second=steps / timed if timed else None)
+            if net is not None:
+                result['net_seconds'] = net
+        if detail:
+            result['detail'] = detail
+        return result
+
+    def run(self, programs, progress=None):
+        report = {'environment': environment(self.cc), 'programs': []}
+        if any(variant.backend in NATIVE_BACKENDS for variant in self.variants):
+            report['environment']['process_seconds'] = self.process_overhead()
+        for program in programs:
+            entry = self.run_program(program)
+            report['programs'].append(entry)
+            if progress is not None:
+                progress(entry)
+        report['summary'] = summarize(report)
+        return report
+
+def environment(cc):
+    try:
+        version = subprocess.run([cc, '--version'], capture_output=True, text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        version = None
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cc': version,
+        'numpy': getattr(vector_vm.np, '__version__', None),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def summarize(report):
+    summary = {'programs': len(report['programs']), 'variants': 0, 'ok': 0, 'différence': 0, 'erreur': 0,
+               'ignoré': 0, 'front_end_errors': 0}
+    for entry in report['programs']:
+        if 'error' in entry:
+            summary['front_end_errors'] += 1
+        for result in entry['variants'][1:]:
+            summary['variants'] += 1
+            summary[result['status']] += 1
+    return summary
+
+# Variantes nettement plus lentes que dans un rapport précédent: temps
+# d'exécution au-delà de threshold fois celui de la même variante, même programme.
+def regressions(report, baseline, threshold=1.25, min_seconds=0.01):
+    previous = {}
+    for entry in baseline.get('programs', []):
+        for result in entry['variants']:
+            if result.get('seconds'):
+                previous[(entry['name'], result['variant'])] = result['seconds']
+    found = []
+    for entry in report['programs']:
+        for result in entry['variants']:
+            before = previous.get((entry['name'], result['variant']))
+            seconds = result.get('seconds')
+            if before and seconds and seconds >= min_seconds and seconds > threshold * before:
+                found.append({'program': entry['name'], 'variant': result['variant'], 'before': before,
+                              'after': seconds, 'ratio': seconds / before})
+    return found
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import pickle
+from . import ast, token
+from .cache import DiskCache, DEFAULT_CACHE_DIR, content_key
+from .ast import Program
+from .instruction_table import InstructionTable
+
+MAGIC = b'PJFC'
+FORMAT_VERSION = 1
+FRONTEND_MODULES = ('token.py', 'lexer.py', 'parser.py', 'ast.py', 'instruction_table.py',
+                    'semantic_analyzer.py')
+
+def schema_fingerprint():
+    # Change dès qu'une classe de l'AST, un TokenType ou le code du front end change.
+    parts = [str(FORMAT_VERSION)]
+    for module in (ast, token):
+        for name, obj in sorted(vars(module).items()):
+            if isinstance(obj, type) and obj.__module__ == module.__name__:
+                parts.append(f'{name}:{getattr(obj, "__slots__", "")}')
+    parts.extend(member.name for member in token.TokenType)
+    directory = os.path.dirname(__file__)
+    for filename in FRONTEND_MODULES:
+        with open(os.path.join(directory, filename), 'rb') as f:
+            parts.append(hashlib.sha256(f.read()).hexdigest())
+    return content_key(*parts)
+
+# Cache des artefacts du front end: le Program vérifié (instructions stockées
+# sous forme d'InstructionTable) et sa SymbolTable, sérialisés avec pickle et
+# indexés par le hash du source et l'empreinte du schéma. Chaque entrée commence
+# par un en-tête (MAGIC, version, sha256 du contenu) vérifié à la lecture.
+# load rend les instructions en liste, comme une analyse sans cache.
+class FrontendCache:
+    def __init__(self, cache_dir=None, max_bytes=256 * 1024 * 1024):
+        self.cache = DiskCache(os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'frontend'), max_bytes)
+        self.schema = schema_fingerprint()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source):
+        return content_key(self.schema, source)
+
+    def load(self, source):
+        key = self.key(source)
+        path = self.cache.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        header_size = len(MAGIC) + 1 + 32
+        payload = data[header_size:]
+        if (len(data) < header_size or data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != FORMAT_VERSION
+                or data[len(MAGIC) + 1:header_size] != hashlib.sha256(payload).digest()):
+            self.cache.remove(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        program, symbol_table = pickle.loads(payload)
+        return Program(program.declarations, list(program.instructions)), symbol_table
+
+    def store(self, source, program, symbol_table):
+        instructions = program.instructions
+        if not isinstance(instructions, InstructionTable):
+            instructions = InstructionTable.from_instructions(instructions)
+        payload = pickle.dumps((Program(program.declarations, instructions), symbol_table),
+                               protocol=pickle.HIGHEST_PROTOCOL)
+        header = MAGIC + bytes([FORMAT_VERSION]) + hashlib.sha256(payload).digest()
+        self.cache.put(self.key(source), header + payload)
+
+    def clear(self):
+        self.cache.clear()
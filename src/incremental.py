@@ -0,0 +1,472 @@
+import bisect
+import itertools
+from collections import Counter
+from .token import Token, TokenType
+from .lexer import Lexer
+from .parser import Parser
+from .ast import Program, Instruction, Variable, ArrayAccess
+from .semantic_analyzer import SemanticAnalyzer, SymbolTable, SemanticError, Diagnostic, LabelSet
+from .compiler_to_c import CCompiler
+
+JUMP_TYPES = (TokenType.JMP, TokenType.JZ, TokenType.JS, TokenType.JO)
+
+def split_lines(text):
+    # Comme splitlines(keepends=True), mais seul '\n' termine une ligne, comme
+    # dans le lexer.
+    lines = text.split('\n')
+    last = lines.pop()
+    lines = [line + '\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+def lex_line(text, line):
+    tokens = list(Lexer(text, line=line).iter_tokens())
+    tokens.pop()
+    return tokens
+
+def referenced_names(operation):
+    names = set()
+    for operand in (operation.operand1, operation.operand2):
+        if isinstance(operand, Variable):
+            names.add(operand.name)
+        elif isinstance(operand, ArrayAccess):
+            names.add(operand.name)
+            if isinstance(operand.index, Variable):
+                names.add(operand.index.name)
+    return names
+
+# Un fragment du source: une suite de lignes complètes qui se termine par une ligne
+# dont le dernier token est ';' (ou par une ligne vide de tokens). Le parser est
+# alors forcément entre deux instructions, donc chaque fragment s'analyse seul.
+class Chunk:
+    # line: première ligne du fragment lors de sa dernière analyse; les positions
+    # des instructions et des diagnostics sont relatives à ce numéro.
+    # code: (label, C sans label) de chaque instruction; le label n'est émis
+    # qu'à sa première occurrence dans le fichier, connue à l'assemblage.
+    __slots__ = ('lines', 'line', 'instructions', 'syntax_error', 'errors', 'names', 'code')
+
+    def __init__(self, lines, line=1):
+        self.lines = lines
+        self.line = line
+        self.instructions = []
+        self.syntax_error = None
+        self.errors = []
+        self.names = set()
+        self.code = []
+
+    def text(self):
+        return ''.join(self.lines)
+
+# Session de compilation incrémentale: garde les fragments analysés, la table des
+# symboles et le C émis. Une modification de lignes ne relexe et ne ré-analyse
+# que les fragments touchés; une modification de la section Var ne revérifie que
+# les instructions qui utilisent les noms dont la déclaration a changé.
+# Le fragment 0 est l'en-tête: de 'Var' jusqu'à la ligne du mot-clé Instructions.
+class CompilationSession:
+    def __init__(self, source=''):
+        self.load(source)
+
+    def load(self, source):
+        lines = split_lines(source)
+        self.symbol_table = SymbolTable()
+        self.declarations = []
+        self.header_errors = []
+        self.label_counts = Counter()
+        self.jump_counts = Counter()
+        self.references = {}
+        self.failing = set()
+        self.missing = set()
+        self.chunks = []
+        self.starts = []
+        # Analyseur des instructions: il partage les symboles de la session mais
+        # garde ses propres sauts, les labels étant comptés par la session.
+        self.analyzer = SemanticAnalyzer()
+        self.analyzer.symbol_table.symbols = self.symbol_table.symbols
+        # L'analyse d'intervalles et la structuration portent sur tout le
+        # programme: le code d'un fragment garde toutes les vérifications
+        # d'index et un label par instruction.
+        self.compiler = CCompiler(None, self.symbol_table, range_analysis=False, structured=False)
+
+        header_end = self.find_header_end(lines)
+        self.header_complete = header_end is not None
+        if header_end is None:
+            # Pas de section Instructions exploitable: tout le texte est l'en-tête
+            # et chaque modification recharge le fichier.
+            header_end = len(lines)
+        header = Chunk(lines[:header_end])
+        self.chunks.append(header)
+        self.parse_header(header)
+        self.chunks.extend(self.build_chunks(lines[header_end:], header_end + 1))
+        for chunk in self.chunks:
+            self.register(chunk)
+        self.update_starts()
+
+    def find_header_end(self, lines):
+        for index, text in enumerate(lines):
+            try:
+                tokens = lex_line(text, index + 1)
+            except Exception:
+                return None
+            for position, token in enumerate(tokens):
+                if token.type == TokenType.INSTRUCTIONS:
+                    rest = tokens[position + 1:]
+                    if rest and rest[-1].type != TokenType.SEMICOLON:
+                        return None
+                    return index + 1
+        return None
+
+    def update_starts(self):
+        # Numéro (base 0) de la première ligne de chaque fragment.
+        self.starts = list(itertools.accumulate((len(c.lines) for c in self.chunks), initial=0))
+
+    def line_count(self):
+        return self.starts[-1]
+
+    def lex_lines(self, lines, first_line):
+        # Tokens de chaque ligne, None pour une ligne refusée par le lexer. Le texte
+        # est lexé d'un bloc; on ne repasse ligne par ligne qu'en cas d'erreur.
+        try:
+            tokens = list(Lexer(''.join(lines), line=first_line).iter_tokens())
+        except Exception:
+            per_line = []
+            for offset, text in enumerate(lines):
+                try:
+                    per_line.append(lex_line(text, first_line + offset))
+                except Exception:
+                    per_line.append(None)
+            return per_line
+        tokens.pop()
+        per_line = [[] for _ in lines]
+        for token in tokens:
+            per_line[token.line - first_line].append(token)
+        return per_line
+
+    def build_chunks(self, lines, first_line):
+        chunks = []
+        start = 0
+        current = []
+        closed = True
+        for offset, tokens in enumerate(self.lex_lines(lines, first_line)):
+            if tokens is None:
+                closed = True
+                current = None
+            elif tokens:
+                closed = tokens[-1].type == TokenType.SEMICOLON
+                if current is not None:
+                    current.extend(tokens)
+            if closed:
+                chunks.append(self.parse_chunk(Chunk(lines[start:offset + 1], first_line + start), current))
+                start = offset + 1
+                current = []
+        if start < len(lines):
+            chunks.append(self.parse_chunk(Chunk(lines[start:], first_line + start), current))
+        return chunks
+
+    def parse_tokens(self, chunk, line):
+        return Parser(Lexer(chunk.text(), line=line).iter_tokens())
+
+    def parse_chunk(self, chunk, tokens=None):
+        if tokens is None:
+            parser = self.parse_tokens(chunk, chunk.line)
+        else:
+            # Même token EOF que le lexer sur le texte du fragment.
+            eof_line = chunk.line + sum(text.endswith('\n') for text in chunk.lines)
+            parser = Parser(tokens + [Token(TokenType.EOF, None, eof_line, 1)])
+        try:
+            chunk.instructions = list(parser.iter_instruction_list())
+        except Exception as e:
+            chunk.instructions = []
+            chunk.syntax_error = str(e)
+        self.check_chunk(chunk)
+        return chunk
+
+    def parse_header(self, header):
+        try:
+            program = self.parse_tokens(header, 1).parse()
+        except Exception as e:
+            header.instructions = []
+            header.syntax_error = str(e)
+            header.errors = []
+            header.code = []
+            self.header_errors = []
+            return set()
+        header.syntax_error = None
+        header.instructions = program.instructions
+        analyzer = SemanticAnalyzer()
+        for declaration in program.declarations:
+            analyzer.visit(declaration)
+        self.header_errors = analyzer.diagnostics
+        self.declarations = program.declarations
+
+        old = self.symbol_table.symbols
+        new = analyzer.symbol_table.symbols
+        changed = {name for name in old.keys() | new.keys()
+                   if name not in old or name not in new
+                   or (old[name].type, old[name].size) != (new[name].type, new[name].size)}
+        self.symbol_table.symbols = new
+        self.analyzer.symbol_table.symbols = new
+        self.check_chunk(header)
+        return changed
+
+    def check_chunk(self, chunk):
+        analyzer = self.analyzer
+        analyzer.diagnostics = []
+        chunk.names = set()
+        code = []
+        for instr in chunk.instructions:
+            op = instr.operation
+            if op is None:
+                continue
+            chunk.names |= referenced_names(op)
+            analyzer.current_instruction = instr
+            analyzer.visit_Operation(op)
+            code.append((instr.number, self.compiler.compile_instruction(instr, False)))
+        chunk.errors = analyzer.diagnostics
+        analyzer.jump_sources = []
+        analyzer.symbol_table.jumps = []
+        chunk.code = code
+
+    def register(self, chunk, sign=1):
+        labels = self.label_counts
+        jumps = self.jump_counts
+        for instr in chunk.instructions:
+            labels[instr.number] += sign
+            self.update_target(instr.number)
+            op = instr.operation
+            if op is not None and op.type in JUMP_TYPES:
+                jumps[op.operand1.value] += sign
+                self.update_target(op.operand1.value)
+        for name in chunk.names:
+            users = self.references.setdefault(name, set())
+            if sign > 0:
+                users.add(chunk)
+            else:
+                users.discard(chunk)
+        self.update_failing(chunk, sign > 0)
+
+    def update_target(self, target):
+        if self.jump_counts[target] > 0 and self.label_counts[target] <= 0:
+            self.missing.add(target)
+        else:
+            self.missing.discard(target)
+
+    def update_failing(self, chunk, present=True):
+        if present and (chunk.syntax_error is not None or chunk.errors):
+            self.failing.add(chunk)
+        else:
+            self.failing.discard(chunk)
+
+    def unregister(self, chunk):
+        self.register(chunk, -1)
+
+    # Remplace les lignes [start, end) (base 0) par text. Renvoie le nombre de
+    # fragments ré-analysés.
+    def edit(self, start, end, text):
+        lines = split_lines(text)
+        if lines and not lines[-1].endswith('\n') and end < self.line_count():
+            lines[-1] += '\n'
+        return self.replace_lines(start, end, lines)
+
+    # Applique le nouveau source complet en ne ré-analysant que les lignes qui
+    # diffèrent entre le début et la fin communs avec l'ancien texte.
+    def update(self, source):
+        new_lines = split_lines(source)
+        old_lines = [line for chunk in self.chunks for line in chunk.lines]
+        prefix = 0
+        limit = min(len(old_lines), len(new_lines))
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+        if prefix == len(old_lines) == len(new_lines):
+            return 0
+        return self.replace_lines(prefix, len(old_lines) - suffix, new_lines[prefix:len(new_lines) - suffix])
+
+    def replace_lines(self, start, end, lines):
+        total = self.line_count()
+        if not 0 <= start <= end <= total:
+            raise Exception(f"Modification hors du fichier: lignes {start}-{end} sur {total}")
+        header_lines = len(self.chunks[0].lines)
+        if start < header_lines or not self.header_complete:
+            if self.header_complete and end <= header_lines and self.replace_header(start, end, lines):
+                return 1
+            self.load(self.source_with(start, end, lines))
+            return len(self.chunks)
+
+        count = len(self.chunks)
+        if start == total:
+            # Ajout en fin de fichier: le dernier fragment est repris s'il est resté ouvert.
+            first = last = count - 1
+            if first == 0:
+                first, last = 1, 0
+        else:
+            first = bisect.bisect_right(self.starts, start) - 1
+            last = bisect.bisect_right(self.starts, end - 1) - 1 if end > start else first
+        region_start = self.starts[first]
+        region = [line for chunk in self.chunks[first:last + 1] for line in chunk.lines]
+        region[start - region_start:end - region_start] = lines
+        rebuilt = self.build_chunks(region, region_start + 1)
+
+        # Un fragment resté ouvert absorbe les suivants jusqu'à se refermer.
+        while rebuilt and last + 1 < len(self.chunks) and not self.is_closed(rebuilt[-1]):
+            last += 1
+            region = region + self.chunks[last].lines
+            rebuilt = self.build_chunks(region, region_start + 1)
+
+        for chunk in self.chunks[first:last + 1]:
+            self.unregister(chunk)
+        for chunk in rebuilt:
+            self.register(chunk)
+        self.chunks[first:last + 1] = rebuilt
+
+        starts = [region_start]
+        for chunk in rebuilt:
+            starts.append(starts[-1] + len(chunk.lines))
+        delta = len(lines) - (end - start)
+        tail = self.starts[last + 2:]
+        if delta:
+            tail = [line + delta for line in tail]
+        self.starts[first:] = starts + tail
+        return len(rebuilt)
+
+    def is_closed(self, chunk):
+        for text in reversed(chunk.lines):
+            try:
+                tokens = lex_line(text, 1)
+            except Exception:
+                return True
+            if tokens:
+                return tokens[-1].type == TokenType.SEMICOLON
+        return True
+
+    def replace_header(self, start, end, lines):
+        header = self.chunks[0]
+        new_lines = header.lines[:start] + lines + header.lines[end:]
+        if self.find_header_end(new_lines) != len(new_lines):
+            return False
+        self.unregister(header)
+        header.lines = new_lines
+        changed = self.parse_header(header)
+        self.register(header)
+        for name in changed:
+            for chunk in list(self.references.get(name, ())):
+                self.check_chunk(chunk)
+                self.update_failing(chunk)
+        delta = len(lines) - (end - start)
+        if delta:
+            self.starts[1:] = [line + delta for line in self.starts[1:]]
+        return True
+
+    def source_with(self, start, end, lines):
+        old_lines = [line for chunk in self.chunks for line in chunk.lines]
+        old_lines[start:end] = lines
+        return ''.join(old_lines)
+
+    def source(self):
+        return ''.join(line for chunk in self.chunks for line in chunk.lines)
+
+    def refresh(self, index):
+        # Recale les positions d'un fragment dont les lignes ont été décalées par
+        # des modifications situées avant lui.
+        chunk = self.chunks[index]
+        shift = self.starts[index] + 1 - chunk.line
+        if not shift:
+            return chunk
+        chunk.instructions = [Instruction(instr.number, instr.operation, instr.line + shift, instr.column)
+                              for instr in chunk.instructions]
+        for diagnostic in chunk.errors:
+            diagnostic.line += shift
+        chunk.line += shift
+        return chunk
+
+    def syntax_errors(self):
+        errors = []
+        for index, chunk in enumerate(self.chunks):
+            if chunk.syntax_error is None or chunk not in self.failing:
+                continue
+            if chunk.line != self.starts[index] + 1:
+                # Le message contient le numéro de ligne: on le recalcule.
+                self.refresh(index)
+                try:
+                    parser = self.parse_tokens(chunk, chunk.line)
+                    if index == 0:
+                        parser.parse()
+                    else:
+                        list(parser.iter_instruction_list())
+                except Exception as e:
+                    chunk.syntax_error = str(e)
+            errors.append(chunk.syntax_error)
+        return errors
+
+    def diagnostics(self):
+        # Mêmes diagnostics, dans le même ordre, que SemanticAnalyzer sur tout le programme.
+        diagnostics = list(self.header_errors)
+        if not self.failing and not self.missing:
+            return diagnostics
+        jumps = []
+        for index, chunk in enumerate(self.chunks):
+            if chunk in self.failing or self.missing:
+                chunk = self.refresh(index)
+            if chunk in self.failing:
+                diagnostics.extend(chunk.errors)
+            if self.missing:
+                for instr in chunk.instructions:
+                    op = instr.operation
+                    if op is not None and op.type in JUMP_TYPES and op.operand1.value in self.missing:
+                        jumps.append(Diagnostic(f"Label d'instruction {op.operand1.value} non défini "
+                                                f"(saut de l'instruction {instr.number})",
+                                                instr.line, instr.column, instr.number))
+        diagnostics.extend(jumps)
+        diagnostics.sort(key=lambda d: (d.line, d.column))
+        return diagnostics
+
+    def errors(self):
+        # Comme le compilateur complet: les erreurs de syntaxe d'abord, les
+        # diagnostics sémantiques seulement si le programme est bien formé.
+        errors = self.syntax_errors()
+        if errors:
+            return errors
+        return [str(d) for d in self.diagnostics()]
+
+    def check(self):
+        errors = self.syntax_errors()
+        if errors:
+            raise Exception(errors[0])
+        diagnostics = self.diagnostics()
+        if diagnostics:
+            raise SemanticError(diagnostics)
+
+    def program(self):
+        self.check()
+        for index in range(len(self.chunks)):
+            self.refresh(index)
+        instructions = [instr for chunk in self.chunks for instr in chunk.instructions]
+        symbol_table = SymbolTable()
+        symbol_table.symbols = self.symbol_table.symbols
+        symbol_table.instruction_labels = {label for label, count in self.label_counts.items() if count > 0}
+        for instr in instructions:
+            op = instr.operation
+            if op is not None and op.type in JUMP_TYPES:
+                symbol_table.add_jump(instr.number, op.operand1.value)
+        return Program(self.declarations, instructions), symbol_table
+
+    def generate_c_code(self):
+        self.check()
+        code = self.compiler.prologue()
+        # Un label dupliqué désigne sa première instruction, comme dans CCompiler.goto_body.
+        emitted = LabelSet()
+        for chunk in self.chunks:
+            for number, body in chunk.code:
+                if number not in emitted:
+                    emitted.add(number)
+                    code.append(f"L{number}:")
+                code.append(body)
+        code.extend(self.compiler.epilogue())
+        return '\n'.join(code)
+
+    def save_to_file(self, filename):
+        with open(filename, 'w') as f:
+            f.write(self.generate_c_code())
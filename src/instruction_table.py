@@ -0,0 +1,124 @@
+from array import array
+from .token import TokenType
+from .ast import Instruction, Operation, Number, Variable, Register, ArrayAccess
+
+# Nature d'un opérande dans la table
+NONE = 0
+NUMBER = 1
+VARIABLE = 2
+REGISTER = 3
+ARRAY_NUMBER = 4
+ARRAY_VARIABLE = 5
+
+TOKEN_TYPES = {token_type.value: token_type for token_type in TokenType}
+
+# Forme plate de Program.instructions: une colonne array par champ. Les noms
+# (variables, registres, tableaux) sont remplacés par un identifiant de symbole;
+# les noeuds Instruction ne sont recréés qu'à l'itération, ce qui permet au
+# SemanticAnalyzer et au CCompiler d'accepter indifféremment les deux formes.
+class InstructionTable:
+    def __init__(self):
+        self.opcodes = array('B')
+        self.labels = array('q')
+        self.lines = array('I')
+        self.columns = array('I')
+        self.kinds1 = array('B')
+        self.values1 = array('q')
+        self.indexes1 = array('q')
+        self.kinds2 = array('B')
+        self.values2 = array('q')
+        self.indexes2 = array('q')
+        self.names = []
+        self.symbol_ids = {}
+
+    @classmethod
+    def from_instructions(cls, instructions):
+        table = cls()
+        for instruction in instructions:
+            table.append(instruction)
+        return table
+
+    def symbol_id(self, name):
+        symbol_id = self.symbol_ids.get(name)
+        if symbol_id is None:
+            symbol_id = self.symbol_ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+
+    def append(self, instruction):
+        op = instruction.operation
+        self.labels.append(instruction.number)
+        self.lines.append(instruction.line)
+        self.columns.append(instruction.column)
+        if op is None:
+            self.opcodes.append(0)
+            operands = (None, None)
+        else:
+            self.opcodes.append(op.type.value)
+            operands = (op.operand1, op.operand2)
+        for operand, kinds, values, indexes in zip(operands, (self.kinds1, self.kinds2),
+                                                    (self.values1, self.values2),
+                                                    (self.indexes1, self.indexes2)):
+            kind, value, index = self.encode_operand(operand)
+            kinds.append(kind)
+            values.append(value)
+            indexes.append(index)
+
+    def encode_operand(self, operand):
+        if operand is None:
+            return NONE, 0, 0
+        if isinstance(operand, Number):
+            return NUMBER, operand.value, 0
+        if isinstance(operand, Variable):
+            return VARIABLE, self.symbol_id(operand.name), 0
+        if isinstance(operand, Register):
+            return REGISTER, self.symbol_id(operand.name), 0
+        if isinstance(operand, ArrayAccess):
+            if isinstance(operand.index, Number):
+                return ARRAY_NUMBER, self.symbol_id(operand.name), operand.index.value
+            return ARRAY_VARIABLE, self.symbol_id(operand.name), self.symbol_id(operand.index.name)
+        raise Exception(f"Opérande non représentable: {type(operand).__name__}")
+
+    def decode_operand(self, kind, value, index):
+        if kind == NONE:
+            return None
+        if kind == NUMBER:
+            return Number(value)
+        if kind == VARIABLE:
+            return Variable(self.names[value])
+        if kind == REGISTER:
+            return Register(self.names[value])
+        if kind == ARRAY_NUMBER:
+            return ArrayAccess(self.names[value], Number(index))
+        return ArrayAccess(self.names[value], Variable(self.names[index]))
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def __getitem__(self, i):
+        opcode = self.opcodes[i]
+        if opcode == 0:
+            return Instruction(self.labels[i], None, self.lines[i], self.columns[i])
+        operation = Operation(TokenType(opcode),
+                              self.decode_operand(self.kinds1[i], self.values1[i], self.indexes1[i]),
+                              self.decode_operand(self.kinds2[i], self.values2[i], self.indexes2[i]))
+        return Instruction(self.labels[i], operation, self.lines[i], self.columns[i])
+
+    def __iter__(self):
+        # Comme self[i] pour chaque i, en parcourant les colonnes ensemble.
+        decode = self.decode_operand
+        token_types = TOKEN_TYPES
+        for opcode, label, line, column, kind1, value1, index1, kind2, value2, index2 in zip(
+                self.opcodes, self.labels, self.lines, self.columns, self.kinds1, self.values1, self.indexes1,
+                self.kinds2, self.values2, self.indexes2):
+            if opcode == 0:
+                yield Instruction(label, None, line, column)
+                continue
+            operation = Operation(token_types[opcode], decode(kind1, value1, index1) if kind1 else None,
+                                  decode(kind2, value2, index2) if kind2 else None)
+            yield Instruction(label, operation, line, column)
+
+    def nbytes(self):
+        columns = (self.opcodes, self.labels, self.lines, self.columns, self.kinds1, self.values1,
+                   self.indexes1, self.kinds2, self.values2, self.indexes2)
+        return sum(column.itemsize * len(column) for column in columns)
@@ -0,0 +1,201 @@
+import json
+import os
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss():
+    # Pic de mémoire résidente du processus en octets (ru_maxrss est en Ko sous Linux).
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# peak_bytes: pic de la phase (tracemalloc) ou pic du processus à la fin de la
+# phase (RSS), le même pour toutes les phases qui suivent la plus gourmande;
+# peak_growth: hausse de ce pic pendant la phase, propre à chaque phase.
+class PhaseRecord:
+    __slots__ = ('name', 'depth', 'start', 'wall', 'cpu', 'peak_bytes', 'peak_growth', 'counters')
+
+    def __init__(self, name, depth, start):
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_bytes = 0
+        self.peak_growth = 0
+        self.counters = {}
+
+# Reçoit les événements de l'instrumentation. Toutes les méthodes sont
+# optionnelles: il suffit de redéfinir celles qui intéressent.
+class Observer:
+    def phase_started(self, record):
+        pass
+
+    def phase_finished(self, record):
+        pass
+
+    def counter_updated(self, name, value, record):
+        pass
+
+# Adapte une simple fonction appelée à la fin de chaque phase.
+class HookObserver(Observer):
+    def __init__(self, hook):
+        self.hook = hook
+
+    def phase_finished(self, record):
+        self.hook(record)
+
+class Phase:
+    __slots__ = ('instrumentation', 'name', 'record', 'wall_start', 'cpu_start', 'memory_start')
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.record = None
+        self.wall_start = 0.0
+        self.cpu_start = 0.0
+        self.memory_start = 0
+
+    def __enter__(self):
+        ins = self.instrumentation
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.record = PhaseRecord(self.name, len(ins.stack), self.wall_start - ins.origin)
+        if ins.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # reset_peak efface aussi le pic de la phase parente: il lui est acquis avant.
+            if ins.stack:
+                parent = ins.stack[-1]
+                parent.peak_bytes = max(parent.peak_bytes, peak)
+            self.memory_start = current
+            tracemalloc.reset_peak()
+        else:
+            self.memory_start = peak_rss()
+        ins.stack.append(self.record)
+        for observer in ins.observers:
+            observer.phase_started(self.record)
+        return self
+
+    def __exit__(self, *exc):
+        ins = self.instrumentation
+        record = self.record
+        record.wall = time.perf_counter() - self.wall_start
+        record.cpu = time.process_time() - self.cpu_start
+        if ins.trace_memory:
+            record.peak_bytes = max(record.peak_bytes, tracemalloc.get_traced_memory()[1])
+        else:
+            record.peak_bytes = peak_rss()
+        record.peak_growth = max(record.peak_bytes - self.memory_start, 0)
+        ins.stack.pop()
+        if ins.stack:
+            # Le pic d'une sous-phase fait aussi partie de celui de la phase parente.
+            parent = ins.stack[-1]
+            parent.peak_bytes = max(parent.peak_bytes, record.peak_bytes)
+        ins.records.append(record)
+        for observer in ins.observers:
+            observer.phase_finished(record)
+        return False
+
+    def count(self, name, value=1):
+        self.instrumentation.count(name, value)
+
+# Mesures du pipeline de compilation: temps mur et CPU de chaque phase, pic de
+# mémoire, compteurs (tokens, instructions, symboles, caches). Les phases
+# peuvent s'imbriquer; un compteur est attribué à la phase la plus interne.
+class Instrumentation:
+    enabled = True
+
+    def __init__(self, observers=(), trace_memory=False):
+        self.observers = list(observers)
+        self.records = []
+        self.counters = {}
+        self.stack = []
+        self.origin = time.perf_counter()
+        # tracemalloc donne un pic par phase mais ralentit fortement les
+        # allocations; sinon on relève le pic de RSS du processus.
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+        return observer
+
+    def add_hook(self, hook):
+        return self.add_observer(HookObserver(hook))
+
+    def phase(self, name):
+        return Phase(self, name)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+        record = self.stack[-1] if self.stack else None
+        if record is not None:
+            record.counters[name] = record.counters.get(name, 0) + value
+        for observer in self.observers:
+            observer.counter_updated(name, value, record)
+
+    def total_wall(self):
+        return sum(r.wall for r in self.records if r.depth == 0)
+
+    def summary(self):
+        peak = 'pic phase' if self.trace_memory else 'pic processus'
+        lines = [f"{'phase':<20} {'temps mur':>11} {'temps CPU':>11} {peak:>13} {'hausse du pic':>13}  compteurs"]
+        for record in sorted(self.records, key=lambda r: r.start):
+            counters = ' '.join(f"{name}={value:,}" for name, value in record.counters.items())
+            lines.append(f"{'  ' * record.depth + record.name:<20} {record.wall * 1000:9.2f}ms "
+                         f"{record.cpu * 1000:9.2f}ms {record.peak_bytes / 1024 / 1024:10.1f} Mo "
+                         f"{record.peak_growth / 1024 / 1024:10.1f} Mo  {counters}")
+        lines.append(f"{'total':<20} {self.total_wall() * 1000:9.2f}ms")
+        return "\n".join(lines)
+
+    # Format « Trace Event » de Chrome (chrome://tracing, Perfetto): un
+    # événement complet par phase et un événement compteur par compteur.
+    def trace_events(self):
+        pid = os.getpid()
+        events = []
+        for record in sorted(self.records, key=lambda r: r.start):
+            events.append({'name': record.name, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': 0,
+                           'ts': record.start * 1e6, 'dur': record.wall * 1e6,
+                           'args': {'cpu_ms': record.cpu * 1000, 'peak_bytes': record.peak_bytes,
+                                    'peak_growth_bytes': record.peak_growth, **record.counters}})
+            if record.counters:
+                events.append({'name': record.name, 'cat': 'counters', 'ph': 'C', 'pid': pid, 'tid': 0,
+                               'ts': (record.start + record.wall) * 1e6, 'args': dict(record.counters)})
+        return events
+
+    def write_trace(self, filename):
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+
+class NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, name, value=1):
+        pass
+
+NULL_PHASE = NullPhase()
+
+# Instrumentation désactivée: aucune mesure, un seul objet partagé, coût d'un
+# appel de méthode par phase.
+class NullInstrumentation:
+    enabled = False
+
+    def phase(self, name):
+        return NULL_PHASE
+
+    def count(self, name, value=1):
+        pass
+
+NO_INSTRUMENTATION = NullInstrumentation()
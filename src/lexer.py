@@ -1,17 +1,74 @@
-
+import re
 from .token import Token, TokenType, KEYWORDS, REGISTERS
+from .instrumentation import NO_INSTRUMENTATION
+
+WORD_TYPES = {**{name: TokenType.REGISTER for name in REGISTERS}, **KEYWORDS}
+
+SYMBOL_TYPES = {
+    '[': TokenType.LBRACKET,
+    ']': TokenType.RBRACKET,
+    ':': TokenType.COLON,
+    ',': TokenType.COMMA,
+    ';': TokenType.SEMICOLON,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MULTIPLY,
+    '/': TokenType.DIVIDE,
+}
+
+# Plus grand nombre accepté: il doit tenir dans un entier signé de 64 bits
+# (colonnes de l'InstructionTable, cache du front end).
+MAX_NUMBER = (1 << 63) - 1
+
+# Une seule expression pour tout le texte ASCII. Les groupes sont, dans l'ordre :
+# blancs, nombre, identifiant, symbole, autre caractère. Un commentaire ne
+# capture aucun groupe. Un nombre suivi d'un caractère non ASCII est laissé au
+# chemin lent pour reproduire exactement isdigit()/isalpha() de l'ancien moteur,
+# comme un nombre de plus de 18 chiffres, qui peut dépasser MAX_NUMBER.
+TOKEN_RE = re.compile(r'(\s+)|#[^\n]*|([0-9]{1,18})(?![0-9]|[^\x00-\x7f])|([A-Za-z]\w*)|([][:,;+*/-])|(.)', re.S)
+WORD_RE = re.compile(r'\w*')
+
+# Même expression sur des octets UTF-8 (bytes, mmap). \w et \s n'y reconnaissent
+# que l'ASCII: un identifiant suivi d'un octet non ASCII n'est pas découpé mais
+# renvoyé au chemin lent, qui décode la fin de la ligne.
+BYTES_TOKEN_RE = re.compile(rb'(\s+)|#[^\n]*|([0-9]{1,18})(?![0-9]|[^\x00-\x7f])|([A-Za-z]\w*+)(?![^\x00-\x7f])'
+                            rb'|([][:,;+*/-])|(.)', re.S)
+BYTES_SYMBOLS = {symbol.encode(): (token_type, symbol) for symbol, token_type in SYMBOL_TYPES.items()}
+
+# Intervalle (en octets lus) entre deux appels à release.
+RELEASE_STEP = 4 * 1024 * 1024
 
 class Lexer:
-    def __init__(self, text):
+    ENGINES = ('regex', 'legacy')
+
+    def __init__(self, text, engine='regex', line=1, instrumentation=None, column=1, release=None):
+        # line, column: position du début de text, pour lexer un extrait d'un fichier.
+        # text peut aussi être un tampon d'octets UTF-8 (bytes, mmap), lu sans copie;
+        # release(position) est alors appelé au fil de la lecture pour rendre les
+        # pages déjà lues.
+        if engine not in self.ENGINES:
+            raise Exception(f"Moteur de lexer inconnu: {engine}")
+        self.binary = not isinstance(text, str)
+        if self.binary and engine != 'regex':
+            raise Exception(f"Le moteur de lexer {engine} ne lit que du texte")
+        self.engine = engine
         self.text = text
         self.pos = 0
-        self.current_char = self.text[0] if text else None
-        self.line = 1
-        self.column = 1
+        self.current_char = self.text[0] if text and not self.binary else None
+        self.line = line
+        self.column = column
+        self.release = release
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
 
     def error(self):
         raise Exception(f'Caractère invalide à la ligne {self.line}, colonne {self.column}: {self.current_char}')
 
+    def number(self, text, line, column):
+        value = int(text)
+        if value > MAX_NUMBER:
+            raise Exception(f'Nombre trop grand à la ligne {line}, colonne {column}: {text}')
+        return value
+
     def advance(self):
         if self.current_char == '\n':
             self.line += 1
@@ -29,11 +86,12 @@ class Lexer:
             self.advance()
 
     def get_number(self):
+        line, column = self.line, self.column
         result = ''
         while self.current_char and self.current_char.isdigit():
             result += self.current_char
             self.advance()
-        return int(result)
+        return self.number(result, line, column)
 
     def get_identifier(self):
         result = ''
@@ -43,8 +101,152 @@ class Lexer:
         return result
 
     def tokenize(self):
-        tokens = []
+        with self.instrumentation.phase('lexer') as phase:
+            tokens = list(self.iter_tokens())
+            phase.count('tokens', len(tokens))
+        return tokens
+
+    def iter_tokens(self):
+        if self.engine == 'legacy':
+            return self.iter_tokens_legacy()
+        if self.binary:
+            return self.iter_tokens_bytes()
+        return self.iter_tokens_regex()
+
+    def iter_tokens_regex(self):
+        text = self.text
+        length = len(text)
+        finditer = TOKEN_RE.finditer
+        word_types = WORD_TYPES.get
+        number_type = TokenType.NUMBER
+        identifier_type = TokenType.IDENTIFIER
+        line = self.line
+        line_start = 1 - self.column
+        pos = 0
+
+        while pos < length:
+            for match in finditer(text, pos):
+                group = match.lastindex
+                if group is None:
+                    continue
+
+                if group == 1:
+                    start, end = match.span()
+                    newlines = text.count('\n', start, end)
+                    if newlines:
+                        line += newlines
+                        line_start = text.rindex('\n', start, end) + 1
+                elif group == 2:
+                    yield Token(number_type, int(match.group(2)), line, match.end() - line_start + 1)
+                elif group == 3:
+                    identifier = match.group(3)
+                    yield Token(word_types(identifier, identifier_type), identifier,
+                                line, match.end() - line_start + 1)
+                elif group == 4:
+                    char = match.group(4)
+                    yield Token(SYMBOL_TYPES[char], char, line, match.start() - line_start + 1)
+                else:
+                    pos = match.start()
+                    break
+            else:
+                break
+
+            # Chemin lent: caractère hors de l'ASCII ou invalide.
+            char = text[pos]
+            if char.isdigit():
+                end = pos + 1
+                while end < length and text[end].isdigit():
+                    end += 1
+                yield Token(TokenType.NUMBER, self.number(text[pos:end], line, pos - line_start + 1),
+                            line, end - line_start + 1)
+            elif char.isalpha():
+                end = WORD_RE.match(text, pos + 1).end()
+                identifier = text[pos:end]
+                yield Token(WORD_TYPES.get(identifier, TokenType.IDENTIFIER), identifier,
+                            line, end - line_start + 1)
+            else:
+                self.pos = pos
+                self.current_char = char
+                self.line = line
+                self.column = pos - line_start + 1
+                self.error()
+            pos = end
+
+        yield Token(TokenType.EOF, None, line, length - line_start + 1)
+
+    def iter_tokens_bytes(self):
+        # Les lignes ASCII sont découpées directement dans le tampon; à partir
+        # du premier octet non ASCII (ou invalide) d'une ligne, la fin de la
+        # ligne est décodée et confiée à iter_tokens_regex, pour des tokens et
+        # des colonnes (en caractères) identiques à ceux du texte décodé.
+        text = self.text
+        length = len(text)
+        finditer = BYTES_TOKEN_RE.finditer
+        symbols = BYTES_SYMBOLS
+        words = {}
+        number_type = TokenType.NUMBER
+        eof_type = TokenType.EOF
+        release = self.release
+        released = 0
+        line = self.line
+        line_start = 1 - self.column
+        pos = 0
+
+        while pos < length:
+            for match in finditer(text, pos):
+                group = match.lastindex
+                if group is None:
+                    continue
+
+                if group == 1:
+                    spaces = match.group(1)
+                    newlines = spaces.count(b'\n')
+                    if newlines:
+                        line += newlines
+                        line_start = match.start() + spaces.rindex(b'\n') + 1
+                        if release is not None and line_start - released >= RELEASE_STEP:
+                            release(line_start)
+                            released = line_start
+                elif group == 2:
+                    yield Token(number_type, int(match.group(2)), line, match.end() - line_start + 1)
+                elif group == 3:
+                    word = match.group(3)
+                    kind = words.get(word)
+                    if kind is None:
+                        identifier = word.decode('ascii')
+                        kind = words[word] = (WORD_TYPES.get(identifier, TokenType.IDENTIFIER), identifier)
+                    yield Token(kind[0], kind[1], line, match.end() - line_start + 1)
+                elif group == 4:
+                    token_type, symbol = symbols[match.group(4)]
+                    yield Token(token_type, symbol, line, match.start() - line_start + 1)
+                else:
+                    pos = match.start()
+                    break
+            else:
+                break
+
+            end = text.find(b'\n', pos)
+            if end < 0:
+                end = length
+            rest = self.decode(text[pos:end], line, pos - line_start + 1)
+            for token in Lexer(rest, line=line, column=pos - line_start + 1).iter_tokens_regex():
+                if token.type is not eof_type:
+                    yield token
+            pos = end
+
+        last_line = self.decode(text[max(line_start, 0):length], line, 1)
+        yield Token(eof_type, None, line, len(last_line) + (1 if line_start >= 0 else self.column))
+
+    def decode(self, data, line, column):
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError as e:
+            self.line = line
+            self.column = column + len(data[:e.start].decode('utf-8'))
+            raise Exception(f'Caractère invalide à la ligne {self.line}, colonne {self.column}: '
+                            f'octet {data[e.start]:#04x} hors UTF-8')
 
+    def iter_tokens_legacy(self):
         while self.current_char is not None:
             if self.current_char.isspace():
                 self.skip_whitespace()
@@ -56,7 +258,7 @@ class Lexer:
                 continue
 
             if self.current_char.isdigit():
-                tokens.append(Token(TokenType.NUMBER, str(self.get_number()), self.line, self.column))
+                yield Token(TokenType.NUMBER, self.get_number(), self.line, self.column)
                 continue
 
             if self.current_char.isalpha():
@@ -67,55 +269,54 @@ class Lexer:
                     token_type = TokenType.REGISTER
                 else:
                     token_type = TokenType.IDENTIFIER
-                tokens.append(Token(token_type, identifier, self.line, self.column))
+                yield Token(token_type, identifier, self.line, self.column)
                 continue
 
             if self.current_char == '[':
-                tokens.append(Token(TokenType.LBRACKET, '[', self.line, self.column))
+                yield Token(TokenType.LBRACKET, '[', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == ']':
-                tokens.append(Token(TokenType.RBRACKET, ']', self.line, self.column))
+                yield Token(TokenType.RBRACKET, ']', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == ':':
-                tokens.append(Token(TokenType.COLON, ':', self.line, self.column))
+                yield Token(TokenType.COLON, ':', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == ',':
-                tokens.append(Token(TokenType.COMMA, ',', self.line, self.column))
+                yield Token(TokenType.COMMA, ',', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == ';':
-                tokens.append(Token(TokenType.SEMICOLON, ';', self.line, self.column))
+                yield Token(TokenType.SEMICOLON, ';', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == '+':
-                tokens.append(Token(TokenType.PLUS, '+', self.line, self.column))
+                yield Token(TokenType.PLUS, '+', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == '-':
-                tokens.append(Token(TokenType.MINUS, '-', self.line, self.column))
+                yield Token(TokenType.MINUS, '-', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == '*':
-                tokens.append(Token(TokenType.MULTIPLY, '*', self.line, self.column))
+                yield Token(TokenType.MULTIPLY, '*', self.line, self.column)
                 self.advance()
                 continue
 
             if self.current_char == '/':
-                tokens.append(Token(TokenType.DIVIDE, '/', self.line, self.column))
+                yield Token(TokenType.DIVIDE, '/', self.line, self.column)
                 self.advance()
                 continue
 
             self.error()
 
-        tokens.append(Token(TokenType.EOF, None, self.line, self.column))
-        return tokens 
\ No newline at end of file
+        yield Token(TokenType.EOF, None, self.line, self.column) 
\ No newline at end of file
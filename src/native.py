@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from .cache import DiskCache, DEFAULT_CACHE_DIR, content_key
+
+OPT_LEVELS = ('0', '1', '2', '3', 's')
+
+class BuildResult:
+    def __init__(self, executable, cache_hit, compile_seconds, saved_seconds, temporary=False):
+        self.executable = executable
+        self.cache_hit = cache_hit
+        self.compile_seconds = compile_seconds
+        self.saved_seconds = saved_seconds
+        self.temporary = temporary
+
+# Compile le C généré par CCompiler avec le compilateur du système et garde
+# l'exécutable dans un cache disque indexé par le hash du source C, du
+# compilateur et de ses options: un programme inchangé ne repasse pas par cc.
+class NativeBuilder:
+    suffix = '.c'
+    failure = "Erreur de compilation C"
+
+    def __init__(self, cc='cc', opt_level='2', cache_dir=None, max_cache_bytes=256 * 1024 * 1024,
+                 use_cache=True):
+        if opt_level not in OPT_LEVELS:
+            raise Exception(f"Niveau d'optimisation C invalide: -O{opt_level}")
+        compiler = shutil.which(cc)
+        if compiler is None:
+            raise Exception(f"Compilateur C introuvable: {cc}")
+        self.cc = compiler
+        self.flags = [f'-O{opt_level}']
+        self.cache = DiskCache(os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'bin'), max_cache_bytes) \
+            if use_cache else None
+
+    def key(self, c_source):
+        stat = os.stat(self.cc)
+        return content_key(c_source, self.cc, str(stat.st_mtime_ns), *self.flags)
+
+    def commands(self, source_path, exe_path):
+        return [[self.cc, *self.flags, source_path, '-o', exe_path]]
+
+    def build(self, c_source):
+        key = self.key(c_source)
+        if self.cache:
+            executable = self.cache.get(key)
+            if executable:
+                return BuildResult(executable, True, 0.0, self.recorded_compile_time(key))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            c_path = os.path.join(tmp, 'program' + self.suffix)
+            exe_path = os.path.join(tmp, 'program')
+            with open(c_path, 'w') as f:
+                f.write(c_source)
+            start = time.perf_counter()
+            for command in self.commands(c_path, exe_path):
+                result = subprocess.run(command, capture_output=True, text=True)
+                if result.returncode != 0:
+                    raise Exception(f"{self.failure}:\n{result.stderr}")
+            elapsed = time.perf_counter() - start
+            # Un exécutable plus gros que tout le cache n'y est pas gardé.
+            if not self.cache or os.path.getsize(exe_path) > self.cache.max_bytes:
+                executable = os.path.join(tempfile.mkdtemp(prefix='projet-'), 'program')
+                shutil.move(exe_path, executable)
+                return BuildResult(executable, False, elapsed, 0.0, temporary=True)
+            with open(exe_path, 'rb') as f:
+                binary = f.read()
+
+        self.cache.put(key, json.dumps({'compile_seconds': elapsed}).encode(), suffix='.json')
+        executable = self.cache.put(key, binary, mode=0o755)
+        return BuildResult(executable, False, elapsed, 0.0)
+
+    def recorded_compile_time(self, key):
+        path = self.cache.get(key, suffix='.json')
+        if not path:
+            return 0.0
+        try:
+            with open(path) as f:
+                return json.load(f)['compile_seconds']
+        except (OSError, ValueError, KeyError):
+            return 0.0
+
+    def run(self, build, **kwargs):
+        try:
+            return subprocess.run([build.executable], **kwargs)
+        finally:
+            if build.temporary:
+                shutil.rmtree(os.path.dirname(build.executable), ignore_errors=True)
+
+# Assemble le texte produit par AsmCompiler avec as puis fait l'édition de
+# liens avec cc (crt et libc pour printf/scanf), sans compilation C. Même cache
+# que NativeBuilder.
+class AsmBuilder(NativeBuilder):
+    suffix = '.s'
+    failure = "Erreur d'assemblage"
+
+    def __init__(self, assembler='as', cc='cc', cache_dir=None, max_cache_bytes=256 * 1024 * 1024, use_cache=True):
+        super().__init__(cc, '0', cache_dir, max_cache_bytes, use_cache)
+        path = shutil.which(assembler)
+        if path is None:
+            raise Exception(f"Assembleur introuvable: {assembler}")
+        self.assembler = path
+        self.flags = []
+
+    def key(self, source):
+        return content_key(source, 'asm', self.assembler, str(os.stat(self.assembler).st_mtime_ns),
+                           self.cc, str(os.stat(self.cc).st_mtime_ns))
+
+    def commands(self, source_path, exe_path):
+        object_path = source_path[:-len(self.suffix)] + '.o'
+        return [[self.assembler, source_path, '-o', object_path], [self.cc, object_path, '-o', exe_path]]
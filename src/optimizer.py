@@ -0,0 +1,325 @@
+import copy
+from .token import TokenType
+from .ast import Program, Instruction, Operation, Number, Variable, ArrayAccess
+from .cfg import (ControlFlowGraph, Liveness, ConstantPropagation, NOT_A_CONSTANT, JUMPS,
+                  ARITHMETIC, BINARY, READS, FLAGS, OF, wrap16, evaluate, scalar_name, scalar_bits)
+
+def same_location(a, b):
+    if scalar_name(a) is not None:
+        return scalar_name(a) == scalar_name(b)
+    if isinstance(a, ArrayAccess) and isinstance(b, ArrayAccess) and a.name == b.name:
+        if isinstance(a.index, Number) and isinstance(b.index, Number):
+            return a.index.value == b.index.value
+        if isinstance(a.index, Variable) and isinstance(b.index, Variable):
+            return a.index.name == b.index.name
+    return False
+
+def can_fault(operand):
+    # Un accès indexé par une variable peut sortir des bornes à l'exécution.
+    return isinstance(operand, ArrayAccess) and not isinstance(operand.index, Number)
+
+class OptimizationUnit:
+    def __init__(self, instructions, symbol_table):
+        self.instructions = instructions
+        self.symbol_table = symbol_table
+        self.changes = []
+        self.bits = scalar_bits(symbol_table)
+        # Le graphe et la vivacité restent valides tant qu'aucune passe ne modifie le code.
+        self._cfg = None
+        self._live_out = None
+
+    def cfg(self):
+        if self._cfg is None:
+            self._cfg = ControlFlowGraph(self.instructions)
+        return self._cfg
+
+    def liveness(self, cfg):
+        if self._live_out is None or cfg is not self._cfg:
+            self._live_out = Liveness(cfg, self.symbol_table).live_out(cfg)
+        return self._live_out
+
+    def invalidate(self):
+        self._cfg = None
+        self._live_out = None
+
+    def replace(self, index, operation):
+        instr = self.instructions[index]
+        self.instructions[index] = Instruction(instr.number, operation, instr.line, instr.column)
+        self.invalidate()
+
+    def remove(self, dead):
+        referenced = set()
+        for index, instr in enumerate(self.instructions):
+            if index not in dead and instr.operation and instr.operation.type in JUMPS:
+                referenced.add(instr.operation.operand1.value)
+
+        # Un label supprimé désigne désormais l'instruction suivante conservée.
+        remap = {}
+        next_label = None
+        kept = []
+        for index in range(len(self.instructions) - 1, -1, -1):
+            instr = self.instructions[index]
+            if index in dead and not (next_label is None and instr.number in referenced):
+                remap[instr.number] = next_label
+                continue
+            kept.append(instr)
+            next_label = instr.number
+        kept.reverse()
+
+        for index, instr in enumerate(kept):
+            op = instr.operation
+            if op and op.type in JUMPS and op.operand1.value in remap:
+                kept[index] = Instruction(instr.number, Operation(op.type, Number(remap[op.operand1.value])),
+                                          instr.line, instr.column)
+        removed = len(self.instructions) - len(kept)
+        if removed:
+            self.instructions = kept
+            self.invalidate()
+        return removed
+
+class Pass:
+    name = ''
+
+    def run(self, unit):
+        raise NotImplementedError
+
+class UnreachableCodeElimination(Pass):
+    name = 'unreachable-code'
+
+    def run(self, unit):
+        cfg = unit.cfg()
+        reachable = cfg.reachable()
+        dead = {i for block in cfg.blocks if block.index not in reachable
+                for i in range(block.start, block.end)}
+        for index in sorted(dead):
+            unit.changes.append(f"{self.name}: instruction {unit.instructions[index].number} inaccessible supprimée")
+        return unit.remove(dead)
+
+class JumpThreading(Pass):
+    name = 'jump-threading'
+
+    def run(self, unit):
+        labels = unit.cfg().labels
+        changes = 0
+        for index, instr in enumerate(unit.instructions):
+            op = instr.operation
+            if op is None or op.type not in JUMPS:
+                continue
+            target = op.operand1.value
+            seen = {target}
+            while True:
+                next_op = unit.instructions[labels[target]].operation
+                # Un saut ne modifie pas les flags: jz vers jz suit le même chemin.
+                if next_op is None or next_op.type not in (TokenType.JMP, op.type):
+                    break
+                following = next_op.operand1.value
+                if following in seen:
+                    break
+                seen.add(following)
+                target = following
+            if target != op.operand1.value:
+                unit.changes.append(f"{self.name}: instruction {instr.number}, cible {op.operand1.value} -> {target}")
+                unit.replace(index, Operation(op.type, Number(target)))
+                changes += 1
+        return changes
+
+class RedundantJumpElimination(Pass):
+    name = 'redundant-jumps'
+
+    def run(self, unit):
+        labels = unit.cfg().labels
+        dead = set()
+        for index, instr in enumerate(unit.instructions):
+            op = instr.operation
+            if op and op.type in JUMPS and labels[op.operand1.value] == index + 1:
+                unit.changes.append(f"{self.name}: saut {instr.number} vers l'instruction suivante supprimé")
+                dead.add(index)
+        return unit.remove(dead)
+
+class ConstantFolding(Pass):
+    name = 'constant-folding'
+
+    def run(self, unit):
+        cfg = unit.cfg()
+        live_out = unit.liveness(cfg)
+        block_entry, _ = ConstantPropagation(cfg, unit.symbol_table).solve(cfg)
+        sizes = {name: symbol.size for name, symbol in unit.symbol_table.symbols.items()
+                 if symbol.type == 'array'}
+        constants = {}
+        changes = 0
+
+        def propagate(operand):
+            name = scalar_name(operand)
+            if name in constants:
+                return Number(constants[name])
+            if isinstance(operand, ArrayAccess) and isinstance(operand.index, Variable):
+                value = constants.get(operand.index.name)
+                if value is not None and 0 <= value < sizes.get(operand.name, 0):
+                    return ArrayAccess(operand.name, Number(value))
+            return operand
+
+        for index, instr in enumerate(unit.instructions):
+            block = cfg.blocks[cfg.block_of[index]]
+            if index == block.start:
+                # Constantes connues à l'entrée du bloc d'après l'analyse globale.
+                constants = {name: value for name, value in block_entry[block.index].items()
+                             if value is not NOT_A_CONSTANT}
+            op = instr.operation
+            if op is None or op.type in JUMPS or op.type in (TokenType.HALT, TokenType.IS_FULL):
+                continue
+            if op.type == TokenType.CALL:
+                constants = {}
+                continue
+
+            if op.type in READS:
+                operand = propagate(op.operand1)
+                if operand is not op.operand1:
+                    unit.replace(index, Operation(op.type, operand))
+                    changes += 1
+                continue
+
+            dest = op.operand1
+            if isinstance(dest, ArrayAccess):
+                dest = propagate(dest)
+            source = propagate(op.operand2) if op.type in BINARY else None
+            name = scalar_name(dest)
+            new_op = Operation(op.type, dest, source)
+            value = None
+
+            if op.type == TokenType.MOV:
+                if isinstance(source, Number):
+                    value = wrap16(source.value)
+                    if source.value != value:
+                        new_op = Operation(op.type, dest, Number(value))
+            elif op.type in ARITHMETIC and name in constants and (source is None or isinstance(source, Number)):
+                value = evaluate(op.type, constants[name], wrap16(source.value) if source else 0)
+                if value is not None and not live_out[index] & FLAGS:
+                    new_op = Operation(TokenType.MOV, dest, Number(value))
+                    unit.changes.append(f"{self.name}: instruction {instr.number} remplacée par mov {name},{value}")
+
+            if name is not None:
+                if new_op.type == TokenType.MOV and isinstance(new_op.operand2, Number):
+                    constants[name] = new_op.operand2.value
+                elif value is not None and op.type in ARITHMETIC:
+                    constants[name] = value
+                else:
+                    constants.pop(name, None)
+
+            if (new_op.type != op.type or new_op.operand1 is not op.operand1
+                    or new_op.operand2 is not op.operand2):
+                unit.replace(index, new_op)
+                changes += 1
+        return changes
+
+class DeadStoreElimination(Pass):
+    name = 'dead-stores'
+
+    def run(self, unit):
+        live_out = unit.liveness(unit.cfg())
+        dead = set()
+        for index, instr in enumerate(unit.instructions):
+            op = instr.operation
+            if op is None or op.type not in BINARY and op.type != TokenType.NOT:
+                continue
+            name = scalar_name(op.operand1)
+            if name is None or live_out[index] & unit.bits[name]:
+                continue
+            if op.type == TokenType.MOV:
+                removable = not can_fault(op.operand2)
+            elif op.type == TokenType.DIV:
+                removable = (not live_out[index] & FLAGS and isinstance(op.operand2, Number)
+                             and wrap16(op.operand2.value) != 0)
+            else:
+                removable = not live_out[index] & FLAGS and not can_fault(op.operand2)
+            if removable:
+                unit.changes.append(f"{self.name}: écriture morte de {name} à l'instruction {instr.number} supprimée")
+                dead.add(index)
+        return unit.remove(dead)
+
+class PeepholeArithmetic(Pass):
+    name = 'peephole'
+
+    def run(self, unit):
+        cfg = unit.cfg()
+        leaders = {block.start for block in cfg.blocks}
+        live_out = unit.liveness(cfg)
+        dead = set()
+        index = 0
+        instructions = unit.instructions
+        while index < len(instructions):
+            op = instructions[index].operation
+            if op is None:
+                index += 1
+                continue
+            # mov x,x n'a aucun effet
+            if op.type == TokenType.MOV and scalar_name(op.operand1) is not None \
+                    and same_location(op.operand1, op.operand2):
+                unit.changes.append(f"{self.name}: mov inutile {instructions[index].number} supprimé")
+                dead.add(index)
+                index += 1
+                continue
+            following = index + 1
+            if (following < len(instructions) and following not in leaders
+                    and op.type in (TokenType.ADD, TokenType.SUB) and isinstance(op.operand2, Number)):
+                next_op = instructions[following].operation
+                if (next_op is not None and next_op.type in (TokenType.ADD, TokenType.SUB)
+                        and isinstance(next_op.operand2, Number)
+                        and same_location(op.operand1, next_op.operand1)
+                        and not live_out[following] & OF):
+                    first = op.operand2.value if op.type == TokenType.ADD else -op.operand2.value
+                    second = next_op.operand2.value if next_op.type == TokenType.ADD else -next_op.operand2.value
+                    merged = wrap16(first + second)
+                    unit.replace(index, Operation(TokenType.ADD, op.operand1, Number(merged)))
+                    unit.changes.append(f"{self.name}: instructions {instructions[index].number} et "
+                                        f"{instructions[following].number} fusionnées en add {merged}")
+                    dead.add(following)
+                    index += 2
+                    continue
+            index += 1
+        return unit.remove(dead)
+
+LEVELS = {
+    0: [],
+    1: [UnreachableCodeElimination, JumpThreading, RedundantJumpElimination],
+    2: [UnreachableCodeElimination, JumpThreading, RedundantJumpElimination,
+        ConstantFolding, PeepholeArithmetic, DeadStoreElimination],
+}
+
+# Enchaîne les passes du niveau choisi jusqu'à ce qu'aucune ne modifie plus le
+# programme. Le Program d'origine n'est pas modifié.
+class PassManager:
+    def __init__(self, level=1, max_rounds=10):
+        if level not in LEVELS:
+            raise Exception(f"Niveau d'optimisation invalide: -O{level}")
+        self.level = level
+        self.passes = [cls() for cls in LEVELS[level]]
+        self.max_rounds = max_rounds
+        self.report = {p.name: 0 for p in self.passes}
+        self.changes = []
+
+    def run(self, program, symbol_table):
+        if not self.passes:
+            return program, symbol_table
+        unit = OptimizationUnit(list(program.instructions), symbol_table)
+        if len(unit.cfg().labels) != len(unit.instructions):
+            # Labels dupliqués: les cibles de saut sont ambiguës, on ne touche à rien.
+            return program, symbol_table
+
+        for _ in range(self.max_rounds):
+            round_changes = 0
+            for optimization in self.passes:
+                changes = optimization.run(unit)
+                self.report[optimization.name] += changes
+                round_changes += changes
+            if not round_changes:
+                break
+        self.changes = unit.changes
+
+        symbol_table = copy.copy(symbol_table)
+        symbol_table.instruction_labels = {instr.number for instr in unit.instructions}
+        return Program(program.declarations, unit.instructions), symbol_table
+
+def optimize(program, symbol_table, level=1):
+    manager = PassManager(level)
+    program, symbol_table = manager.run(program, symbol_table)
+    return program, symbol_table, manager
@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .token import TokenType
+from .lexer import Lexer
+from .parser import Parser
+from .ast import Program
+from .instruction_table import InstructionTable
+from .instrumentation import NO_INSTRUMENTATION
+
+# En dessous de cette taille (en caractères), un fragment ne vaut pas l'envoi à
+# un processus: un source plus petit est analysé sans pool.
+MIN_CHUNK_CHARS = 1024 * 1024
+# Plusieurs fragments par processus: le processus principal remet bout à bout
+# les premiers pendant que les suivants sont encore analysés.
+CHUNKS_PER_WORKER = 4
+
+def closes_instruction(source, newline):
+    # La ligne qui se termine en newline finit-elle par ';' (commentaire ôté)?
+    # Un '#' commence toujours un commentaire: le langage n'a pas de chaînes.
+    start = source.rfind('\n', 0, newline) + 1
+    return source[start:newline].split('#', 1)[0].rstrip().endswith(';')
+
+def find_instructions(source):
+    # Déclarations, et position du texte qui suit le mot-clé Instructions:
+    # (déclarations, index, ligne, colonne).
+    parser = Parser(Lexer(source).iter_tokens())
+    declarations = parser.parse_declarations()
+    keyword = parser.match(TokenType.INSTRUCTIONS)
+    # La colonne d'un mot est celle du caractère qui le suit.
+    line_start = 0
+    for _ in range(keyword.line - 1):
+        line_start = source.index('\n', line_start) + 1
+    return declarations, line_start + keyword.column - 1, keyword.line, keyword.column
+
+def split_instructions(source, start, chunks, min_chars=MIN_CHUNK_CHARS):
+    # Débuts des fragments de source[start:], au plus chunks. Chaque coupure suit
+    # un '\n' qui termine une ligne finissant par ';': le parser y est entre deux
+    # instructions et le lexer entre deux tokens.
+    length = len(source)
+    step = max((length - start) // chunks, min_chars)
+    points = [start]
+    target = start + step
+    while target < length and len(points) < chunks:
+        newline = source.find('\n', target)
+        while newline >= 0 and not closes_instruction(source, newline):
+            newline = source.find('\n', newline + 1)
+        if newline < 0 or newline + 1 >= length:
+            break
+        points.append(newline + 1)
+        target = newline + 1 + step
+    return points
+
+def parse_chunk(text, line, column):
+    # Exécuté dans un processus du pool. La table d'instructions se transmet
+    # bien plus vite qu'une liste de noeuds Instruction.
+    parser = Parser(Lexer(text, line=line, column=column).iter_tokens())
+    return InstructionTable.from_instructions(parser.iter_instruction_list())
+
+# Analyse syntaxique parallèle: la section Var est analysée d'abord, puis la
+# section Instructions est coupée en fragments de lignes complètes analysés
+# dans un pool de processus (lignes et colonnes du fichier entier), et les
+# instructions sont remises bout à bout dans l'ordre. Si un fragment échoue,
+# tout le source est réanalysé séquentiellement: l'erreur levée est celle du
+# parser séquentiel.
+def parse_parallel(source, workers=None, instrumentation=None, min_chars=MIN_CHUNK_CHARS):
+    instrumentation = instrumentation or NO_INSTRUMENTATION
+    workers = workers or os.cpu_count() or 1
+    with instrumentation.phase('parser') as phase:
+        try:
+            declarations, start, line, column = find_instructions(source)
+            points = split_instructions(source, start, workers * CHUNKS_PER_WORKER, min_chars)
+            instructions = []
+            if len(points) == 1:
+                instructions.extend(parse_chunk(source[start:], line, column))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(points))) as pool:
+                    futures = []
+                    for begin, end in zip(points, points[1:] + [len(source)]):
+                        futures.append(pool.submit(parse_chunk, source[begin:end], line, column))
+                        line += source.count('\n', begin, end)
+                        column = 1
+                    for future in futures:
+                        instructions.extend(future.result())
+        except Exception:
+            program = Parser(Lexer(source).iter_tokens()).parse()
+            declarations, instructions, points = program.declarations, program.instructions, [0]
+        phase.count('declarations', len(declarations))
+        phase.count('instructions', len(instructions))
+        phase.count('chunks', len(points))
+    return Program(declarations, instructions)
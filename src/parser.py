@@ -1,19 +1,24 @@
 from .token import TokenType, Token
+from .instruction_table import InstructionTable
+from .instrumentation import NO_INSTRUMENTATION
 from .ast import (Program, VarDeclaration, ArrayDeclaration, Instruction, 
                  Operation, Operand, Number, Variable, Register, ArrayAccess)
 
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, instrumentation=None):
+        # tokens peut être une liste ou n'importe quel itérateur (Lexer.iter_tokens()):
+        # le parser ne garde qu'un seul token d'avance.
+        self.tokens = iter(tokens)
         self.pos = 0
-        self.current_token = tokens[0] if tokens else None
+        self.current_token = next(self.tokens, None)
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
 
     def error(self, message):
         raise Exception(f'Erreur de syntaxe à la ligne {self.current_token.line}: {message}')
 
     def advance(self):
         self.pos += 1
-        self.current_token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        self.current_token = next(self.tokens, None)
 
     def match(self, token_type):
         if self.current_token.type == token_type:
@@ -22,9 +27,16 @@ class Parser:
             return token
         self.error(f'Attendu {token_type.name}, trouvé {self.current_token.type.name}')
 
-    def parse(self):
-        declarations = self.parse_declarations()
-        instructions = self.parse_instructions()
+    def parse(self, compact=False):
+        # Avec un itérateur de tokens, le temps du lexer est compté dans cette phase.
+        with self.instrumentation.phase('parser') as phase:
+            declarations = self.parse_declarations()
+            if compact:
+                instructions = InstructionTable.from_instructions(self.iter_instructions())
+            else:
+                instructions = self.parse_instructions()
+            phase.count('declarations', len(declarations))
+            phase.count('instructions', len(instructions))
         return Program(declarations, instructions)
 
     def parse_declarations(self):
@@ -43,41 +55,46 @@ class Parser:
         return declarations
 
     def parse_declaration(self):
-        name = self.match(TokenType.IDENTIFIER).value
+        token = self.match(TokenType.IDENTIFIER)
+        name = token.value
         self.match(TokenType.COLON)
         
         if self.current_token.type == TokenType.BYTE:
             self.advance()
-            return VarDeclaration(name, "byte")
+            return VarDeclaration(name, "byte", token.line, token.column)
         elif self.current_token.type == TokenType.ARRAY:
             self.advance()
             self.match(TokenType.LBRACKET)
-            size = int(self.match(TokenType.NUMBER).value)
+            size = self.match(TokenType.NUMBER).value
             self.match(TokenType.RBRACKET)
-            return ArrayDeclaration(name, size)
+            return ArrayDeclaration(name, size, token.line, token.column)
         else:
             self.error("Type de variable attendu (byte ou Array)")
 
     def parse_instructions(self):
-        instructions = []
+        return list(self.iter_instructions())
+
+    def iter_instructions(self):
         self.match(TokenType.INSTRUCTIONS)
-        
+        yield from self.iter_instruction_list()
+
+    def iter_instruction_list(self):
+        # Instructions jusqu'à EOF, sans le mot-clé Instructions: sert aussi à
+        # analyser un extrait de la section des instructions.
         while self.current_token and self.current_token.type != TokenType.EOF:
             if self.current_token.type == TokenType.NUMBER:
                 instr = self.parse_instruction()
                 if instr:
-                    instructions.append(instr)
+                    yield instr
             else:
                 self.advance()
-                
-        return instructions
 
     def parse_instruction(self):
-        line_num = int(self.match(TokenType.NUMBER).value)
+        token = self.match(TokenType.NUMBER)
         self.match(TokenType.COLON)
         operation = self.parse_operation()
         self.match(TokenType.SEMICOLON)
-        return Instruction(line_num, operation)
+        return Instruction(token.value, operation, token.line, token.column)
 
     def parse_operation(self):
         if self.current_token.type == TokenType.HASH:
@@ -96,7 +113,7 @@ class Parser:
             return Operation(op_type, operand)
             
         if op_type in [TokenType.JMP, TokenType.JZ, TokenType.JS, TokenType.JO]:
-            target = int(self.match(TokenType.NUMBER).value)
+            target = self.match(TokenType.NUMBER).value
             return Operation(op_type, Number(target))
             
         operand1 = self.parse_operand()
@@ -106,7 +123,7 @@ class Parser:
 
     def parse_operand(self):
         if self.current_token.type == TokenType.NUMBER:
-            value = int(self.match(TokenType.NUMBER).value)
+            value = self.match(TokenType.NUMBER).value
             return Number(value)
             
         elif self.current_token.type == TokenType.REGISTER:
@@ -126,7 +143,7 @@ class Parser:
 
     def parse_array_index(self):
         if self.current_token.type == TokenType.NUMBER:
-            return Number(int(self.match(TokenType.NUMBER).value))
+            return Number(self.match(TokenType.NUMBER).value)
         elif self.current_token.type == TokenType.IDENTIFIER:
             return Variable(self.match(TokenType.IDENTIFIER).value)
         self.error("Index de tableau invalide") 
\ No newline at end of file
@@ -0,0 +1,113 @@
+import hashlib
+from .token import TokenType, KEYWORDS
+from .compiler_to_python import operand_text
+
+MAGIC = 'projet-profile'
+FORMAT_VERSION = 1
+# Un saut exécuté moins de MIN_SAMPLES fois garde le comportement par défaut;
+# au-delà, pris moins de COLD_RATIO des fois il est UNLIKELY, plus de
+# 1 - COLD_RATIO des fois LIKELY.
+MIN_SAMPLES = 100
+COLD_RATIO = 0.1
+CONDITIONAL_JUMPS = (TokenType.JZ, TokenType.JS, TokenType.JO)
+KEYWORD_NAMES = {token_type: name for name, token_type in KEYWORDS.items()}
+
+def fingerprint(instructions):
+    # Identifie la suite d'instructions profilée: labels, opérations et opérandes.
+    digest = hashlib.sha256()
+    for instr in instructions:
+        op = instr.operation
+        if op is None:
+            digest.update(f'{instr.number};'.encode())
+        else:
+            digest.update(f'{instr.number}:{op.type.name} {operand_text(op.operand1)},'
+                          f'{operand_text(op.operand2)};'.encode())
+    return digest.hexdigest()[:16]
+
+def instruction_text(instr):
+    op = instr.operation
+    if op is None:
+        return f'{instr.number}: ;'
+    operands = ','.join(operand_text(operand) for operand in (op.operand1, op.operand2) if operand is not None)
+    return f'{instr.number}: {KEYWORD_NAMES.get(op.type, op.type.name.lower())} {operands};'.replace(' ;', ';')
+
+def c_string(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+# Profil d'exécution écrit par un programme C instrumenté (CCompiler avec
+# instrument): pour chaque instruction (index dans le programme compilé), le
+# nombre d'exécutions et, pour un saut conditionnel, le nombre de fois où il a
+# été pris. Les exécutions successives du même programme s'additionnent.
+#   projet-profile <version> <empreinte> <instructions> <exécutions du programme>
+#   <index> <label> <exécutions> <pris>      (instructions exécutées seulement)
+class ExecutionProfile:
+    def __init__(self, counts, taken, runs=0):
+        self.counts = counts
+        self.taken = taken
+        self.runs = runs
+        self.total = sum(counts)
+
+    @classmethod
+    def load(cls, path, instructions):
+        instructions = list(instructions)
+        with open(path) as f:
+            header = f.readline().split()
+            if len(header) != 5 or header[0] != MAGIC or header[1] != str(FORMAT_VERSION):
+                raise Exception(f"Profil d'exécution '{path}' invalide")
+            if header[2] != fingerprint(instructions) or int(header[3]) != len(instructions):
+                raise Exception(f"Le profil d'exécution '{path}' ne correspond pas au programme "
+                                f"(regénérer le profil avec --instrument)")
+            counts = [0] * len(instructions)
+            taken = [0] * len(instructions)
+            for number, line in enumerate(f, 2):
+                fields = line.split()
+                if not fields:
+                    continue
+                try:
+                    index, label, executions, jumps = map(int, fields)
+                except ValueError:
+                    raise Exception(f"Profil d'exécution '{path}' invalide (ligne {number})")
+                if not 0 <= index < len(instructions) or instructions[index].number != label:
+                    raise Exception(f"Profil d'exécution '{path}' invalide (ligne {number})")
+                counts[index] = executions
+                taken[index] = jumps
+        return cls(counts, taken, int(header[4]))
+
+    def hint(self, index):
+        # 'LIKELY', 'UNLIKELY' ou None pour le saut conditionnel index.
+        count = self.counts[index]
+        if count < MIN_SAMPLES:
+            return None
+        ratio = self.taken[index] / count
+        if ratio < COLD_RATIO:
+            return 'UNLIKELY'
+        if ratio > 1 - COLD_RATIO:
+            return 'LIKELY'
+        return None
+
+    def hottest(self, top):
+        ranked = sorted(range(len(self.counts)), key=lambda index: -self.counts[index])
+        return [index for index in ranked[:top] if self.counts[index]]
+
+    def summary(self, instructions, top=20):
+        # Instructions les plus exécutées, avec leur part du total et, pour
+        # les sauts conditionnels, la proportion de sauts pris.
+        instructions = list(instructions)
+        lines = [f"Profil: {self.runs} exécution(s) du programme, {self.total:,} instructions exécutées, "
+                 f"{sum(1 for count in self.counts if count)}/{len(self.counts)} instructions atteintes"]
+        if not self.total:
+            return "\n".join(lines)
+        lines.append(f"{'rang':>4}  {'ligne':>6}  {'instruction':<28} {'exécutions':>14} {'part':>7} "
+                     f"{'cumul':>7}  saut pris")
+        cumulative = 0
+        for rank, index in enumerate(self.hottest(top), 1):
+            instr = instructions[index]
+            count = self.counts[index]
+            cumulative += count
+            op = instr.operation
+            branch = ''
+            if op is not None and op.type in CONDITIONAL_JUMPS:
+                branch = f"{self.taken[index] / count:7.1%}"
+            lines.append(f"{rank:>4}  {instr.line:>6}  {instruction_text(instr):<28} {count:>14,} "
+                         f"{count / self.total:>7.1%} {cumulative / self.total:>7.1%}  {branch}")
+        return "\n".join(lines)
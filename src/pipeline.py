@@ -0,0 +1,37 @@
+from .lexer import Lexer
+from .parser import Parser
+from .parallel_frontend import parse_parallel
+from .semantic_analyzer import SemanticAnalyzer, SemanticError
+from .instrumentation import NO_INSTRUMENTATION
+
+# Lexer -> Parser -> SemanticAnalyzer, avec le cache du front end s'il est fourni.
+# Avec workers différent de 1, les instructions sont analysées par fragments dans
+# un pool de processus (None: un par coeur).
+def analyze(source_code, cache=None, instrumentation=None, workers=1):
+    instrumentation = instrumentation or NO_INSTRUMENTATION
+    if cache is not None:
+        with instrumentation.phase('frontend-cache') as phase:
+            cached = cache.load(source_code)
+            phase.count('cache_hits' if cached is not None else 'cache_misses')
+        if cached is not None:
+            return cached
+
+    if workers != 1:
+        ast = parse_parallel(source_code, workers, instrumentation)
+    else:
+        lexer = Lexer(source_code, instrumentation=instrumentation)
+        # Instrumenté, le lexer va jusqu'au bout avant le parser pour que chaque
+        # phase ait son propre temps; sinon les tokens sont produits à la demande.
+        tokens = lexer.tokenize() if instrumentation.enabled else lexer.iter_tokens()
+        parser = Parser(tokens, instrumentation)
+        ast = parser.parse()
+
+    semantic_analyzer = SemanticAnalyzer(instrumentation)
+    diagnostics = semantic_analyzer.analyze(ast)
+    if diagnostics:
+        raise SemanticError(diagnostics)
+
+    if cache is not None:
+        with instrumentation.phase('frontend-cache-store'):
+            cache.store(source_code, ast, semantic_analyzer.symbol_table)
+    return ast, semantic_analyzer.symbol_table
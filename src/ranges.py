@@ -0,0 +1,308 @@
+from bisect import bisect_left, bisect_right
+from .token import TokenType
+from .ast import Number, Variable, ArrayAccess
+from .cfg import (ControlFlowGraph, DataflowAnalysis, JUMPS, ARITHMETIC, BINARY, READS,
+                  REGISTER_NAMES, wrap16, scalar_name)
+
+INT16_MIN, INT16_MAX = -0x8000, 0x7FFF
+FULL = (INT16_MIN, INT16_MAX)
+
+def operand_range(operand, ranges):
+    if isinstance(operand, Number):
+        value = wrap16(operand.value)
+        return (value, value)
+    name = scalar_name(operand)
+    if name is None:
+        # Case de tableau: son contenu n'est pas suivi.
+        return FULL
+    return ranges[name]
+
+def fits(low, high):
+    return INT16_MIN <= low and high <= INT16_MAX
+
+def arithmetic_range(op_type, a, b):
+    # Intervalle du résultat sur les entiers, FULL si le résultat peut déborder
+    # (la valeur stockée est alors prise modulo 2^16).
+    (a_low, a_high), (b_low, b_high) = a, b
+    if op_type == TokenType.ADD:
+        low, high = a_low + b_low, a_high + b_high
+    elif op_type == TokenType.SUB:
+        low, high = a_low - b_high, a_high - b_low
+    elif op_type == TokenType.MULT:
+        products = (a_low * b_low, a_low * b_high, a_high * b_low, a_high * b_high)
+        low, high = min(products), max(products)
+    elif op_type == TokenType.DIV:
+        # La troncature vers zéro ne fait jamais grandir la valeur absolue, sauf -32768 / -1.
+        bound = max(abs(a_low), abs(a_high))
+        low, high = -bound, bound
+    elif op_type == TokenType.AND:
+        if a_low >= 0 and b_low >= 0:
+            low, high = 0, min(a_high, b_high)
+        elif a_low >= 0 or b_low >= 0:
+            low, high = 0, a_high if a_low >= 0 else b_high
+        else:
+            return FULL
+    elif op_type == TokenType.OR:
+        if a_low < 0 or b_low < 0:
+            return FULL
+        low, high = max(a_low, b_low), (1 << max(a_high, b_high).bit_length()) - 1
+    else:
+        low, high = ~a_high, ~a_low
+    return (low, high) if fits(low, high) else FULL
+
+def intersect(a, b):
+    low, high = max(a[0], b[0]), min(a[1], b[1])
+    return (low, high) if low <= high else None
+
+# État en un point du programme: (ranges, relations, flag)
+#   ranges:    intervalle de chaque scalaire
+#   relations: x -> (y, c) quand x == y + c exactement (copie suivie d'un add/sub
+#              constant sans débordement), pour reporter sur y ce qu'on apprend de x
+#   flag:      scalaire qui contient le résultat ayant posé ZF et SF, ou None
+# None représente un point jamais atteint.
+class RangeAnalysis(DataflowAnalysis):
+    refines_edges = True
+
+    def __init__(self, cfg, symbol_table, delay=1):
+        self.cfg = cfg
+        self.names = list(REGISTER_NAMES) + [name for name, symbol in symbol_table.symbols.items()
+                                             if symbol.type == 'byte']
+        self.thresholds = self.collect_thresholds(cfg.instructions, symbol_table)
+        # Têtes de boucle: cible d'un arc arrière dans l'ordre RPO. L'élargissement
+        # n'y est appliqué qu'après `delay` passages précis.
+        order = cfg.reverse_postorder()
+        position = {block: i for i, block in enumerate(order)}
+        self.loop_heads = {block.index for block in cfg.blocks
+                           if any(position[p] >= position[block.index] for p in block.predecessors)}
+        self.delay = delay
+        self.visits = [0] * len(cfg.blocks)
+        self.entries = [None] * len(cfg.blocks)
+
+    def collect_thresholds(self, instructions, symbol_table):
+        values = {0, -1, 1, INT16_MIN, INT16_MAX}
+        for symbol in symbol_table.symbols.values():
+            if symbol.type == 'array':
+                values.update((symbol.size, symbol.size - 1))
+        for instr in instructions:
+            op = instr.operation
+            if op is None or op.type in JUMPS:
+                continue
+            for operand in (op.operand1, op.operand2):
+                if isinstance(operand, Number):
+                    value = wrap16(operand.value)
+                    values.update(v for v in (value - 1, value, value + 1) if INT16_MIN <= v <= INT16_MAX)
+                    values.update(v for v in (-value - 1, -value, -value + 1) if INT16_MIN <= v <= INT16_MAX)
+        return sorted(values)
+
+    def boundary(self):
+        return ({name: (0, 0) for name in self.names}, {}, None)
+
+    def initial(self):
+        return None
+
+    def meet(self, values):
+        values = [v for v in values if v is not None]
+        if not values:
+            return None
+        if len(values) == 1:
+            # Les états ne sont jamais modifiés en place: pas besoin de copie.
+            return values[0]
+        ranges, relations, flag = values[0]
+        ranges = dict(ranges)
+        relations = dict(relations)
+        for other_ranges, other_relations, other_flag in values[1:]:
+            for name, (low, high) in other_ranges.items():
+                current = ranges[name]
+                if low < current[0] or high > current[1]:
+                    ranges[name] = (min(low, current[0]), max(high, current[1]))
+            for name in list(relations):
+                if other_relations.get(name) != relations[name]:
+                    del relations[name]
+            if other_flag != flag:
+                flag = None
+        return (ranges, relations, flag)
+
+    def widen(self, old, new):
+        thresholds = self.thresholds
+        old_ranges, old_relations, old_flag = old
+        new_ranges, new_relations, new_flag = new
+        ranges = {}
+        for name, (low, high) in new_ranges.items():
+            old_low, old_high = old_ranges[name]
+            if low < old_low:
+                low = thresholds[bisect_right(thresholds, low) - 1]
+            if high > old_high:
+                high = thresholds[bisect_left(thresholds, high)]
+            ranges[name] = (min(low, old_low), max(high, old_high))
+        relations = {name: relation for name, relation in new_relations.items()
+                     if old_relations.get(name) == relation}
+        return (ranges, relations, new_flag if new_flag == old_flag else None)
+
+    def transfer(self, block, value):
+        if value is None:
+            self.entries[block.index] = None
+            return None
+        index = block.index
+        self.visits[index] += 1
+        if index in self.loop_heads and self.visits[index] > self.delay and self.entries[index] is not None:
+            value = self.widen(self.entries[index], self.meet([self.entries[index], value]))
+        self.entries[index] = value
+        ranges, relations, flag = value
+        state = [dict(ranges), dict(relations), flag]
+        instructions = self.cfg.instructions
+        for i in range(block.start, block.end):
+            self.step(instructions[i], state)
+        return tuple(state)
+
+    def assign(self, state, name, interval):
+        ranges, relations, flag = state
+        ranges[name] = interval
+        for other in [other for other, (base, _) in relations.items() if other == name or base == name]:
+            del relations[other]
+        if flag == name:
+            state[2] = None
+
+    def step(self, instr, state):
+        op = instr.operation
+        if op is None or op.type in JUMPS or op.type in READS or op.type == TokenType.HALT:
+            return
+        if op.type == TokenType.IS_FULL:
+            state[2] = None
+            return
+        if op.type == TokenType.CALL:
+            for name in self.names:
+                self.assign(state, name, FULL)
+            return
+        ranges, relations, _ = state
+        name = scalar_name(op.operand1)
+        if op.type == TokenType.MOV:
+            if name is not None:
+                source = scalar_name(op.operand2)
+                self.assign(state, name, operand_range(op.operand2, ranges))
+                if source is not None and source != name:
+                    relations[name] = (source, 0)
+            return
+        if op.type in ARITHMETIC:
+            if name is None:
+                state[2] = None
+                return
+            a = ranges[name]
+            b = operand_range(op.operand2, ranges) if op.type in BINARY else (0, 0)
+            result = arithmetic_range(op.type, a, b)
+            relation = relations.get(name)
+            self.assign(state, name, result)
+            state[2] = name
+            if (relation is not None and op.type in (TokenType.ADD, TokenType.SUB)
+                    and isinstance(op.operand2, Number) and result is not FULL):
+                constant = b[0] if op.type == TokenType.ADD else -b[0]
+                base, offset = relation
+                if base != name:
+                    relations[name] = (base, offset + constant)
+            return
+        # input, pop
+        if name is not None:
+            self.assign(state, name, FULL)
+
+    def edge(self, block, successor, value):
+        if value is None:
+            return None
+        op = self.cfg.instructions[block.end - 1].operation
+        if op is None or op.type not in (TokenType.JZ, TokenType.JS) or len(block.successors) < 2:
+            return value
+        ranges, relations, flag = value
+        if flag is None:
+            return value
+        taken = successor == self.cfg.block_of[self.cfg.labels[op.operand1.value]]
+        low, high = ranges[flag]
+        if op.type == TokenType.JZ:
+            if taken:
+                refined = intersect((low, high), (0, 0))
+            else:
+                # x != 0 ne retire que des extrémités de l'intervalle.
+                low += low == 0
+                high -= high == 0
+                refined = (low, high) if low <= high else None
+        else:
+            refined = intersect((low, high), (INT16_MIN, -1) if taken else (0, INT16_MAX))
+        if refined is None:
+            return None
+        ranges = dict(ranges)
+        ranges[flag] = refined
+        relation = relations.get(flag)
+        if relation is not None:
+            base, offset = relation
+            base_range = intersect(ranges[base], (refined[0] - offset, refined[1] - offset))
+            if base_range is None:
+                return None
+            ranges[base] = base_range
+        return (ranges, relations, flag)
+
+    def states(self):
+        # État avant chaque instruction (None si elle n'est jamais atteinte).
+        self.solve(self.cfg)
+        result = [None] * len(self.cfg.instructions)
+        instructions = self.cfg.instructions
+        for block in self.cfg.blocks:
+            value = self.entries[block.index]
+            if value is None:
+                continue
+            ranges, relations, flag = value
+            state = [dict(ranges), dict(relations), flag]
+            for i in range(block.start, block.end):
+                result[i] = state[0].copy()
+                self.step(instructions[i], state)
+        return result
+
+class BoundsReport:
+    def __init__(self):
+        self.total = 0
+        self.proven = 0
+        # Accès dont l'index est toujours dans les bornes: (index de l'instruction,
+        # opérande 1 ou 2). Les noeuds d'une InstructionTable sont recréés à chaque
+        # parcours: leur id() ne les identifie pas.
+        self.safe = set()
+
+    def percent(self):
+        return 100.0 * self.proven / self.total if self.total else 100.0
+
+    def __str__(self):
+        return (f"{self.proven}/{self.total} accès indexés par une variable prouvés dans les bornes "
+                f"({self.percent():.1f}%)")
+
+def indexed_accesses(op):
+    # (opérande 1 ou 2, noeud ArrayAccess) des accès indexés par une variable.
+    if op is None or op.type in JUMPS:
+        return []
+    return [(slot, operand) for slot, operand in enumerate((op.operand1, op.operand2), 1)
+            if isinstance(operand, ArrayAccess) and isinstance(operand.index, Variable)]
+
+# Accès tab[i] dont l'index est prouvé dans [0, taille) par l'analyse
+# d'intervalles. Un accès d'une instruction jamais atteinte compte comme prouvé.
+def analyze_array_bounds(instructions, symbol_table):
+    report = BoundsReport()
+    instructions = instructions if isinstance(instructions, list) else list(instructions)
+    if not any(indexed_accesses(instr.operation) for instr in instructions):
+        return report
+    cfg = ControlFlowGraph(instructions)
+    if len(cfg.labels) != len(instructions):
+        # Labels dupliqués: les cibles de saut sont ambiguës, rien n'est prouvé.
+        states = None
+    else:
+        states = RangeAnalysis(cfg, symbol_table).states()
+    for index, instr in enumerate(instructions):
+        for slot, access in indexed_accesses(instr.operation):
+            report.total += 1
+            symbol = symbol_table.lookup(access.name)
+            if states is not None and symbol is not None:
+                ranges = states[index]
+                if ranges is None:
+                    proven = True
+                else:
+                    low, high = ranges.get(access.index.name, FULL)
+                    proven = low >= 0 and high < symbol.size
+            else:
+                proven = False
+            if proven:
+                report.proven += 1
+                report.safe.add((index, slot))
+    return report
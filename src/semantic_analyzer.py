@@ -1,118 +1,309 @@
 from .token import TokenType
-from .ast import (Variable, Number, ArrayAccess, AST, Program, 
-                 VarDeclaration, ArrayDeclaration, Instruction, 
-                 Operation, Operand, Register)
+from .ast import (Variable, Number, ArrayAccess, Program, VarDeclaration, ArrayDeclaration,
+                  Instruction, Operation)
+from .instrumentation import NO_INSTRUMENTATION
+from .arena import ArenaLayout
 
+JUMP_OPS = {TokenType.JMP, TokenType.JZ, TokenType.JS, TokenType.JO}
+READ_OPS = {TokenType.PRINT, TokenType.PUSH}
+WRITE_OPS = {TokenType.INPUT, TokenType.POP, TokenType.NOT}
+BINARY_OPS = {TokenType.MOV, TokenType.ADD, TokenType.SUB, TokenType.MULT, TokenType.DIV,
+              TokenType.AND, TokenType.OR}
+NO_OPERAND_OPS = {TokenType.HALT, TokenType.IS_FULL}
+
+# slot: rang de déclaration, dense (0, 1, 2...): indexe les tableaux par symbole.
 class Symbol:
-    def __init__(self, name, type_, size=None):
+    def __init__(self, name, type_, size=None, slot=0):
         self.name = name
         self.type = type_
         self.size = size
+        self.slot = slot
+
+# Ensemble de labels: un bit par label jusqu'au plus grand (les labels au-delà
+# de LIMIT dans un set), quelques Mo au lieu d'un set Python sur des millions
+# d'instructions.
+class LabelSet:
+    LIMIT = 1 << 28
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.others = set()
+
+    def add(self, label):
+        if 0 <= label < self.LIMIT:
+            byte = label >> 3
+            if byte >= len(self.bits):
+                self.bits.extend(bytes(max(byte + 1 - len(self.bits), len(self.bits))))
+            self.bits[byte] |= 1 << (label & 7)
+        else:
+            self.others.add(label)
+
+    def __contains__(self, label):
+        if 0 <= label < self.LIMIT:
+            byte = label >> 3
+            return byte < len(self.bits) and self.bits[byte] >> (label & 7) & 1 == 1
+        return label in self.others
+
+    def issubset(self, other):
+        if any(label not in other for label in self.others):
+            return False
+        mine = int.from_bytes(self.bits, 'little')
+        return mine & ~int.from_bytes(other.bits, 'little') == 0
 
 class SymbolTable:
     def __init__(self):
         self.symbols = {}
         self.instruction_labels = set()
+        self.jumps = []
 
     def define(self, name, type_, size=None):
         if name in self.symbols:
             raise Exception(f"Erreur sémantique: Variable '{name}' déjà déclarée")
-        self.symbols[name] = Symbol(name, type_, size)
+        self.symbols[name] = Symbol(name, type_, size, len(self.symbols))
 
     def lookup(self, name):
         return self.symbols.get(name)
 
+    def layout(self, instructions=(), cfg=None, control=(), tail=(), executions=None):
+        # Case de chaque symbole dans l'arène de l'état du programme (ArenaLayout).
+        return ArenaLayout(self, instructions, cfg, control, tail, executions)
+
     def add_instruction(self, label):
         self.instruction_labels.add(label)
 
     def has_instruction(self, label):
         return label in self.instruction_labels
 
+    def add_jump(self, source, target):
+        self.jumps.append((source, target))
+
+class Diagnostic:
+    __slots__ = ('message', 'line', 'column', 'instruction')
+
+    def __init__(self, message, line=0, column=0, instruction=None):
+        self.message = message
+        self.line = line
+        self.column = column
+        self.instruction = instruction
+
+    def __str__(self):
+        return f"Erreur sémantique à la ligne {self.line}, colonne {self.column}: {self.message}"
+
+    def __repr__(self):
+        return f'Diagnostic({self.message!r}, line={self.line}, col={self.column})'
+
+class SemanticError(Exception):
+    def __init__(self, diagnostics):
+        super().__init__("\n".join(str(d) for d in diagnostics))
+        self.diagnostics = diagnostics
+
+# Analyse en une passe: déclarations, puis chaque instruction (opérandes, bornes
+# des tableaux), puis les cibles de saut une fois tous les labels connus. Les
+# erreurs ne sont pas levées mais collectées dans self.diagnostics, triées par
+# position dans le source.
 class SemanticAnalyzer:
-    def __init__(self):
+    def __init__(self, instrumentation=None):
         self.symbol_table = SymbolTable()
+        self.instrumentation = instrumentation or NO_INSTRUMENTATION
+        self.diagnostics = []
         self.current_instruction = None
+        self.jump_sources = []
+        # Méthode visit_* de chaque classe de noeud et vérification de chaque
+        # type d'opération, résolues une fois pour toutes.
+        self.dispatch = {cls: getattr(self, f'visit_{cls.__name__}')
+                         for cls in (Program, VarDeclaration, ArrayDeclaration, Instruction, Operation)}
+        self.operation_checks = {TokenType.CALL: self.check_procedure_call}
+        for op_types, check in ((JUMP_OPS, self.check_jump), (READ_OPS, self.check_read),
+                                (WRITE_OPS, self.check_write), (BINARY_OPS, self.check_binary_operation),
+                                (NO_OPERAND_OPS, self.check_nothing)):
+            for op_type in op_types:
+                self.operation_checks[op_type] = check
+
+    def analyze(self, program):
+        with self.instrumentation.phase('semantic') as phase:
+            self.visit_Program(program)
+            phase.count('instructions', len(program.instructions))
+            phase.count('symbols', len(self.symbol_table.symbols))
+            phase.count('diagnostics', len(self.diagnostics))
+        return self.diagnostics
+
+    def error(self, message, node=None):
+        node = node or self.current_instruction
+        if node is None:
+            self.diagnostics.append(Diagnostic(message))
+            return
+        number = node.number if isinstance(node, Instruction) else None
+        self.diagnostics.append(Diagnostic(message, node.line, node.column, number))
 
     def visit_Program(self, node):
         for declaration in node.declarations:
-            self.visit(declaration)
+            self.dispatch[type(declaration)](declaration)
+        # Boucle de visit_Instruction/visit_Operation déroulée: c'est le chemin chaud.
+        labels = self.symbol_table.instruction_labels
+        checks = self.operation_checks
         for instruction in node.instructions:
-            self.visit(instruction)
+            self.current_instruction = instruction
+            labels.add(instruction.number)
+            operation = instruction.operation
+            if operation is not None:
+                check = checks.get(operation.type)
+                if check is None:
+                    self.error(f"Opération inconnue: {operation.type.name}")
+                else:
+                    check(operation)
+        self.current_instruction = None
         self.verify_jump_labels()
+        self.diagnostics.sort(key=lambda d: (d.line, d.column))
 
     def visit_VarDeclaration(self, node):
-        self.symbol_table.define(node.name, 'byte')
+        self.declare(node, 'byte')
 
     def visit_ArrayDeclaration(self, node):
         if node.size <= 0:
-            raise Exception(f"Erreur sémantique: Taille de tableau invalide pour '{node.name}'")
-        self.symbol_table.define(node.name, 'array', node.size)
+            self.error(f"Taille de tableau invalide pour '{node.name}'", node)
+            return
+        self.declare(node, 'array', node.size)
+
+    def declare(self, node, type_, size=None):
+        if node.name in self.symbol_table.symbols:
+            self.error(f"Variable '{node.name}' déjà déclarée", node)
+            return
+        symbols = self.symbol_table.symbols
+        symbols[node.name] = Symbol(node.name, type_, size, len(symbols))
 
     def visit_Instruction(self, node):
-        self.current_instruction = node.number
-        self.symbol_table.add_instruction(node.number)
-        if node.operation:
-            self.visit(node.operation)
+        self.current_instruction = node
+        self.symbol_table.instruction_labels.add(node.number)
+        if node.operation is not None:
+            self.visit_Operation(node.operation)
 
     def visit_Operation(self, node):
-        if node.type in ['JMP', 'JZ', 'JS', 'JO']:
-            self.check_jump_target(node.operand1.value)
-        elif node.type in ['INPUT', 'PRINT', 'PUSH', 'POP']:
-            self.check_operand(node.operand1)
-        elif node.type == 'NOT':
-            self.check_operand(node.operand1)
-        elif node.type == 'CALL':
-            self.check_procedure_call(node.operand1)
-        else:
-            self.check_binary_operation(node)
+        check = self.operation_checks.get(node.type)
+        if check is None:
+            self.error(f"Opération inconnue: {node.type.name}")
+            return
+        check(node)
 
-    def check_binary_operation(self, node):
+    def check_nothing(self, node):
+        pass
+
+    def check_read(self, node):
         self.check_operand(node.operand1)
+
+    def check_write(self, node):
+        self.check_destination(node.operand1)
+
+    def check_binary_operation(self, node):
+        self.check_destination(node.operand1)
         self.check_operand(node.operand2)
-        if node.type in ['DIV', 'MOD']:
-            if hasattr(node.operand2, 'value') and node.operand2.value == 0:
-                raise Exception("Erreur sémantique: Division par zéro")
+        if node.type == TokenType.DIV and isinstance(node.operand2, Number) and node.operand2.value == 0:
+            self.error("Division par zéro")
+
+    def check_destination(self, operand):
+        if isinstance(operand, Number):
+            self.error("Destination constante")
+            return
+        self.check_operand(operand)
 
     def check_operand(self, operand):
         if isinstance(operand, Variable):
-            symbol = self.symbol_table.lookup(operand.name)
-            if not symbol:
-                raise Exception(f"Erreur sémantique: Variable '{operand.name}' non déclarée")
+            symbol = self.symbol_table.symbols.get(operand.name)
+            if symbol is None:
+                self.error(f"Variable '{operand.name}' non déclarée")
+            elif symbol.type == 'array':
+                self.error(f"'{operand.name}' est un tableau, un index est attendu")
         elif isinstance(operand, ArrayAccess):
-            symbol = self.symbol_table.lookup(operand.name)
-            if not symbol:
-                raise Exception(f"Erreur sémantique: Tableau '{operand.name}' non déclaré")
-            if symbol.type != 'array':
-                raise Exception(f"Erreur sémantique: '{operand.name}' n'est pas un tableau")
-            self.check_array_index(operand.index, symbol)
+            symbol = self.symbol_table.symbols.get(operand.name)
+            if symbol is None:
+                self.error(f"Tableau '{operand.name}' non déclaré")
+            elif symbol.type != 'array':
+                self.error(f"'{operand.name}' n'est pas un tableau")
+            else:
+                self.check_array_index(operand.index, symbol)
 
     def check_array_index(self, index, array_symbol):
         if isinstance(index, Number):
             if index.value < 0 or index.value >= array_symbol.size:
-                raise Exception(f"Erreur sémantique: Index hors limites pour le tableau '{array_symbol.name}'")
+                self.error(f"Index hors limites pour le tableau '{array_symbol.name}'")
         elif isinstance(index, Variable):
-            if not self.symbol_table.lookup(index.name):
-                raise Exception(f"Erreur sémantique: Variable d'index '{index.name}' non déclarée")
+            symbol = self.symbol_table.symbols.get(index.name)
+            if symbol is None:
+                self.error(f"Variable d'index '{index.name}' non déclarée")
+            elif symbol.type == 'array':
+                self.error(f"'{index.name}' est un tableau et ne peut pas servir d'index")
 
-    def check_jump_target(self, target):
+    def check_jump(self, node):
+        target = node.operand1.value
         if not isinstance(target, int):
-            raise Exception("Erreur sémantique: La cible du saut doit être un nombre")
+            self.error("La cible du saut doit être un nombre")
+            return
+        self.symbol_table.add_jump(self.current_instruction.number, target)
+        self.jump_sources.append(self.current_instruction)
 
-    def check_procedure_call(self, procedure):
+    def check_procedure_call(self, node):
+        procedure = node.operand1
         if not isinstance(procedure, Variable):
-            raise Exception("Erreur sémantique: L'argument de CALL doit être un identifiant")
-        if not self.symbol_table.lookup(procedure.name):
-            raise Exception(f"Erreur sémantique: Procédure '{procedure.name}' non déclarée")
+            self.error("L'argument de CALL doit être un identifiant")
+        elif not self.symbol_table.lookup(procedure.name):
+            self.error(f"Procédure '{procedure.name}' non déclarée")
 
     def verify_jump_labels(self):
-        for instruction in self.symbol_table.instruction_labels:
-            if not self.symbol_table.has_instruction(instruction):
-                raise Exception(f"Erreur sémantique: Label d'instruction {instruction} non défini")
+        labels = self.symbol_table.instruction_labels
+        for instruction in self.jump_sources:
+            target = instruction.operation.operand1.value
+            if target not in labels:
+                self.error(f"Label d'instruction {target} non défini "
+                           f"(saut de l'instruction {instruction.number})", instruction)
 
     def visit(self, node):
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        visitor = self.dispatch.get(type(node))
+        if visitor is None:
+            return self.generic_visit(node)
+        result = visitor(node)
+        # Interface d'origine: un programme erroné lève une exception.
+        if type(node) is Program and self.diagnostics:
+            raise SemanticError(self.diagnostics)
+        return result
 
     def generic_visit(self, node):
-        raise Exception(f'Pas de méthode visit_{type(node).__name__}') 
\ No newline at end of file
+        raise Exception(f'Pas de méthode visit_{type(node).__name__}')
+
+# Analyse d'un programme reçu instruction par instruction (compilation en flux):
+# rien n'est gardé par instruction, seulement un bit par label et un bit par
+# cible de saut, comparés par finish().
+class StreamingAnalyzer(SemanticAnalyzer):
+    def __init__(self, instrumentation=None):
+        super().__init__(instrumentation)
+        self.symbol_table.instruction_labels = LabelSet()
+        self.targets = LabelSet()
+
+    def declare_all(self, declarations):
+        for declaration in declarations:
+            self.dispatch[type(declaration)](declaration)
+
+    def check_instruction(self, instruction):
+        self.visit_Instruction(instruction)
+        self.current_instruction = None
+
+    def check_jump(self, node):
+        target = node.operand1.value
+        if not isinstance(target, int):
+            self.error("La cible du saut doit être un nombre")
+            return
+        self.targets.add(target)
+
+    def finish(self, reread):
+        # reread() relit les instructions du programme: seulement si une cible
+        # n'est pas un label, pour situer chaque saut fautif.
+        labels = self.symbol_table.instruction_labels
+        if not self.targets.issubset(labels):
+            for instruction in reread():
+                operation = instruction.operation
+                if operation is None or operation.type not in JUMP_OPS:
+                    continue
+                target = operation.operand1.value
+                if isinstance(target, int) and target not in labels:
+                    self.error(f"Label d'instruction {target} non défini "
+                               f"(saut de l'instruction {instruction.number})", instruction)
+        self.diagnostics.sort(key=lambda d: (d.line, d.column))
+        return self.diagnostics
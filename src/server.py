@@ -0,0 +1,299 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .pipeline import analyze
+from .frontend_cache import FrontendCache
+from .semantic_analyzer import SemanticError
+from .compiler_to_c import CCompiler, PROFILES
+from .optimizer import optimize, LEVELS
+from .vm import run_program
+from .client import default_socket_path
+
+COMMANDS = ('compile', 'check', 'run')
+# Taille maximale d'une ligne de requête (source compris).
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Le C est écrit par morceaux, en attendant que le client lise (drain) entre deux.
+CHUNK_SIZE = 256 * 1024
+LATENCY_WINDOW = 10000
+# Instructions exécutées au plus par une requête run: une boucle infinie ne
+# doit pas occuper un processus du pool indéfiniment.
+MAX_RUN_STEPS = 10_000_000
+WARMUP_SOURCE = "Var\nx:byte\nInstructions\n0: mov x,1;\n1: print x;\n"
+
+_worker_cache = None
+
+def init_worker(cache_dir, use_cache):
+    global _worker_cache
+    _worker_cache = FrontendCache(cache_dir) if use_cache else None
+    # Premier passage dans tout le pipeline (imports paresseux, regex, tables)
+    # avant la première vraie requête.
+    ast, symbol_table = analyze(WARMUP_SOURCE)
+    CCompiler(ast, symbol_table).generate_c_code()
+
+def warm(_):
+    return os.getpid()
+
+def validate(request):
+    if not isinstance(request, dict):
+        raise Exception("Requête: objet JSON attendu")
+    command = request.get('command')
+    if command not in COMMANDS + ('stats', 'shutdown'):
+        raise Exception(f"Requête: commande inconnue {command!r} (commandes: {', '.join(COMMANDS)}, "
+                        f"stats, shutdown)")
+    if command in COMMANDS and not isinstance(request.get('source', request.get('path')), str):
+        raise Exception("Requête: 'source' ou 'path' attendu")
+    if request.get('profile', 'checked') not in PROFILES:
+        raise Exception(f"Profil de génération C inconnu: {request['profile']} (profils: {', '.join(PROFILES)})")
+    if request.get('opt_level', 0) not in LEVELS:
+        raise Exception(f"Niveau d'optimisation invalide: -O{request['opt_level']}")
+    max_steps = request.get('max_steps')
+    if max_steps is not None and (type(max_steps) is not int or max_steps <= 0):
+        raise Exception(f"Requête: 'max_steps' doit être un entier positif ({max_steps!r})")
+
+def input_reader(values):
+    values = iter(values)
+    count = 0
+
+    def read():
+        nonlocal count
+        count += 1
+        for value in values:
+            return value
+        raise Exception(f"Exécution: entrée {count} absente")
+    return read
+
+# Exécuté dans un processus du pool: Lexer -> Parser -> SemanticAnalyzer, puis
+# CCompiler (compile) ou la machine virtuelle (run). Renvoie l'en-tête de la
+# réponse et le C; une erreur du programme est une réponse, pas une exception.
+def execute(request):
+    start = time.perf_counter()
+    header = {'status': 'ok'}
+    payload = ''
+    try:
+        source = request.get('source')
+        if source is None:
+            with open(request['path'], 'r') as f:
+                source = f.read()
+        ast, symbol_table = analyze(source, _worker_cache)
+        level = request.get('opt_level', 0)
+        if level:
+            ast, symbol_table, _ = optimize(ast, symbol_table, level)
+        header['instructions'] = len(ast.instructions)
+        command = request['command']
+        if command == 'compile':
+            compiler = CCompiler(ast, symbol_table, profile=request.get('profile', 'checked'),
+                                 range_analysis=request.get('range_analysis', True),
+                                 structured=request.get('structured', True))
+            payload = compiler.generate_c_code() + "\n"
+        elif command == 'run':
+            output = []
+            header['output'] = output
+            max_steps = request.get('max_steps') or MAX_RUN_STEPS
+            try:
+                vm, _ = run_program(ast, symbol_table, input_reader(request.get('inputs') or []),
+                                    output.append, max_steps)
+                header['steps'] = vm.steps
+                header['limited'] = vm.pc < len(vm.bytecode.code)
+                if header['limited']:
+                    header.update(status='error', diagnostics=[
+                        f"Exécution: limite de {max_steps} instructions atteinte"])
+            except Exception as e:
+                header.update(status='error', diagnostics=[str(e)])
+    except SemanticError as e:
+        header = {'status': 'error', 'diagnostics': [str(d) for d in e.diagnostics]}
+    except Exception as e:
+        header = {'status': 'error', 'diagnostics': [str(e)]}
+    header['seconds'] = time.perf_counter() - start
+    return header, payload
+
+# Latences de bout en bout côté serveur (ligne de requête reçue -> dernier
+# octet de la réponse écrit), sur les LATENCY_WINDOW dernières requêtes.
+class LatencyStats:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+
+    def add(self, seconds, ok):
+        self.samples.append(seconds)
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'p50_ms': self.percentile(0.50) * 1000,
+            'p90_ms': self.percentile(0.90) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': max(self.samples, default=0.0) * 1000,
+        }
+
+# Serveur de compilation persistant: les processus du pool gardent le
+# compilateur importé et leurs caches chauds d'une requête à l'autre.
+# Les requêtes de toutes les connexions sont traitées en parallèle, au plus
+# max_pending à la fois (en calcul ou en cours d'envoi). Au-delà, le serveur
+# cesse de lire la connexion qui envoie: la requête suivante attend dans le
+# tampon du socket et le client est freiné par sendall (contre-pression), sans
+# que le serveur accumule de requêtes en mémoire. Un client qui lit lentement
+# ses réponses n'est freiné que lui-même (drain).
+class CompileServer:
+    def __init__(self, path=None, workers=None, max_pending=None, cache_dir=None, use_cache=True,
+                 max_steps=None):
+        self.path = path or default_socket_path()
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self.max_steps = max_steps or MAX_RUN_STEPS
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.latency = LatencyStats()
+        self.pool = None
+        self.slots = None
+        self.stopped = None
+        self.pending = 0
+        self.connections = 0
+        self.started = time.time()
+
+    def remove_stale_socket(self):
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.remove(self.path)
+            return
+        finally:
+            probe.close()
+        raise Exception(f"Un serveur écoute déjà sur '{self.path}'")
+
+    async def serve(self, ready=None):
+        loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(self.max_pending)
+        self.stopped = asyncio.Event()
+        self.remove_stale_socket()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                        initargs=(self.cache_dir, self.use_cache))
+        try:
+            # Démarre tous les processus avant d'accepter des connexions.
+            await asyncio.gather(*(loop.run_in_executor(self.pool, warm, i) for i in range(self.workers)))
+            server = await asyncio.start_unix_server(self.handle_connection, path=self.path,
+                                                     limit=MAX_REQUEST_BYTES)
+            os.chmod(self.path, 0o600)
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, self.stopped.set)
+            if ready is not None:
+                ready()
+            async with server:
+                await self.stopped.wait()
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.pool.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while not self.stopped.is_set():
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self.reply(writer, lock, {'status': 'error', 'diagnostics': [
+                        f"Requête: plus de {MAX_REQUEST_BYTES} octets"]})
+                    break
+                if not line:
+                    break
+                received = time.perf_counter()
+                await self.slots.acquire()
+                task = asyncio.create_task(self.handle_request(line, received, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def handle_request(self, line, received, writer, lock):
+        self.pending += 1
+        header = {'status': 'error'}
+        stop = False
+        try:
+            request = None
+            payload = ''
+            try:
+                request = json.loads(line)
+                validate(request)
+                command = request['command']
+                if command == 'stats':
+                    header = self.stats()
+                elif command == 'shutdown':
+                    header = {'status': 'ok'}
+                    stop = True
+                else:
+                    if command == 'run':
+                        # Le client peut demander moins d'instructions que la limite du serveur, pas plus.
+                        request['max_steps'] = min(request.get('max_steps') or self.max_steps, self.max_steps)
+                    loop = asyncio.get_running_loop()
+                    header, payload = await loop.run_in_executor(self.pool, execute, request)
+            except Exception as e:
+                header = {'status': 'error', 'diagnostics': [str(e)]}
+            if isinstance(request, dict) and 'id' in request:
+                header['id'] = request['id']
+            await self.reply(writer, lock, header, payload)
+        except ConnectionError:
+            pass
+        finally:
+            if stop:
+                # Après la réponse, pour que le client la reçoive.
+                self.stopped.set()
+            self.pending -= 1
+            self.slots.release()
+            self.latency.add(time.perf_counter() - received, header.get('status') == 'ok')
+
+    async def reply(self, writer, lock, header, payload=''):
+        data = payload.encode()
+        header['length'] = len(data)
+        # Une réponse à la fois par connexion: l'en-tête et son C restent contigus.
+        async with lock:
+            writer.write(json.dumps(header, separators=(',', ':'), ensure_ascii=False).encode() + b'\n')
+            for start in range(0, len(data), CHUNK_SIZE):
+                writer.write(data[start:start + CHUNK_SIZE])
+                await writer.drain()
+            await writer.drain()
+
+    def stats(self):
+        return {
+            'status': 'ok',
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'max_steps': self.max_steps,
+            'pending': self.pending,
+            'connections': self.connections,
+            'uptime_s': time.time() - self.started,
+            **self.latency.summary(),
+        }
+
+def serve(path=None, workers=None, max_pending=None, cache_dir=None, use_cache=True, max_steps=None):
+    server = CompileServer(path, workers, max_pending, cache_dir, use_cache, max_steps)
+    asyncio.run(server.serve(lambda: print(f"Serveur de compilation sur '{server.path}' "
+                                           f"({server.workers} processus, {server.max_pending} requêtes "
+                                           f"en cours au plus)", flush=True)))
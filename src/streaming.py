@@ -0,0 +1,87 @@
+import mmap
+import os
+from .lexer import Lexer
+from .parser import Parser
+from .ast import Program
+from .semantic_analyzer import StreamingAnalyzer, SemanticError
+from .compiler_to_c import CCompiler
+from .instrumentation import NO_INSTRUMENTATION
+
+# Source ouvert par mmap: le lexer lit directement les pages du fichier, et
+# release() rend au système celles qui sont déjà lues (relues depuis le fichier
+# si on y revient), pour que la mémoire résidente ne suive pas la taille du source.
+class MappedSource:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            size = os.fstat(self.file.fileno()).st_size
+            # Un fichier vide ne peut pas être projeté.
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        except Exception:
+            self.file.close()
+            raise
+
+    def release(self, position):
+        if isinstance(self.buffer, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED'):
+            length = position - position % mmap.PAGESIZE
+            if length:
+                self.buffer.madvise(mmap.MADV_DONTNEED, 0, length)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def checked_instructions(parser, analyzer):
+    for instruction in parser.iter_instructions():
+        analyzer.check_instruction(instruction)
+        yield instruction
+
+def read_instructions(source, release=None):
+    parser = Parser(Lexer(source, release=release).iter_tokens())
+    parser.parse_declarations()
+    return parser.iter_instructions()
+
+# Lexer -> Parser -> analyse -> C sans construire l'AST: chaque instruction est
+# analysée, compilée et écrite dans out puis oubliée. Sans liste d'instructions,
+# pas d'analyse d'intervalles (toutes les vérifications d'index du profil
+# checked sont gardées) ni d'optimisation. Les erreurs sémantiques sont levées
+# à la fin, une fois tous les labels connus: out contient alors un C inutilisable.
+def compile_stream(source, out, profile='checked', instrumentation=None, release=None):
+    instrumentation = instrumentation or NO_INSTRUMENTATION
+    with instrumentation.phase('stream') as phase:
+        parser = Parser(Lexer(source, instrumentation=instrumentation, release=release).iter_tokens(),
+                        instrumentation)
+        analyzer = StreamingAnalyzer(instrumentation)
+        declarations = parser.parse_declarations()
+        analyzer.declare_all(declarations)
+        program = Program(declarations, checked_instructions(parser, analyzer))
+        compiler = CCompiler(program, analyzer.symbol_table, instrumentation, profile, range_analysis=False,
+                             structured=False)
+        compiler.write_c_code(out)
+        diagnostics = analyzer.finish(lambda: read_instructions(source, release))
+        phase.count('source_bytes', len(source))
+        phase.count('diagnostics', len(diagnostics))
+    if diagnostics:
+        raise SemanticError(diagnostics)
+    return analyzer.symbol_table
+
+# Compile le fichier path vers output en flux; output est supprimé en cas d'erreur.
+def compile_file_stream(path, output, profile='checked', instrumentation=None):
+    with MappedSource(path) as source:
+        try:
+            with open(output, 'w', buffering=1024 * 1024) as out:
+                return compile_stream(source.buffer, out, profile, instrumentation, source.release)
+        except BaseException as e:
+            if os.path.exists(output):
+                os.remove(output)
+            # La trace garde les générateurs du lexer, qui exportent encore le
+            # tampon: sans elle, la projection peut être fermée.
+            raise e.with_traceback(None)
@@ -0,0 +1,211 @@
+from .token import TokenType
+from .cfg import JUMPS, immediate_dominators, natural_loops
+
+INDENT = '    '
+
+class Label:
+    __slots__ = ('block',)
+
+    def __init__(self, block):
+        self.block = block
+
+# Reconstruit boucles et conditionnelles depuis le graphe de flot, d'après
+# N. Ramsey, « Beyond Relooper » (ICFP 2022), adapté aux break/continue de C:
+#   - les blocs sont placés selon l'arbre des dominateurs, chaque bloc une fois;
+#   - une tête de boucle naturelle devient for (;;), et les blocs qu'elle domine
+#     hors de la boucle (les sorties) sont placés après la boucle;
+#   - un fils de x dans l'arbre qui n'a que x comme prédécesseur en avant est
+#     placé dans la branche de x qui y mène (if/else);
+#   - les autres fils (points de jonction) suivent le code de x, dans l'ordre RPO.
+# Un saut devient alors: rien si sa cible est le code qui suit, continue ou
+# break s'il vise la tête ou la sortie de la boucle la plus proche, sinon goto
+# (flot irréductible, sortie de plusieurs boucles à la fois...).
+#   statement(index): C d'une instruction hors saut, indenté d'un niveau
+#   condition(index): expression C vraie quand le saut conditionnel index est pris
+#   weight(block):    exécutions mesurées du bloc (profil), optionnel: la branche
+#                     la plus exécutée d'un if/else est placée en premier
+class Structurer:
+    def __init__(self, cfg, statement, condition, weight=None):
+        self.cfg = cfg
+        self.statement = statement
+        self.condition = condition
+        self.weight = weight
+        self.idom = immediate_dominators(cfg)
+        self.loops = natural_loops(cfg, self.idom)
+        reachable = [b for b in cfg.reverse_postorder() if self.idom[b] is not None]
+        self.position = {b: i for i, b in enumerate(reachable)}
+        children = {b: [] for b in reachable}
+        for b in reachable[1:]:
+            children[self.idom[b]].append(b)
+
+        self.inline = set()
+        self.merges = {}
+        self.exits = {}
+        for x in reachable:
+            loop = self.loops.get(x)
+            successors = cfg.blocks[x].successors
+            merges, exits = [], []
+            for c in children[x]:
+                if loop is not None and c not in loop:
+                    exits.append(c)
+                elif c in successors and self.forward_predecessors(c) == 1:
+                    self.inline.add(c)
+                else:
+                    merges.append(c)
+            self.merges[x] = merges
+            self.exits[x] = exits
+        self.targets = set()
+        self.out = []
+
+    def forward_predecessors(self, b):
+        position = self.position
+        return sum(1 for p in self.cfg.blocks[b].predecessors
+                   if p in position and position[p] < position[b])
+
+    def generate(self):
+        # Corps de main(): morceaux de C indentés, labels des seules cibles de goto.
+        if not self.cfg.blocks:
+            return []
+        self.region(0, None, [], 1)
+        code = []
+        for depth, item in self.out:
+            if isinstance(item, Label):
+                if item.block in self.targets:
+                    code.append(f"{INDENT * depth}{self.label(item.block)}: ;")
+            else:
+                code.append(item)
+        return code
+
+    def label(self, block):
+        start = self.cfg.blocks[block].start
+        number = self.cfg.instructions[start].number
+        if self.cfg.labels[number] == start:
+            return f"L{number}"
+        return f"B{block}"
+
+    def emit(self, depth, text):
+        self.out.append((depth, INDENT * depth + text))
+
+    def region(self, x, follow, loops, depth):
+        # x et les blocs qu'il domine; le code se termine normalement seulement
+        # quand le contrôle doit passer à follow. Le dernier bloc d'une séquence
+        # est traité dans la boucle plutôt que par récursion.
+        while x is not None:
+            x, follow = self.step(x, follow, loops, depth)
+
+    def step(self, x, follow, loops, depth):
+        if x not in self.loops:
+            return self.sequence(x, follow, loops, depth)
+        exits = self.exits[x]
+        inner = loops + [(x, exits[0] if exits else follow)]
+        self.emit(depth, "for (;;) {")
+        tail, tail_follow = self.sequence(x, x, inner, depth + 1)
+        self.region(tail, tail_follow, inner, depth + 1)
+        self.emit(depth, "}")
+        for i, e in enumerate(exits[:-1]):
+            self.region(e, exits[i + 1], loops, depth)
+        return (exits[-1], follow) if exits else (None, None)
+
+    def sequence(self, x, follow, loops, depth):
+        # Code de x puis ses points de jonction; renvoie le bloc qui reste à
+        # placer au même niveau, et ce qui le suit.
+        merges = self.merges[x]
+        tail = self.node(x, merges[0] if merges else follow, loops, depth)
+        if not merges:
+            return tail, follow
+        if tail is not None:
+            self.region(tail, merges[0], loops, depth)
+        for i, y in enumerate(merges[:-1]):
+            self.region(y, merges[i + 1], loops, depth)
+        return merges[-1], follow
+
+    def node(self, x, follow, loops, depth):
+        # Instructions de x puis sa sortie. Renvoie le successeur à placer
+        # à la suite au même niveau, s'il y en a un.
+        self.out.append((depth, Label(x)))
+        cfg = self.cfg
+        block = cfg.blocks[x]
+        last = cfg.instructions[block.end - 1].operation
+        jump = last is not None and last.type in JUMPS
+        for i in range(block.start, block.end - 1 if jump else block.end):
+            if cfg.instructions[i].operation is not None:
+                self.out.append((depth, self.indent(self.statement(i), depth - 1)))
+
+        following = x + 1 if block.end < len(cfg.instructions) else None
+        if jump:
+            target = cfg.block_of[cfg.labels[last.operand1.value]]
+            if last.type == TokenType.JMP or target == following:
+                return self.branch(x, target, follow, loops, depth)
+            return self.conditional(x, block.end - 1, target, following, follow, loops, depth)
+        if last is not None and last.type == TokenType.HALT:
+            return None
+        if following is None:
+            self.emit(depth, "return 0;")
+            return None
+        return self.branch(x, following, follow, loops, depth)
+
+    def branch(self, x, y, follow, loops, depth):
+        if y in self.inline and self.idom[y] == x:
+            return y
+        statement = self.jump(y, follow, loops)
+        if statement:
+            self.emit(depth, statement)
+        return None
+
+    def conditional(self, x, index, taken, fallthrough, follow, loops, depth):
+        condition = self.condition(index)
+        then_inline = taken in self.inline and self.idom[taken] == x
+        else_inline = fallthrough is not None and fallthrough in self.inline and self.idom[fallthrough] == x
+        then_jump = None if then_inline else self.jump(taken, follow, loops)
+        else_jump = None if else_inline else ("return 0;" if fallthrough is None
+                                              else self.jump(fallthrough, follow, loops))
+        if not then_inline and then_jump:
+            # Branche qui ne revient pas: pas de else, l'autre branche suit au même niveau.
+            self.emit(depth, f"if ({condition}) {then_jump}")
+            if else_inline:
+                return fallthrough
+            if else_jump:
+                self.emit(depth, else_jump)
+            return None
+        if not else_inline and else_jump:
+            self.emit(depth, f"if (!({condition})) {else_jump}")
+            return taken if then_inline else None
+        # Chaque branche est soit placée ici, soit un passage au code qui suit.
+        hot_fallthrough = (then_inline and else_inline and self.weight is not None
+                           and self.weight(fallthrough) > self.weight(taken))
+        if hot_fallthrough:
+            self.emit(depth, f"if (!({condition})) {{")
+            self.region(fallthrough, follow, loops, depth + 1)
+            self.emit(depth, "} else {")
+            self.region(taken, follow, loops, depth + 1)
+            self.emit(depth, "}")
+        elif then_inline:
+            self.emit(depth, f"if ({condition}) {{")
+            self.region(taken, follow, loops, depth + 1)
+            if else_inline:
+                self.emit(depth, "} else {")
+                self.region(fallthrough, follow, loops, depth + 1)
+            self.emit(depth, "}")
+        elif else_inline:
+            self.emit(depth, f"if (!({condition})) {{")
+            self.region(fallthrough, follow, loops, depth + 1)
+            self.emit(depth, "}")
+        return None
+
+    def jump(self, y, follow, loops):
+        if y == follow:
+            return None
+        if loops:
+            header, exit = loops[-1]
+            if y == header:
+                return "continue;"
+            if y == exit:
+                return "break;"
+        self.targets.add(y)
+        return f"goto {self.label(y)};"
+
+    def indent(self, code, depth):
+        if not depth:
+            return code
+        prefix = INDENT * depth
+        return prefix + code.replace("\n", "\n" + prefix)
@@ -43,14 +43,16 @@ class TokenType(Enum):
     EOF = auto()
 
 class Token:
-    def __init__(self, type_: TokenType, value: str = None, line: int = 0, column: int = 0):
+    __slots__ = ('type', 'value', 'line', 'column')
+
+    def __init__(self, type_: TokenType, value: str | int = None, line: int = 0, column: int = 0):
         self.type = type_
         self.value = value
         self.line = line
         self.column = column
     
     def __str__(self):
-        if self.value:
+        if self.value is not None:
             return f'Token({self.type.name}, {self.value}, line={self.line}, col={self.column})'
         return f'Token({self.type.name}, line={self.line}, col={self.column})'
     
@@ -0,0 +1,253 @@
+import time
+from .vm import (BytecodeCompiler, STACK_SIZE, MOV, ADD, SUB, MULT, DIV, AND, OR, NOT, JMP, JZ, JS, JO,
+                 INPUT, PRINT, HALT, PUSH, POP, IS_FULL, DIRECT, INDEXED)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# État d'une exécution (une voie)
+RUNNING, HALTED, FAILED, LIMITED = range(4)
+
+# Sélection de toutes les voies: une vue plutôt qu'une copie indexée.
+ALL = slice(None)
+
+def wrap_inputs(inputs):
+    matrix = np.asarray(inputs, dtype=np.int64)
+    if matrix.ndim != 2:
+        raise Exception(f"Exécution vectorisée: matrice d'entrées (N, k) attendue, "
+                        f"{matrix.ndim} dimension(s) reçue(s)")
+    return (((matrix + 0x8000) & 0xFFFF) - 0x8000).astype(np.int16)
+
+# Exécute le même bytecode sur N entrées à la fois: chaque exécution est une
+# voie, et chaque case de la mémoire plate (registres, variables, tableaux) est
+# un vecteur int16 de N valeurs. Chaque voie a son propre pc; à chaque pas on
+# exécute l'instruction du plus petit pc, sur les seules voies qui y sont
+# (masque). Après un branchement divergent, les voies se rejoignent donc au
+# premier point commun. Une erreur d'exécution n'arrête que sa voie.
+class VectorMachine:
+    def __init__(self, bytecode, inputs):
+        if np is None:
+            raise Exception("Exécution vectorisée: numpy n'est pas installé")
+        self.bytecode = bytecode
+        self.inputs = wrap_inputs(inputs)
+        lanes = self.inputs.shape[0]
+        self.lanes = lanes
+        self.memory = np.zeros((bytecode.memory_size, lanes), dtype=np.int16)
+        uses_stack = any(instr[0] == PUSH for instr in bytecode.code)
+        self.stack = np.zeros((STACK_SIZE if uses_stack else 0, lanes), dtype=np.int16)
+        self.stack_ptr = np.zeros(lanes, dtype=np.intp)
+        self.cursor = np.zeros(lanes, dtype=np.intp)
+        self.zf = np.zeros(lanes, dtype=bool)
+        self.sf = np.zeros(lanes, dtype=bool)
+        self.of = np.zeros(lanes, dtype=bool)
+        self.pc = np.zeros(lanes, dtype=np.intp)
+        # pc des voies arrêtées par max_steps, repris au run() suivant.
+        self.resume_pc = np.zeros(lanes, dtype=np.intp)
+        self.status = np.full(lanes, RUNNING, dtype=np.int8)
+        self.steps = np.zeros(lanes, dtype=np.int64)
+        self.errors = [None] * lanes
+        self.printed = []
+        # executed: pas exécutés, toutes voies confondues; cycles: instructions
+        # diffusées (executed / (cycles * N) mesure l'occupation des voies).
+        self.executed = 0
+        self.cycles = 0
+
+    def fail(self, lanes, pc, messages):
+        number = self.bytecode.numbers[pc]
+        for lane, message in zip(lanes.tolist(), messages):
+            self.errors[lane] = f"Erreur d'exécution à l'instruction {number}: {message}"
+        self.status[lanes] = FAILED
+        self.pc[lanes] = len(self.bytecode.code)
+
+    def check_index(self, lanes, rows, index_address, size, pc):
+        # Retire les voies dont l'index sort du tableau; renvoie les voies
+        # restantes et leur index.
+        index = self.memory[index_address, lanes]
+        bad = (index < 0) | (index >= size)
+        if bad.any():
+            self.fail(lanes[bad], pc, [f"index {i} hors limites" for i in index[bad].tolist()])
+            keep = ~bad
+            lanes, index = lanes[keep], index[keep]
+            if not isinstance(rows, int):
+                rows = rows[keep]
+        return lanes, index.astype(np.intp), rows
+
+    def run(self, max_steps=None):
+        code = self.bytecode.code
+        end = len(code)
+        mem = self.memory
+        pc = self.pc
+        zf, sf, of = self.zf, self.sf, self.of
+        limited = self.status == LIMITED
+        if limited.any():
+            pc[limited] = self.resume_pc[limited]
+            self.status[limited] = RUNNING
+        limit = None if max_steps is None else self.steps + max_steps
+
+        while True:
+            p = int(pc.min()) if self.lanes else end
+            if p >= end:
+                break
+            lanes = np.flatnonzero(pc == p)
+            if limit is not None:
+                over = self.steps[lanes] >= limit[lanes]
+                if over.any():
+                    stopped = lanes[over]
+                    self.resume_pc[stopped] = p
+                    self.status[stopped] = LIMITED
+                    pc[stopped] = end
+                    lanes = lanes[~over]
+                    if not len(lanes):
+                        continue
+            sel = ALL if len(lanes) == self.lanes else lanes
+            self.steps[sel] += 1
+            self.executed += len(lanes)
+            self.cycles += 1
+            op, dest, dest_size, dest_index, mode, source, source_size, source_index = code[p]
+
+            # Comme dans la machine virtuelle: l'index de la destination est
+            # vérifié avant celui de la source.
+            rows = dest
+            if dest_index >= 0:
+                lanes, index, _ = self.check_index(lanes, 0, dest_index, dest_size, p)
+                rows = dest + index
+                sel = ALL if len(lanes) == self.lanes else lanes
+            if mode == DIRECT:
+                src = mem[source, sel]
+            elif mode == INDEXED:
+                lanes, index, rows = self.check_index(lanes, rows, source_index, source_size, p)
+                sel = ALL if len(lanes) == self.lanes else lanes
+                src = mem[source + index, lanes]
+            else:
+                src = source
+            if not len(lanes):
+                continue
+            at = (rows, sel) if isinstance(rows, int) else (rows, lanes)
+
+            if op == MOV:
+                mem[at] = src
+            elif op <= NOT:
+                value = mem[at].astype(np.int32)
+                if op == ADD:
+                    result = value + src
+                elif op == SUB:
+                    result = value - src
+                elif op == MULT:
+                    result = value * src
+                elif op == DIV:
+                    divisor = np.broadcast_to(np.asarray(src, dtype=np.int32), value.shape)
+                    zero = divisor == 0
+                    if zero.any():
+                        self.fail(lanes[zero], p, ["division par zéro"] * int(zero.sum()))
+                        keep = ~zero
+                        lanes, value, divisor = lanes[keep], value[keep], divisor[keep]
+                        sel = lanes
+                        at = (rows, sel) if isinstance(rows, int) else (rows[keep], lanes)
+                    result = np.abs(value) // np.abs(divisor)
+                    result = np.where((value < 0) != (divisor < 0), -result, result)
+                elif op == AND:
+                    result = value & src
+                elif op == OR:
+                    result = value | src
+                else:
+                    result = ~value
+                wrapped = result.astype(np.int16)
+                mem[at] = wrapped
+                zf[sel] = wrapped == 0
+                sf[sel] = wrapped < 0
+                of[sel] = wrapped != result
+            elif op == JMP:
+                pc[sel] = dest
+                continue
+            elif op in (JZ, JS, JO):
+                flag = zf if op == JZ else sf if op == JS else of
+                pc[sel] = np.where(flag[sel], dest, p + 1)
+                continue
+            elif op == INPUT:
+                cursor = self.cursor[lanes]
+                missing = cursor >= self.inputs.shape[1]
+                if missing.any():
+                    self.fail(lanes[missing], p, [f"entrée {c + 1} absente" for c in cursor[missing].tolist()])
+                    keep = ~missing
+                    lanes, cursor = lanes[keep], cursor[keep]
+                    sel = lanes
+                    at = (rows, sel) if isinstance(rows, int) else (rows[keep], lanes)
+                mem[at] = self.inputs[lanes, cursor]
+                self.cursor[sel] = cursor + 1
+            elif op == PRINT:
+                # Copie: src peut être une vue sur la mémoire.
+                self.printed.append((lanes, np.array(np.broadcast_to(src, lanes.shape), dtype=np.int16)))
+            elif op == PUSH:
+                stack_ptr = self.stack_ptr[lanes]
+                room = stack_ptr < STACK_SIZE
+                values = np.broadcast_to(np.asarray(src, dtype=np.int16), lanes.shape)
+                self.stack[stack_ptr[room], lanes[room]] = values[room]
+                self.stack_ptr[lanes] = stack_ptr + room
+            elif op == POP:
+                stack_ptr = self.stack_ptr[lanes]
+                full = stack_ptr > 0
+                if len(self.stack):
+                    values = np.where(full, self.stack[np.maximum(stack_ptr - 1, 0), lanes], 0)
+                else:
+                    values = 0
+                mem[at] = values
+                self.stack_ptr[sel] = stack_ptr - full
+            elif op == IS_FULL:
+                zf[sel] = self.stack_ptr[sel] >= STACK_SIZE
+            elif op == HALT:
+                pc[sel] = end
+                continue
+            pc[sel] = p + 1
+
+        running = self.status == RUNNING
+        self.status[running & (pc >= end)] = HALTED
+        return self.executed
+
+    @property
+    def halted(self):
+        return self.status == HALTED
+
+    def read(self, name):
+        # Valeur de la variable pour chaque voie: (N,) ou (N, taille) pour un tableau.
+        address, size, array = self.bytecode.layout[name]
+        if array:
+            return self.memory[address:address + size].T.copy()
+        return self.memory[address].copy()
+
+    def outputs(self):
+        # Valeurs affichées par chaque voie, dans l'ordre d'exécution.
+        if not self.printed:
+            return [[] for _ in range(self.lanes)]
+        lanes = np.concatenate([chunk[0] for chunk in self.printed])
+        values = np.concatenate([chunk[1] for chunk in self.printed])
+        order = np.argsort(lanes, kind='stable')
+        counts = np.bincount(lanes, minlength=self.lanes)
+        return [chunk.tolist() for chunk in np.split(values[order], np.cumsum(counts)[:-1])]
+
+def read_input_matrix(path):
+    # Une exécution par ligne: ses entrées séparées par des espaces ou des virgules.
+    rows = []
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            fields = line.replace(',', ' ').split()
+            if not fields:
+                continue
+            try:
+                rows.append([int(field) for field in fields])
+            except ValueError:
+                raise Exception(f"Entrées: valeur non entière à la ligne {number} de '{path}'")
+            if len(rows[-1]) != len(rows[0]):
+                raise Exception(f"Entrées: la ligne {number} de '{path}' a {len(rows[-1])} valeur(s), "
+                                f"{len(rows[0])} attendue(s)")
+    if not rows:
+        raise Exception(f"Entrées: aucune exécution dans '{path}'")
+    return rows
+
+def run_vectorized(ast, symbol_table, inputs, max_steps=None):
+    bytecode = BytecodeCompiler(ast, symbol_table).compile()
+    machine = VectorMachine(bytecode, inputs)
+    start = time.perf_counter()
+    machine.run(max_steps)
+    return machine, time.perf_counter() - start
@@ -0,0 +1,241 @@
+import sys
+import time
+from .token import TokenType
+from .ast import Number, Variable, Register, ArrayAccess
+
+STACK_SIZE = 1024
+REGISTERS = ('AX', 'BX', 'CX', 'DX')
+
+# Codes d'opération du bytecode
+MOV, ADD, SUB, MULT, DIV, AND, OR, NOT = range(8)
+JMP, JZ, JS, JO = range(8, 12)
+INPUT, PRINT, HALT, PUSH, POP, IS_FULL = range(12, 18)
+
+OPCODES = {
+    TokenType.MOV: MOV, TokenType.ADD: ADD, TokenType.SUB: SUB, TokenType.MULT: MULT,
+    TokenType.DIV: DIV, TokenType.AND: AND, TokenType.OR: OR, TokenType.NOT: NOT,
+    TokenType.JMP: JMP, TokenType.JZ: JZ, TokenType.JS: JS, TokenType.JO: JO,
+    TokenType.INPUT: INPUT, TokenType.PRINT: PRINT, TokenType.HALT: HALT,
+    TokenType.PUSH: PUSH, TokenType.POP: POP, TokenType.IS_FULL: IS_FULL,
+}
+
+# Modes d'adressage de l'opérande source
+NONE, IMMEDIATE, DIRECT, INDEXED = range(4)
+
+def wrap16(value):
+    return ((value + 0x8000) & 0xFFFF) - 0x8000
+
+class Bytecode:
+    def __init__(self, code, numbers, layout, memory_size):
+        self.code = code
+        self.numbers = numbers
+        self.layout = layout
+        self.memory_size = memory_size
+
+# Abaisse le Program vérifié vers une liste de tuples
+#   (op, dest, dest_size, dest_index, mode, source, source_size, source_index)
+# où dest/source sont des cases de la mémoire plate (registres, variables puis
+# tableaux), dest_index/source_index la case de la variable d'index (-1 sinon)
+# et où la cible d'un saut est déjà l'indice de l'instruction dans code.
+class BytecodeCompiler:
+    def __init__(self, ast, symbol_table):
+        self.ast = ast
+        self.symbol_table = symbol_table
+        self.layout = {}
+        self.memory_size = 0
+
+    def compile(self):
+        # Mémoire plate = arène de la table des symboles: registres, variables
+        # les plus utilisées d'abord, puis tableaux.
+        arena = self.symbol_table.layout(self.ast.instructions)
+        for name in REGISTERS:
+            self.layout[name] = (arena[name], 1, False)
+        for name, symbol in self.symbol_table.symbols.items():
+            self.layout[name] = (arena[name], arena.sizes[name], symbol.type == 'array')
+        self.memory_size = arena.data_size
+
+        instructions = [instr for instr in self.ast.instructions if instr.operation]
+        targets = {}
+        for index, instr in enumerate(self.ast.instructions):
+            if self.symbol_table.has_instruction(instr.number):
+                targets.setdefault(instr.number, index)
+        # Les instructions sans opération ne sont pas émises: leur label désigne la suivante.
+        position = 0
+        positions = {}
+        for index, instr in enumerate(self.ast.instructions):
+            positions[index] = position
+            if instr.operation:
+                position += 1
+        labels = {number: positions[index] for number, index in targets.items()}
+
+        code = [self.compile_instruction(instr, labels) for instr in instructions]
+        numbers = [instr.number for instr in instructions]
+        return Bytecode(code, numbers, self.layout, self.memory_size)
+
+    def compile_instruction(self, instruction, labels):
+        op = instruction.operation
+        opcode = OPCODES.get(op.type)
+        if opcode is None:
+            raise Exception(f"Erreur d'exécution: instruction {op.type.name} non supportée "
+                            f"(instruction {instruction.number})")
+
+        if opcode in (JMP, JZ, JS, JO):
+            target = op.operand1.value
+            if target not in labels:
+                raise Exception(f"Erreur sémantique: Label d'instruction {target} non défini")
+            return (opcode, labels[target], 0, -1, NONE, 0, 0, -1)
+
+        if opcode in (HALT, IS_FULL):
+            return (opcode, 0, 0, -1, NONE, 0, 0, -1)
+
+        if opcode in (PRINT, PUSH):
+            return (opcode, 0, 0, -1) + self.compile_source(op.operand1)
+
+        dest = self.compile_destination(op.operand1, instruction)
+        if opcode in (NOT, INPUT, POP):
+            return (opcode,) + dest + (NONE, 0, 0, -1)
+        return (opcode,) + dest + self.compile_source(op.operand2)
+
+    def compile_destination(self, operand, instruction):
+        if isinstance(operand, Number):
+            raise Exception(f"Erreur sémantique: Destination constante à l'instruction {instruction.number}")
+        return self.compile_source(operand)[1:]
+
+    def compile_source(self, operand):
+        if isinstance(operand, Number):
+            return (IMMEDIATE, wrap16(operand.value), 0, -1)
+        if isinstance(operand, (Variable, Register)):
+            return (DIRECT, self.layout[operand.name][0], 0, -1)
+        if isinstance(operand, ArrayAccess):
+            base, size, _ = self.layout[operand.name]
+            if isinstance(operand.index, Number):
+                if not 0 <= operand.index.value < size:
+                    raise Exception(f"Erreur sémantique: Index hors limites pour le tableau '{operand.name}'")
+                return (DIRECT, base + operand.index.value, 0, -1)
+            return (INDEXED, base, size, self.layout[operand.index.name][0])
+        raise Exception(f"Opérande invalide: {type(operand).__name__}")
+
+class VirtualMachine:
+    def __init__(self, bytecode, input_fn=None, output_fn=None):
+        self.bytecode = bytecode
+        self.input_fn = input_fn or (lambda: int(input("Input: ")))
+        self.output_fn = output_fn or print
+        self.memory = [0] * bytecode.memory_size
+        self.stack = []
+        self.zf = self.sf = self.of = False
+        self.pc = 0
+        self.steps = 0
+
+    def error(self, pc, message):
+        raise Exception(f"Erreur d'exécution à l'instruction {self.bytecode.numbers[pc]}: {message}")
+
+    def run(self, max_steps=None):
+        code = self.bytecode.code
+        end = len(code)
+        mem = self.memory
+        stack = self.stack
+        read = self.input_fn
+        write = self.output_fn
+        zf, sf, of = self.zf, self.sf, self.of
+        pc = self.pc
+        steps = self.steps
+        limit = sys.maxsize if max_steps is None else steps + max_steps
+
+        # try/finally: après une erreur d'exécution, pc et steps restent à jour.
+        try:
+            while pc < end and steps < limit:
+                op, dest, dest_size, dest_index, mode, source, source_size, source_index = code[pc]
+                pc += 1
+                steps += 1
+
+                if dest_index >= 0:
+                    i = mem[dest_index]
+                    if i < 0 or i >= dest_size:
+                        self.error(pc - 1, f"index {i} hors limites")
+                    dest += i
+                if mode == DIRECT:
+                    source = mem[source]
+                elif mode == INDEXED:
+                    i = mem[source_index]
+                    if i < 0 or i >= source_size:
+                        self.error(pc - 1, f"index {i} hors limites")
+                    source = mem[source + i]
+
+                if op == MOV:
+                    mem[dest] = source
+                    continue
+                if op == JZ:
+                    if zf:
+                        pc = dest
+                    continue
+                if op == JMP:
+                    pc = dest
+                    continue
+                if op <= NOT:
+                    value = mem[dest]
+                    if op == ADD:
+                        result = value + source
+                    elif op == SUB:
+                        result = value - source
+                    elif op == MULT:
+                        result = value * source
+                    elif op == DIV:
+                        if source == 0:
+                            self.error(pc - 1, "division par zéro")
+                        result = abs(value) // abs(source)
+                        if (value < 0) != (source < 0):
+                            result = -result
+                    elif op == AND:
+                        result = value & source
+                    elif op == OR:
+                        result = value | source
+                    else:
+                        result = ~value
+                    wrapped = ((result + 0x8000) & 0xFFFF) - 0x8000
+                    mem[dest] = wrapped
+                    zf = wrapped == 0
+                    sf = wrapped < 0
+                    of = wrapped != result
+                    continue
+                if op == JS:
+                    if sf:
+                        pc = dest
+                elif op == JO:
+                    if of:
+                        pc = dest
+                elif op == INPUT:
+                    mem[dest] = wrap16(read())
+                elif op == PRINT:
+                    write(source)
+                elif op == PUSH:
+                    if len(stack) < STACK_SIZE:
+                        stack.append(source)
+                elif op == POP:
+                    mem[dest] = stack.pop() if stack else 0
+                elif op == IS_FULL:
+                    zf = len(stack) >= STACK_SIZE
+                else:
+                    pc = end
+                    break
+        finally:
+            self.zf, self.sf, self.of = zf, sf, of
+            self.pc = pc
+            self.steps = steps
+        return steps
+
+    @property
+    def halted(self):
+        return self.pc >= len(self.bytecode.code)
+
+    def read(self, name):
+        address, size, array = self.bytecode.layout[name]
+        if array:
+            return self.memory[address:address + size]
+        return self.memory[address]
+
+def run_program(ast, symbol_table, input_fn=None, output_fn=None, max_steps=None):
+    bytecode = BytecodeCompiler(ast, symbol_table).compile()
+    vm = VirtualMachine(bytecode, input_fn, output_fn)
+    start = time.perf_counter()
+    vm.run(max_steps)
+    return vm, time.perf_counter() - start
@@ -0,0 +1,44 @@
+import random
+
+from benchmarks.generator import (ProgramShape, DEFAULT_MIX, generate_shaped_program, generate_collatz_program,
+                                  generate_loop_program, generate_array_program, generate_stack_program,
+                                  generate_flag_program, generate_branch_program)
+from src.differential import CorpusProgram, DifferentialHarness
+
+MAX_STEPS = 2_000_000
+
+# Petit corpus pour les tests différentiels: boucles fixes et programmes
+# aléatoires (input, div, tableaux: erreurs d'exécution comprises), chacun
+# avec runs flux d'entrées, comme benchmarks/differential.py en plus petit.
+def corpus(count=20, seed=0, runs=3, values=64):
+    rng = random.Random(seed)
+    # Les variables valent 0 au départ: sans div, un programme sur deux va plus loin.
+    mixes = [dict(DEFAULT_MIX, input=1, halt=0.05), dict(DEFAULT_MIX, input=1, halt=0.05, div=0)]
+    programs = [('collatz', generate_collatz_program(4)), ('tableau', generate_loop_program(20, 16)),
+                ('deux_tableaux', generate_array_program(4, 24)), ('pile', generate_stack_program(4, 40)),
+                ('flags', generate_flag_program(20, 30)), ('branches', generate_branch_program(10, 20))]
+    for i in range(count):
+        shape = ProgramShape(rng.randint(20, 200), variables=rng.randint(1, 6), arrays=rng.randint(0, 2),
+                             array_size=rng.randint(1, 16), jump_density=rng.random() * 0.25,
+                             loop_depth=rng.randint(0, 2), loop_iterations=rng.randint(2, 12), mix=mixes[i % 2])
+        programs.append((f'aleatoire_{i:03d}', generate_shaped_program(shape, seed + i)))
+    result = []
+    for name, source in programs:
+        low = 1 if name == 'collatz' else -40000
+        inputs = [[rng.randint(low, 40000) for _ in range(values)] for _ in range(runs)]
+        result.append(CorpusProgram(name, source, inputs))
+    return result
+
+# Exécute le corpus avec chaque variante et vérifie qu'elle donne les mêmes
+# valeurs affichées et les mêmes erreurs d'exécution que le VM non optimisé.
+def assert_same_outcomes(testcase, variants, programs=None, **harness_options):
+    harness = DifferentialHarness(variants, repeat=1, max_steps=MAX_STEPS, **harness_options)
+    report = harness.run(programs or corpus())
+    for entry in report['programs']:
+        testcase.assertNotIn('error', entry, entry['name'])
+        for result in entry['variants'][1:]:
+            with testcase.subTest(program=entry['name'], variant=result['variant']):
+                testcase.assertIn(result['status'], ('ok', 'ignoré'), result.get('detail'))
+    compared = sum(result.get('runs') or 0 for entry in report['programs'] for result in entry['variants'][1:])
+    testcase.assertGreater(compared, 0)
+    return report
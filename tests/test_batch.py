@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.batch import compile_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOOP_PROGRAM = ("Var\ni:byte, t:Array[4]\nInstructions\n0: mov i,0;\n1: mov t[i],i;\n2: add i,1;\n"
+                "3: mov AX,i;\n4: sub AX,4;\n5: jz 7;\n6: jmp 1;\n7: print t[3];\n")
+PRINT_PROGRAM = "Var\nx:byte\nInstructions\n0: mov x,7;\n1: print x;\n"
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sources = []
+        for name, source in (('boucle', LOOP_PROGRAM), ('affiche', PRINT_PROGRAM)):
+            path = os.path.join(self.directory.name, name + '.projet')
+            with open(path, 'w') as f:
+                f.write(source)
+            self.sources.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def compile(self, **options):
+        results = list(compile_batch(self.sources, workers=1, use_cache=False, **options))
+        self.assertEqual([result.error for result in results], [None, None])
+        with open(results[0].output) as f:
+            return results[0].output, f.read()
+
+    def test_options_reach_every_file(self):
+        _, structured = self.compile()
+        self.assertIn("for (;;)", structured)
+        _, goto = self.compile(options={'structured': False, 'profile': 'fast', 'range_analysis': False})
+        self.assertIn("goto L1;", goto)
+        self.assertNotIn("atexit(report)", goto)
+        _, checked = self.compile(options={'range_analysis': False})
+        self.assertIn("check_index(v_i", checked)
+
+    def test_asm_writes_assembly(self):
+        output, code = self.compile(asm=True)
+        self.assertTrue(output.endswith('boucle.s'))
+        self.assertIn("main:", code)
+
+    def test_single_file_options_are_rejected(self):
+        for option in (('--stream',), ('--instrument', 'profil.txt'), ('--use-profile', 'profil.txt')):
+            with self.subTest(option=option):
+                result = subprocess.run([sys.executable, 'main.py', *self.sources, *option, '--no-cache'],
+                                        cwd=ROOT, capture_output=True, text=True)
+                self.assertEqual(result.returncode, 1)
+                self.assertIn(f"{option[0]} incompatible(s)", result.stdout)
+                self.assertFalse(os.path.exists(os.path.splitext(self.sources[0])[0] + '.c'))
@@ -0,0 +1,138 @@
+import unittest
+
+from benchmarks.generator import generate_program
+from src.pipeline import analyze
+from src.cfg import (ControlFlowGraph, Liveness, ConstantPropagation, ReachingDefinitions, NOT_A_CONSTANT, ZF,
+                     FLAGS, scalar_bits, scalar_name, instruction_effects, immediate_dominators, natural_loops)
+
+# Blocs: [0] mov i | [1-3] tête | [4-6] corps | [7] halt | [8] inaccessible
+LOOP_PROGRAM = """Var
+i:byte, t:byte
+Instructions
+0: mov i,0;
+1: mov t,i;
+2: sub t,3;
+3: jz 7;
+4: print i;
+5: add i,1;
+6: jmp 1;
+7: halt;
+8: print i;
+"""
+
+DIAMOND_PROGRAM = """Var
+x:byte, y:byte, z:byte
+Instructions
+0: input x;
+1: jz 5;
+2: mov y,1;
+3: mov z,2;
+4: jmp 7;
+5: mov y,1;
+6: mov z,3;
+7: print y;
+8: print z;
+"""
+
+def graph(source):
+    ast, symbol_table = analyze(source)
+    return ControlFlowGraph(ast.instructions), symbol_table
+
+class ControlFlowGraphTest(unittest.TestCase):
+    def test_blocks_and_edges(self):
+        cfg, _ = graph(LOOP_PROGRAM)
+        self.assertEqual([(block.start, block.end) for block in cfg.blocks],
+                         [(0, 1), (1, 4), (4, 7), (7, 8), (8, 9)])
+        self.assertEqual([block.successors for block in cfg.blocks], [[1], [3, 2], [1], [], []])
+        self.assertEqual([sorted(block.predecessors) for block in cfg.blocks], [[], [0, 2], [1], [1], []])
+        self.assertEqual(cfg.instruction_successors(3), [7, 4])
+        self.assertEqual(cfg.instruction_successors(4), [5])
+
+    def test_unreachable_blocks_come_last(self):
+        cfg, _ = graph(LOOP_PROGRAM)
+        self.assertEqual(cfg.reachable(), {0, 1, 2, 3})
+        order = cfg.reverse_postorder()
+        self.assertEqual(order[0], 0)
+        self.assertEqual(order[-1], 4)
+        self.assertEqual(sorted(order), list(range(5)))
+
+    def test_dominators_and_natural_loops(self):
+        cfg, _ = graph(LOOP_PROGRAM)
+        idom = immediate_dominators(cfg)
+        self.assertEqual(idom, [0, 0, 1, 1, None])
+        self.assertEqual(natural_loops(cfg, idom), {1: {1, 2}})
+
+    def test_liveness_of_variables_and_flags(self):
+        cfg, symbol_table = graph(LOOP_PROGRAM)
+        bits = scalar_bits(symbol_table)
+        live_out = Liveness(cfg, symbol_table).live_out(cfg)
+        self.assertTrue(live_out[0] & bits['i'])
+        self.assertFalse(live_out[0] & bits['t'])
+        self.assertEqual(live_out[2] & FLAGS, ZF)
+        # add i,1: i relu par la tête de boucle, ses flags écrasés par sub avant tout saut.
+        self.assertTrue(live_out[5] & bits['i'])
+        self.assertFalse(live_out[5] & FLAGS)
+        self.assertEqual(live_out[7], 0)
+
+    def test_constants_meet_at_joins(self):
+        cfg, symbol_table = graph(DIAMOND_PROGRAM)
+        before, _ = ConstantPropagation(cfg, symbol_table).solve(cfg)
+        join = before[cfg.block_of[7]]
+        self.assertEqual(join['y'], 1)
+        self.assertIs(join['z'], NOT_A_CONSTANT)
+        self.assertIs(join['x'], NOT_A_CONSTANT)
+
+    def test_constants_in_loops_are_not_constant(self):
+        cfg, symbol_table = graph(LOOP_PROGRAM)
+        before, _ = ConstantPropagation(cfg, symbol_table).solve(cfg)
+        self.assertIs(before[1]['i'], NOT_A_CONSTANT)
+        self.assertEqual(before[1]['AX'], 0)
+
+def defined_name(cfg, bits, index):
+    _, defs = instruction_effects(cfg.instructions[index], bits)
+    return scalar_name(cfg.instructions[index].operation.operand1) if defs & ~FLAGS else None
+
+def reaching_by_paths(cfg, bits):
+    # Référence: la définition d atteint i s'il existe un chemin de d à i sans
+    # autre définition de la même variable.
+    result = [{} for _ in cfg.instructions]
+    for d in range(len(cfg.instructions)):
+        name = defined_name(cfg, bits, d)
+        if name is None:
+            continue
+        seen = set()
+        stack = list(cfg.instruction_successors(d))
+        while stack:
+            i = stack.pop()
+            if i in seen:
+                continue
+            seen.add(i)
+            result[i].setdefault(name, set()).add(d)
+            if defined_name(cfg, bits, i) != name:
+                stack.extend(cfg.instruction_successors(i))
+    return result
+
+class ReachingDefinitionsTest(unittest.TestCase):
+    def test_definitions_reaching_a_join(self):
+        cfg, symbol_table = graph(DIAMOND_PROGRAM)
+        analysis = ReachingDefinitions(cfg, symbol_table)
+        before, _ = analysis.solve(cfg)
+        self.assertEqual(analysis.reaching(before, 7), {'x': {0}, 'y': {2, 5}, 'z': {3, 6}})
+        self.assertEqual(analysis.reaching(before, 3), {'x': {0}, 'y': {2}})
+
+    def test_loop_carried_definitions(self):
+        cfg, symbol_table = graph(LOOP_PROGRAM)
+        analysis = ReachingDefinitions(cfg, symbol_table)
+        before, _ = analysis.solve(cfg)
+        self.assertEqual(analysis.reaching(before, 1), {'i': {0, 5}, 't': {2}})
+        self.assertEqual(analysis.reaching(before, 3), {'i': {0, 5}, 't': {2}})
+
+    def test_matches_path_search(self):
+        for seed in range(6):
+            cfg, symbol_table = graph(generate_program(60, seed))
+            analysis = ReachingDefinitions(cfg, symbol_table)
+            before, _ = analysis.solve(cfg)
+            expected = reaching_by_paths(cfg, analysis.bits)
+            for index in range(len(cfg.instructions)):
+                with self.subTest(seed=seed, instruction=index):
+                    self.assertEqual(analysis.reaching(before, index), expected[index])
@@ -0,0 +1,80 @@
+import platform
+import shutil
+import unittest
+
+from src.pipeline import analyze
+from src.compiler_to_asm import AsmCompiler
+from src.native import AsmBuilder
+from src.vm import run_program
+from src.differential import Variant, CorpusProgram
+from tests.programs import corpus, assert_same_outcomes
+
+# Les flags de sub doivent survivre à print, push, pop, input et à la
+# vérification d'index avant le saut.
+FLAGS_PROGRAM = """Var
+x:byte, i:byte, t:Array[3]
+Instructions
+0: input x;
+1: input i;
+2: sub x,5;
+3: print x;
+4: push x;
+5: mov t[i],x;
+6: pop AX;
+7: jz 11;
+8: js 12;
+9: print 1;
+10: halt;
+11: print 2;
+12: mov x,32767;
+13: sub x,t[i];
+14: mov AX,x;
+15: jo 17;
+16: print 3;
+17: print AX;
+18: mult x,x;
+19: jo 21;
+20: print 4;
+21: div x,i;
+22: print x;
+"""
+
+def vm_outcome(source, inputs):
+    ast, symbol_table = analyze(source)
+    output = []
+    values = iter(inputs)
+    try:
+        run_program(ast, symbol_table, lambda: next(values), output.append)
+    except Exception as e:
+        return output, str(e)
+    return output, None
+
+@unittest.skipIf(shutil.which('as') is None or shutil.which('cc') is None or platform.machine() != 'x86_64',
+                 "assembleur x86-64 absent")
+class AsmCompilerTest(unittest.TestCase):
+    def test_corpus_matches_vm(self):
+        assert_same_outcomes(self, [Variant('asm', 0), Variant('asm', 2)])
+
+    def test_flags_survive_non_arithmetic_instructions(self):
+        inputs = [[5, 0], [5, 2], [4, 1], [9, 2], [0, 0], [-32768, 1], [5, 3], [200, 1]]
+        assert_same_outcomes(self, [Variant('asm', 0), Variant('asm', 2)],
+                             [CorpusProgram('flags_asm', FLAGS_PROGRAM, inputs)])
+
+    def test_runtime_error_message_and_exit_code(self):
+        ast, symbol_table = analyze(FLAGS_PROGRAM)
+        code = AsmCompiler(ast, symbol_table).generate_asm_code()
+        builder = AsmBuilder(use_cache=False)
+        for inputs in ([5, 3], [5, 0]):
+            with self.subTest(inputs=inputs):
+                # Sans cache, l'exécutable est supprimé après son exécution.
+                result = builder.run(builder.build(code), input=''.join(f'{value}\n' for value in inputs),
+                                     capture_output=True, text=True)
+                output, error = vm_outcome(FLAGS_PROGRAM, inputs)
+                self.assertNotEqual(result.returncode, 0)
+                self.assertEqual(result.stdout.replace('Input: ', '').split(), [str(value) for value in output])
+                self.assertIn(error, result.stderr)
+
+    def test_call_is_rejected(self):
+        ast, symbol_table = analyze("Var\nx:byte\nInstructions\n0: call x;\n")
+        with self.assertRaisesRegex(Exception, "instruction CALL non supportée"):
+            AsmCompiler(ast, symbol_table).generate_asm_code()
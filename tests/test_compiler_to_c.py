@@ -0,0 +1,72 @@
+import shutil
+import unittest
+
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler
+from src.native import NativeBuilder
+from src.differential import Variant
+from tests.programs import assert_same_outcomes
+
+# Dépassement de capacité, push sur pile pleine puis pop sur pile vide.
+REPORT_PROGRAM = """Var
+x:byte, n:byte
+Instructions
+0: mov x,32767;
+1: add x,1;
+2: print x;
+3: push n;
+4: add n,1;
+5: isFull;
+6: jz 8;
+7: jmp 3;
+8: push 1;
+9: pop x;
+10: print n;
+11: pop x;
+12: sub n,1;
+13: jz 15;
+14: jmp 11;
+15: pop x;
+16: print x;
+"""
+
+def generate(source, **options):
+    ast, symbol_table = analyze(source)
+    return CCompiler(ast, symbol_table, **options).generate_c_code()
+
+@unittest.skipIf(shutil.which('cc') is None, "compilateur C absent")
+class CProfilesTest(unittest.TestCase):
+    def test_profiles_match_vm(self):
+        assert_same_outcomes(self, [Variant('c', 0, 'checked', copt='0'), Variant('c', 0, 'checked', copt='2'),
+                                    Variant('c', 0, 'fast', copt='2')])
+
+    def test_checked_profile_reports_overflows(self):
+        builder = NativeBuilder(use_cache=False)
+        result = builder.run(builder.build(generate(REPORT_PROGRAM)), capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.split(), ['-32768', '1024', '0'])
+        self.assertIn("1 dépassement(s) de capacité", result.stderr)
+        self.assertIn("1 push ignoré(s): pile pleine", result.stderr)
+        self.assertIn("2 pop sur pile vide", result.stderr)
+
+    def test_fast_profile_does_not_report(self):
+        builder = NativeBuilder(use_cache=False)
+        result = builder.run(builder.build(generate(REPORT_PROGRAM, profile='fast')), capture_output=True, text=True)
+        self.assertEqual(result.stdout.split(), ['-32768', '1024', '0'])
+        self.assertEqual(result.stderr, '')
+
+class CProfilesCodeTest(unittest.TestCase):
+    def test_fast_profile_keeps_state_in_locals_without_checks(self):
+        source = "Var\nx:byte, t:Array[4]\nInstructions\n0: input x;\n1: mov t[x],1;\n2: push t[x];\n"
+        fast = generate(source, profile='fast')
+        checked = generate(source)
+        self.assertIn("static inline int push(", fast)
+        self.assertIn("int16_t AX = 0", fast)
+        self.assertNotIn("check_index(v_x", fast)
+        self.assertIn("check_index(v_x", checked)
+        self.assertIn("atexit(report)", checked)
+
+    def test_unknown_profile_is_rejected(self):
+        ast, symbol_table = analyze("Var\nx:byte\nInstructions\n0: halt;\n")
+        with self.assertRaisesRegex(Exception, "Profil de génération C inconnu"):
+            CCompiler(ast, symbol_table, profile='rapide')
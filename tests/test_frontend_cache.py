@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+
+from benchmarks.generator import generate_program
+from src.pipeline import analyze
+from src.frontend_cache import FrontendCache, MAGIC
+from src.compiler_to_c import CCompiler
+from src.compiler_to_asm import AsmCompiler
+
+# t[i] est prouvé dans les bornes, t[x] (lu au clavier) ne l'est pas.
+BOUNDS_PROGRAM = """Var
+i:byte, x:byte, t:Array[4]
+Instructions
+0: mov i,0;
+1: mov t[i],1;
+2: input x;
+3: mov t[x],2;
+4: print t[i];
+5: halt;
+"""
+
+class FrontendCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = FrontendCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def compile_twice(self, source, structured):
+        # Code C d'une compilation sans le cache puis d'une compilation servie par le cache.
+        outputs = []
+        for _ in range(2):
+            ast, symbol_table = analyze(source, self.cache)
+            outputs.append(CCompiler(ast, symbol_table, structured=structured).generate_c_code())
+        return outputs
+
+    def test_cache_hit_generates_same_c(self):
+        for source in (BOUNDS_PROGRAM, generate_program(40, 0), generate_program(40, 35)):
+            for structured in (True, False):
+                with self.subTest(source=source[:40], structured=structured):
+                    self.cache = FrontendCache(self.directory.name)
+                    self.cache.clear()
+                    miss, hit = self.compile_twice(source, structured)
+                    self.assertEqual(self.cache.hits, 1)
+                    self.assertEqual(miss, hit)
+
+    def test_proven_access_is_not_checked(self):
+        miss, hit = self.compile_twice(BOUNDS_PROGRAM, False)
+        self.assertNotIn('check_index(v_i', hit)
+        self.assertIn('check_index(v_x, 4, 3)', hit)
+
+    def test_cache_hit_generates_same_asm(self):
+        outputs = []
+        for _ in range(2):
+            ast, symbol_table = analyze(generate_program(40, 35), self.cache)
+            outputs.append(AsmCompiler(ast, symbol_table).generate_asm_code())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_cache_hit_returns_instruction_list(self):
+        miss, _ = analyze(BOUNDS_PROGRAM, self.cache)
+        hit, _ = analyze(BOUNDS_PROGRAM, self.cache)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertIsInstance(miss.instructions, list)
+        self.assertIsInstance(hit.instructions, list)
+
+    def test_truncated_entry_is_a_miss(self):
+        self.cache.cache.put(self.cache.key(BOUNDS_PROGRAM), MAGIC)
+        self.assertIsNone(self.cache.load(BOUNDS_PROGRAM))
+        self.assertEqual(self.cache.misses, 1)
+        self.assertIsNone(self.cache.cache.get(self.cache.key(BOUNDS_PROGRAM)))
+
+if __name__ == "__main__":
+    unittest.main()
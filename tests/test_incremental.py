@@ -0,0 +1,32 @@
+import unittest
+
+from src.incremental import CompilationSession
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler
+
+DUPLICATE_LABELS = """Var
+x:byte
+Instructions
+0: mov x,1;
+1: print x;
+1: add x,1;
+2: jz 1;
+0: halt;
+"""
+
+def full_compile(source):
+    ast, symbol_table = analyze(source)
+    return CCompiler(ast, symbol_table, range_analysis=False, structured=False).generate_c_code()
+
+class CompilationSessionTest(unittest.TestCase):
+    def test_duplicate_labels_match_full_compile(self):
+        session = CompilationSession(DUPLICATE_LABELS)
+        self.assertEqual(session.generate_c_code(), full_compile(DUPLICATE_LABELS))
+        # La première occurrence du label 0 disparaît: la seconde reçoit le label.
+        session.edit(3, 4, "5: mov x,2;\n")
+        code = session.generate_c_code()
+        self.assertEqual(code, full_compile(session.source()))
+        self.assertEqual(code.count("L0:"), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import tracemalloc
+import unittest
+
+from src.instrumentation import Instrumentation
+
+MB = 1024 * 1024
+
+class InstrumentationTest(unittest.TestCase):
+    def tearDown(self):
+        tracemalloc.stop()
+
+    def records(self, instrumentation):
+        return {record.name: record for record in instrumentation.records}
+
+    def test_parent_keeps_peak_reached_before_child(self):
+        instrumentation = Instrumentation(trace_memory=True)
+        with instrumentation.phase('parent'):
+            data = bytearray(50 * MB)
+            del data
+            with instrumentation.phase('enfant'):
+                small = bytearray(1024)
+                del small
+        records = self.records(instrumentation)
+        self.assertGreaterEqual(records['parent'].peak_bytes, 50 * MB)
+        self.assertGreaterEqual(records['parent'].peak_growth, 50 * MB)
+        self.assertLess(records['enfant'].peak_growth, MB)
+
+    def test_parent_includes_child_peak(self):
+        instrumentation = Instrumentation(trace_memory=True)
+        with instrumentation.phase('parent'):
+            with instrumentation.phase('enfant'):
+                data = bytearray(20 * MB)
+                del data
+        records = self.records(instrumentation)
+        self.assertGreaterEqual(records['enfant'].peak_growth, 20 * MB)
+        self.assertGreaterEqual(records['parent'].peak_growth, 20 * MB)
+
+if __name__ == "__main__":
+    unittest.main()
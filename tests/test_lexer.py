@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.generator import generate_program
+from src.lexer import Lexer, MAX_NUMBER
+from src.pipeline import analyze
+from src.parallel_frontend import parse_parallel
+from src.frontend_cache import FrontendCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Commentaires, tabulations, lignes vides, identifiants et chiffres non ASCII,
+# nombre collé à un mot, nombre de 18 et 19 chiffres.
+TRICKY_SOURCE = """# début
+Var
+\tcompteur_é:byte , tab:Array[10]#fin de ligne
+   x2:byte
+
+Instructions
+0:mov compteur_é,١٢;
+1: add x2 ,12abc;   # commentaire
+ 2 : mov tab[x2],123456789012345678;
+3: mov x2,1234567890123456789;
+4:halt;"""
+
+def tokens(lexer):
+    # Tokens produits, suivis du message d'erreur s'il y en a une.
+    result = []
+    try:
+        for token in lexer.iter_tokens():
+            result.append((token.type, token.value, token.line, token.column))
+    except Exception as e:
+        result.append(str(e))
+    return result
+
+def number_program(value):
+    return f"Var\nx:byte\nInstructions\n0: mov x,{value};\n1: print x;\n2: halt;\n"
+
+# Le lexer par expression régulière (texte et octets) doit donner exactement
+# les tokens, lignes et colonnes de l'ancien lexer caractère par caractère.
+class LexerEngineTest(unittest.TestCase):
+    def assert_same_tokens(self, source):
+        expected = tokens(Lexer(source, 'legacy'))
+        self.assertEqual(tokens(Lexer(source, 'regex')), expected)
+        self.assertEqual(tokens(Lexer(source.encode())), expected)
+
+    def test_generated_programs(self):
+        for seed in range(4):
+            with self.subTest(seed=seed):
+                self.assert_same_tokens(generate_program(300, seed))
+
+    def test_example_and_tricky_sources(self):
+        # L'exemple contient un caractère invalide: l'erreur doit aussi être la même.
+        with open(os.path.join(ROOT, 'examples', 'test.projet')) as f:
+            example = f.read()
+        self.assertTrue(tokens(Lexer(example, 'legacy'))[-1].startswith('Caractère invalide'))
+        for source in (example, TRICKY_SOURCE, TRICKY_SOURCE + '\n', '', '   ', '# seul'):
+            with self.subTest(source=source[:20]):
+                self.assert_same_tokens(source)
+
+    def test_fragment_position(self):
+        source = 'mov x,1;\n 2: print x;'
+        expected = tokens(Lexer(source, 'legacy', line=7, column=4))
+        self.assertEqual(expected[0][2:], (7, 7))
+        self.assertEqual(tokens(Lexer(source, 'regex', line=7, column=4)), expected)
+        self.assertEqual(tokens(Lexer(source.encode(), line=7, column=4)), expected)
+
+    def test_invalid_character_has_same_error(self):
+        for source in ('Var\nx:byte\nInstructions\n0: mov x,@;', '0: mov é€,1;'):
+            with self.subTest(source=source):
+                self.assertTrue(tokens(Lexer(source, 'legacy'))[-1].startswith('Caractère invalide à la ligne'))
+                self.assert_same_tokens(source)
+
+    def test_tokens_are_streamed_before_an_error(self):
+        stream = Lexer('0: mov x,1; @').iter_tokens()
+        self.assertEqual(next(stream).value, 0)
+        self.assertEqual([next(stream).value for _ in range(5)], [':', 'mov', 'x', ',', 1])
+
+class LexerNumberTest(unittest.TestCase):
+    def test_largest_number_is_accepted(self):
+        for engine in Lexer.ENGINES:
+            with self.subTest(engine=engine):
+                values = [token.value for token in Lexer(f'0: mov x,{MAX_NUMBER};', engine).iter_tokens()]
+                self.assertIn(MAX_NUMBER, values)
+        values = [token.value for token in Lexer(f'0: mov x,{MAX_NUMBER};'.encode()).iter_tokens()]
+        self.assertIn(MAX_NUMBER, values)
+
+    def test_leading_zeros_are_not_too_large(self):
+        tokens = list(Lexer('0: mov x,' + '0' * 30 + '7;').iter_tokens())
+        self.assertIn(7, [token.value for token in tokens])
+
+    def test_too_large_number_is_rejected_by_every_engine(self):
+        text = f'0: mov x,{MAX_NUMBER + 1};'
+        lexers = [Lexer(text, engine) for engine in Lexer.ENGINES] + [Lexer(text.encode())]
+        for lexer in lexers:
+            with self.subTest(engine=lexer.engine, binary=lexer.binary):
+                with self.assertRaisesRegex(Exception, 'Nombre trop grand à la ligne 1, colonne 10'):
+                    list(lexer.iter_tokens())
+
+    def test_too_large_number_is_rejected_by_every_front_end(self):
+        source = number_program(10 ** 20)
+        message = 'Nombre trop grand à la ligne 4, colonne 10'
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FrontendCache(directory)
+            for name, parse in (('sans cache', lambda: analyze(source)),
+                                ('cache', lambda: analyze(source, cache)),
+                                ('parallèle', lambda: parse_parallel(source, 2, min_chars=1))):
+                with self.subTest(front_end=name):
+                    with self.assertRaisesRegex(Exception, message):
+                        parse()
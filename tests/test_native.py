@@ -0,0 +1,57 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.cache import DiskCache
+from src.native import NativeBuilder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRINT_PROGRAM = "Var\nx:byte\nInstructions\n0: mov x,7;\n1: print x;\n"
+# i vaut 5 à l'exécution: l'index sort du tableau.
+INDEX_ERROR = "Var\ni:byte, t:Array[2]\nInstructions\n0: mov i,5;\n1: mov t[i],1;\n"
+C_PROGRAM = "#include <stdio.h>\nint main(void) { puts(\"ok\"); return 0; }\n"
+
+@unittest.skipIf(shutil.which('cc') is None, "compilateur C absent")
+class NativeBuilderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_keeps_entry_larger_than_cache(self):
+        cache = DiskCache(os.path.join(self.directory.name, 'cache'), max_bytes=0)
+        path = cache.put('cle', b'contenu')
+        self.assertTrue(os.path.exists(path))
+
+    def test_executable_larger_than_cache_still_runs(self):
+        builder = NativeBuilder(cache_dir=self.directory.name, max_cache_bytes=0)
+        build = builder.build(C_PROGRAM)
+        result = builder.run(build, capture_output=True, text=True)
+        self.assertEqual(result.stdout, "ok\n")
+
+    def main_py(self, source, *options):
+        path = os.path.join(self.directory.name, 'programme.projet')
+        with open(path, 'w') as f:
+            f.write(source)
+        return subprocess.run([sys.executable, 'main.py', path, *options, '--cache-dir', self.directory.name],
+                              cwd=ROOT, capture_output=True, text=True)
+
+    def test_run_with_zero_cache_size(self):
+        for options in (('--run',), ('--asm', '--run')):
+            with self.subTest(options=options):
+                result = self.main_py(PRINT_PROGRAM, *options, '--cache-size', '0')
+                self.assertEqual(result.returncode, 0, result.stdout)
+                self.assertEqual(result.stdout.splitlines()[-1], "7")
+
+    def test_failures_exit_non_zero(self):
+        for source, options in ((INDEX_ERROR, ('--run',)), (INDEX_ERROR, ('--asm', '--run')),
+                                (INDEX_ERROR, ('--vm',)), ("Var\nx:byte\nInstructions\n0: mov y,1;\n", ())):
+            with self.subTest(options=options):
+                self.assertNotEqual(self.main_py(source, *options).returncode, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from src.pipeline import analyze
+from src.optimizer import optimize
+from src.vm import run_program
+from src.differential import Variant
+from src.token import TokenType
+from tests.programs import assert_same_outcomes
+
+def operations(program):
+    return [(instruction.number, instruction.operation.type.name,
+             *(getattr(operand, 'value', getattr(operand, 'name', None))
+               for operand in (instruction.operation.operand1, instruction.operation.operand2) if operand))
+            for instruction in program.instructions]
+
+def source(*lines):
+    return "Var\nx:byte\nInstructions\n" + "".join(f"{number}: {line};\n" for number, line in enumerate(lines))
+
+class OptimizerTest(unittest.TestCase):
+    def test_levels_match_unoptimized_vm(self):
+        assert_same_outcomes(self, [Variant('vm', 1), Variant('vm', 2)])
+
+    def test_constants_are_folded_and_dead_stores_removed(self):
+        ast, symbol_table = analyze(source('mov x,0', 'add x,5', 'print x', 'halt', 'print x'))
+        program, _, manager = optimize(ast, symbol_table, 2)
+        self.assertEqual(operations(program), [(2, 'PRINT', 5), (3, 'HALT')])
+        self.assertEqual(manager.report['unreachable-code'], 1)
+
+    def test_jumps_are_threaded_and_arithmetic_merged(self):
+        ast, symbol_table = analyze(source('input x', 'jmp 3', 'print x', 'jmp 5', 'print 7',
+                                           'add x,1', 'sub x,3', 'print x'))
+        program, symbol_table, _ = optimize(ast, symbol_table, 2)
+        self.assertEqual(operations(program), [(0, 'INPUT', 'x'), (5, 'ADD', 'x', -2), (7, 'PRINT', 'x')])
+        self.assertEqual(symbol_table.instruction_labels, {0, 5, 7})
+
+    def test_live_flags_keep_the_arithmetic(self):
+        # zf de sub est lu par jz: sub ne peut pas devenir mov x,0.
+        ast, symbol_table = analyze(source('mov x,5', 'sub x,5', 'jz 4', 'print 1', 'print x'))
+        program, _, _ = optimize(ast, symbol_table, 2)
+        types = [instruction.operation.type for instruction in program.instructions]
+        self.assertIn(TokenType.SUB, types)
+        self.assertIn(TokenType.JZ, types)
+
+    def test_overflow_read_by_jo_blocks_merging(self):
+        # add x,1 puis sub x,1 ne valent pas add x,0 quand jo lit of.
+        ast, symbol_table = analyze(source('input x', 'add x,1', 'sub x,1', 'jo 5', 'print 1', 'print x'))
+        for level in (0, 2):
+            output = []
+            run_program(*optimize(ast, symbol_table, level)[:2], lambda: 32767, output.append)
+            with self.subTest(level=level):
+                self.assertEqual(output, [32767])
+
+    def test_faulting_access_is_not_removed(self):
+        # L'écriture dans x est morte, mais t[x] peut sortir des bornes.
+        ast, symbol_table = analyze("Var\nx:byte, y:byte, t:Array[2]\nInstructions\n"
+                                    "0: input x;\n1: mov y,t[x];\n2: halt;\n")
+        program, _, _ = optimize(ast, symbol_table, 2)
+        self.assertEqual([instruction.number for instruction in program.instructions], [0, 1, 2])
+
+    def test_source_program_is_unchanged(self):
+        ast, symbol_table = analyze(source('mov x,0', 'add x,5', 'print x', 'halt', 'print x'))
+        before = operations(ast)
+        labels = set(symbol_table.instruction_labels)
+        optimize(ast, symbol_table, 2)
+        self.assertEqual(operations(ast), before)
+        self.assertEqual(symbol_table.instruction_labels, labels)
+        program, same_table, manager = optimize(ast, symbol_table, 0)
+        self.assertIs(program, ast)
+        self.assertIs(same_table, symbol_table)
+        self.assertEqual(manager.changes, [])
@@ -0,0 +1,111 @@
+import shutil
+import unittest
+
+from benchmarks.generator import generate_loop_program, generate_array_program
+from src.pipeline import analyze
+from src.optimizer import optimize
+from src.cfg import ControlFlowGraph
+from src.ranges import RangeAnalysis, analyze_array_bounds, indexed_accesses
+from src.compiler_to_c import CCompiler
+from src.vm import BytecodeCompiler, VirtualMachine
+from src.differential import Variant
+from tests.programs import corpus, assert_same_outcomes
+
+MAX_STEPS = 20000
+
+# Chaque opération arithmétique sur les valeurs d'un compteur, positives puis négatives.
+OPERATIONS_PROGRAM = """Var
+i:byte, t:byte, u:byte
+Instructions
+0: mov i,0;
+1: mov t,i;
+2: or t,64;
+3: mov u,i;
+4: and u,5;
+5: mov AX,i;
+6: mult AX,7;
+7: mov BX,i;
+8: sub BX,20;
+9: div BX,3;
+10: mov CX,BX;
+11: not CX;
+12: mov DX,BX;
+13: and DX,i;
+14: or u,BX;
+15: add i,1;
+16: mov t,i;
+17: sub t,40;
+18: jz 20;
+19: jmp 1;
+20: halt;
+"""
+
+class RangeAnalysisTest(unittest.TestCase):
+    def check_soundness(self, ast, symbol_table, inputs):
+        # Exécute le VM pas à pas: chaque scalaire reste dans l'intervalle calculé
+        # avant l'instruction, et un accès prouvé ne sort jamais de son tableau.
+        instructions = list(ast.instructions)
+        self.assertTrue(all(instruction.operation for instruction in instructions))
+        states = RangeAnalysis(ControlFlowGraph(instructions), symbol_table).states()
+        report = analyze_array_bounds(instructions, symbol_table)
+        values = iter(inputs)
+        vm = VirtualMachine(BytecodeCompiler(ast, symbol_table).compile(), lambda: next(values), lambda value: None)
+        scalars = [name for name, (_, _, array) in vm.bytecode.layout.items() if not array]
+        for _ in range(MAX_STEPS):
+            if vm.halted:
+                break
+            index = vm.pc
+            state = states[index]
+            self.assertIsNotNone(state, f"instruction {index} atteinte mais jugée inaccessible")
+            for name in scalars:
+                low, high = state[name]
+                self.assertTrue(low <= vm.read(name) <= high, (index, name, vm.read(name), state[name]))
+            for slot, access in indexed_accesses(instructions[index].operation):
+                if (index, slot) in report.safe:
+                    self.assertTrue(0 <= vm.read(access.index.name) < symbol_table.symbols[access.name].size,
+                                    (index, access.name))
+            try:
+                vm.run(1)
+            except StopIteration:
+                break
+            except Exception as e:
+                self.assertTrue(str(e).startswith("Erreur d'exécution"), str(e))
+                break
+
+    def test_intervals_contain_every_reached_value(self):
+        for program in corpus(count=30, seed=3):
+            ast, symbol_table = analyze(program.source)
+            for level in (0, 2):
+                optimized = optimize(ast, symbol_table, level)[:2] if level else (ast, symbol_table)
+                for inputs in program.inputs:
+                    with self.subTest(program=program.name, level=level, inputs=inputs[:3]):
+                        self.check_soundness(*optimized, inputs)
+
+    def test_intervals_of_every_operation(self):
+        ast, symbol_table = analyze(OPERATIONS_PROGRAM)
+        self.check_soundness(ast, symbol_table, [])
+
+    def test_loop_counters_are_proven(self):
+        for source in (generate_loop_program(10, 16), generate_array_program(3, 24)):
+            ast, symbol_table = analyze(source)
+            report = analyze_array_bounds(list(ast.instructions), symbol_table)
+            with self.subTest(source=source[:60]):
+                self.assertGreater(report.total, 0)
+                self.assertEqual(report.proven, report.total)
+                self.assertNotIn("check_index(v_", CCompiler(ast, symbol_table, structured=False).generate_c_code())
+
+    def test_unknown_index_is_checked(self):
+        ast, symbol_table = analyze("Var\ni:byte, t:Array[4]\nInstructions\n0: input i;\n1: mov t[i],1;\n"
+                                    "2: and i,3;\n3: mov t[i],2;\n")
+        report = analyze_array_bounds(list(ast.instructions), symbol_table)
+        self.assertEqual(report.safe, {(3, 1)})
+        self.assertEqual(str(report), "1/2 accès indexés par une variable prouvés dans les bornes (50.0%)")
+        code = CCompiler(ast, symbol_table).generate_c_code()
+        self.assertEqual(code.count("check_index(v_i"), 1)
+        self.assertEqual(CCompiler(ast, symbol_table, range_analysis=False).generate_c_code().count(
+            "check_index(v_i"), 2)
+
+    @unittest.skipIf(shutil.which('cc') is None, "compilateur C absent")
+    def test_unchecked_accesses_keep_runtime_errors(self):
+        assert_same_outcomes(self, [Variant('c', 0, 'checked', copt='0'),
+                                    Variant('c', 0, 'checked', range_analysis=False, copt='0')])
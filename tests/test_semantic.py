@@ -0,0 +1,40 @@
+import unittest
+
+from benchmarks.generator import generate_program
+from src.lexer import Lexer
+from src.parser import Parser
+from src.pipeline import analyze
+from src.semantic_analyzer import SemanticAnalyzer, SemanticError
+
+INVALID_PROGRAM = """Var
+x:byte, t:Array[2]
+Instructions
+0: mov y,1;
+1: mov t[5],x;
+2: jmp 9;
+"""
+
+def parse(source):
+    return Parser(Lexer(source).iter_tokens()).parse()
+
+class SemanticAnalyzerTest(unittest.TestCase):
+    def test_analyze_collects_every_diagnostic(self):
+        diagnostics = SemanticAnalyzer().analyze(parse(INVALID_PROGRAM))
+        self.assertEqual([d.line for d in diagnostics], [4, 5, 6])
+        self.assertIn("Variable 'y' non déclarée", diagnostics[0].message)
+        self.assertIn("Index hors limites", diagnostics[1].message)
+        self.assertIn("Label d'instruction 9 non défini", diagnostics[2].message)
+
+    def test_visit_program_raises_on_errors(self):
+        with self.assertRaises(SemanticError) as context:
+            SemanticAnalyzer().visit(parse(INVALID_PROGRAM))
+        self.assertEqual(len(context.exception.diagnostics), 3)
+        with self.assertRaises(SemanticError):
+            analyze(INVALID_PROGRAM)
+
+    def test_valid_program_has_no_diagnostic(self):
+        program = parse(generate_program(200, 0))
+        analyzer = SemanticAnalyzer()
+        analyzer.visit(program)
+        self.assertEqual(analyzer.diagnostics, [])
+        self.assertIn(program.instructions[0].number, analyzer.symbol_table.instruction_labels)
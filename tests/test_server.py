@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from benchmarks.generator import generate_program
+from src.client import CompileClient
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START_TIMEOUT = 30
+MAX_STEPS = 100000
+LOOP_PROGRAM = "Var\nx:byte\nInstructions\n0: print x;\n1: jmp 0;\n"
+
+# Serveur lancé comme en production (main.py --serve) avec un seul processus
+# et un cache du front end neuf: la deuxième requête pour un même source est
+# servie par le cache.
+class CompileServerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket = os.path.join(self.directory.name, 'server.sock')
+        self.server = subprocess.Popen(
+            [sys.executable, 'main.py', '--serve', '--socket', self.socket, '-j', '1',
+             '--cache-dir', os.path.join(self.directory.name, 'cache'), '--max-steps', str(MAX_STEPS)],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + START_TIMEOUT
+        while True:
+            try:
+                self.client = CompileClient(self.socket, timeout=START_TIMEOUT)
+                break
+            except Exception:
+                if self.server.poll() is not None or time.monotonic() > deadline:
+                    self.server.kill()
+                    self.directory.cleanup()
+                    raise
+                time.sleep(0.05)
+
+    def tearDown(self):
+        try:
+            self.client.request('shutdown')
+            self.server.wait(START_TIMEOUT)
+        finally:
+            if self.server.poll() is None:
+                self.server.kill()
+                self.server.wait()
+            self.directory.cleanup()
+
+    def test_repeated_compile_returns_same_c(self):
+        for seed in (0, 35):
+            source = generate_program(60, seed)
+            ast, symbol_table = analyze(source)
+            for structured in (True, False):
+                with self.subTest(seed=seed, structured=structured):
+                    expected = CCompiler(ast, symbol_table, structured=structured).generate_c_code() + "\n"
+                    first = self.client.request('compile', source, structured=structured)
+                    second = self.client.request('compile', source, structured=structured)
+                    self.assertTrue(first.ok, first.diagnostics)
+                    self.assertTrue(second.ok, second.diagnostics)
+                    self.assertEqual(first.payload, expected)
+                    self.assertEqual(second.payload, expected)
+
+    def test_infinite_loop_stops_at_server_limit(self):
+        for max_steps, expected in ((None, MAX_STEPS), (50, 50), (10 * MAX_STEPS, MAX_STEPS)):
+            with self.subTest(max_steps=max_steps):
+                response = self.client.request('run', LOOP_PROGRAM, max_steps=max_steps)
+                self.assertFalse(response.ok)
+                self.assertTrue(response.get('limited'))
+                self.assertEqual(response.get('steps'), expected)
+                self.assertEqual(response.diagnostics, [f"Exécution: limite de {expected} instructions atteinte"])
+        response = self.client.request('run', "Var\nx:byte\nInstructions\n0: print x;\n1: halt;\n")
+        self.assertTrue(response.ok, response.diagnostics)
+        self.assertEqual(response.get('output'), [0])
+
+    def test_invalid_max_steps_is_rejected(self):
+        response = self.client.request('run', LOOP_PROGRAM, max_steps=-1)
+        self.assertFalse(response.ok)
+        self.assertIn('max_steps', response.diagnostics[0])
+
+if __name__ == "__main__":
+    unittest.main()
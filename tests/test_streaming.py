@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.streaming import compile_file_stream
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYNTAX_ERROR = "Var\nx:byte\nInstructions\n0: mov x 1;\n"
+
+class StreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, 'erreur.projet')
+        self.output = os.path.join(self.directory.name, 'erreur.c')
+        with open(self.source, 'w') as f:
+            f.write(SYNTAX_ERROR)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_syntax_error_keeps_its_message(self):
+        with self.assertRaises(Exception) as context:
+            compile_file_stream(self.source, self.output)
+        self.assertNotIsInstance(context.exception, BufferError)
+        self.assertEqual(str(context.exception), "Erreur de syntaxe à la ligne 4: Attendu COMMA, trouvé NUMBER")
+        self.assertFalse(os.path.exists(self.output))
+
+    def test_main_stream_reports_syntax_error(self):
+        result = subprocess.run([sys.executable, 'main.py', self.source, '--stream', '-o', self.output],
+                                cwd=ROOT, capture_output=True, text=True)
+        self.assertIn("Erreur: Erreur de syntaxe à la ligne 4", result.stdout)
+        self.assertFalse(os.path.exists(self.output))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import shutil
+import unittest
+
+from benchmarks.generator import generate_loop_program, generate_branch_program
+from src.pipeline import analyze
+from src.compiler_to_c import CCompiler
+from src.differential import Variant, CorpusProgram
+from tests.programs import corpus, assert_same_outcomes
+
+DIAMOND_PROGRAM = """Var
+x:byte, y:byte
+Instructions
+0: input x;
+1: sub x,0;
+2: js 5;
+3: mov y,1;
+4: jmp 6;
+5: mov y,2;
+6: print y;
+"""
+
+# La boucle 4-8 a deux entrées (4 et 6): flot irréductible, un goto reste.
+IRREDUCIBLE_PROGRAM = """Var
+x:byte, y:byte
+Instructions
+0: input x;
+1: mov y,3;
+2: sub x,0;
+3: jz 6;
+4: print y;
+5: add x,1;
+6: sub y,1;
+7: js 9;
+8: jmp 4;
+9: print x;
+"""
+
+def main_function(source, **options):
+    ast, symbol_table = analyze(source)
+    code = CCompiler(ast, symbol_table, **options).generate_c_code()
+    return code[code.index("int main(void)"):]
+
+class StructuredCodeTest(unittest.TestCase):
+    def test_nested_loops_become_for(self):
+        body = main_function(generate_loop_program(10, 16))
+        self.assertEqual(body.count("for (;;)"), 2)
+        self.assertEqual(body.count("if (zf) break;"), 2)
+        self.assertNotIn("goto", body)
+        self.assertNotIn("L1:", body)
+
+    def test_branches_become_if_else(self):
+        body = main_function(DIAMOND_PROGRAM)
+        self.assertIn("if (sf) {", body)
+        self.assertIn("} else {", body)
+        self.assertNotIn("goto", body)
+        self.assertIn("goto L5;", main_function(DIAMOND_PROGRAM, structured=False))
+
+    def test_irreducible_flow_keeps_a_goto(self):
+        body = main_function(IRREDUCIBLE_PROGRAM)
+        self.assertIn("goto L6;", body)
+        self.assertIn("L6: ;", body)
+        self.assertEqual(body.count("goto"), 1)
+
+    def test_generated_branches_need_no_goto(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.assertNotIn("goto", main_function(generate_branch_program(10 + seed, 20)))
+
+@unittest.skipIf(shutil.which('cc') is None, "compilateur C absent")
+class StructuredExecutionTest(unittest.TestCase):
+    def test_structured_and_goto_code_match_vm(self):
+        programs = corpus() + [CorpusProgram('losange', DIAMOND_PROGRAM, [[5], [-5], [0]]),
+                               CorpusProgram('irreductible', IRREDUCIBLE_PROGRAM, [[5], [0], [-1]])]
+        assert_same_outcomes(self, [Variant('c', 0, 'checked', copt='0'),
+                                    Variant('c', 0, 'checked', structured=False, copt='0'),
+                                    Variant('c', 2, 'fast', copt='2')], programs)
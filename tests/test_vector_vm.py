@@ -0,0 +1,100 @@
+import unittest
+
+from src.pipeline import analyze
+from src.vm import BytecodeCompiler, run_program
+from src import vector_vm
+from src.vector_vm import VectorMachine, RUNNING, HALTED, FAILED, LIMITED
+from src.differential import Variant
+from tests.programs import assert_same_outcomes
+
+# Les voies divergent: boucle de longueur variable, branche selon le signe,
+# index hors limites pour certaines entrées, pile.
+DIVERGENT_PROGRAM = """Var
+n:byte, x:byte, i:byte, t:Array[4]
+Instructions
+0: input n;
+1: input i;
+2: mov x,n;
+3: sub x,0;
+4: js 10;
+5: push x;
+6: sub x,1;
+7: jz 12;
+8: js 12;
+9: jmp 5;
+10: not x;
+11: print x;
+12: mov t[i],n;
+13: print t[i];
+14: pop AX;
+15: print AX;
+16: div n,i;
+17: print n;
+"""
+
+INPUTS = [[3, 1], [-7, 2], [0, 0], [5, 4], [1, -1], [32767, 3], [-32768, 3], [2, 2]]
+
+def compile_program(source):
+    ast, symbol_table = analyze(source)
+    return ast, symbol_table, BytecodeCompiler(ast, symbol_table).compile()
+
+def sequential(ast, symbol_table, row):
+    output = []
+    values = iter(row)
+    try:
+        run_program(ast, symbol_table, lambda: next(values), output.append)
+    except Exception as e:
+        return output, str(e)
+    return output, None
+
+@unittest.skipIf(vector_vm.np is None, "numpy absent")
+class VectorMachineTest(unittest.TestCase):
+    def test_corpus_matches_vm(self):
+        assert_same_outcomes(self, [Variant('vector', 0), Variant('vector', 2)])
+
+    def test_each_lane_matches_a_sequential_run(self):
+        ast, symbol_table, bytecode = compile_program(DIVERGENT_PROGRAM)
+        machine = VectorMachine(bytecode, INPUTS)
+        machine.run()
+        for lane, (row, output, error) in enumerate(zip(INPUTS, machine.outputs(), machine.errors)):
+            with self.subTest(inputs=row):
+                self.assertEqual((output, error), sequential(ast, symbol_table, row))
+                self.assertEqual(machine.status[lane], FAILED if error else HALTED)
+        self.assertIsNotNone(machine.errors[4])
+        self.assertLess(machine.executed, machine.cycles * machine.lanes)
+
+    def test_missing_input_only_stops_its_lane(self):
+        _, _, bytecode = compile_program("Var\nx:byte\nInstructions\n0: input x;\n1: print x;\n"
+                                                      "2: sub x,0;\n3: jz 6;\n4: input x;\n5: print x;\n6: halt;\n")
+        machine = VectorMachine(bytecode, [[0], [70000]])
+        machine.run()
+        self.assertEqual(machine.outputs(), [[0], [4464]])
+        self.assertEqual(machine.errors, [None, "Erreur d'exécution à l'instruction 4: entrée 2 absente"])
+
+    def test_step_limit_resumes(self):
+        _, _, bytecode = compile_program(DIVERGENT_PROGRAM)
+        whole = VectorMachine(bytecode, INPUTS)
+        whole.run()
+        machine = VectorMachine(bytecode, INPUTS)
+        machine.run(10)
+        self.assertTrue((machine.steps <= 10).all())
+        self.assertIn(LIMITED, machine.status.tolist())
+        while (machine.status == LIMITED).any():
+            machine.run(10)
+        self.assertNotIn(RUNNING, machine.status.tolist())
+        self.assertEqual(machine.outputs(), whole.outputs())
+        self.assertEqual(machine.errors, whole.errors)
+        self.assertEqual(machine.steps.tolist(), whole.steps.tolist())
+
+    def test_read_gives_one_value_per_lane(self):
+        _, _, bytecode = compile_program("Var\nx:byte, t:Array[2]\nInstructions\n0: input x;\n"
+                                         "1: mov t[1],x;\n2: add x,x;\n")
+        machine = VectorMachine(bytecode, [[1], [-2], [20000]])
+        machine.run()
+        self.assertEqual(machine.read('x').tolist(), [2, -4, -25536])
+        self.assertEqual(machine.read('t').tolist(), [[0, 1], [0, -2], [0, 20000]])
+
+    def test_inputs_must_be_a_matrix(self):
+        _, _, bytecode = compile_program("Var\nx:byte\nInstructions\n0: input x;\n")
+        with self.assertRaisesRegex(Exception, "matrice d'entrées"):
+            VectorMachine(bytecode, [1, 2, 3])
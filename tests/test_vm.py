@@ -0,0 +1,83 @@
+import unittest
+
+from src.pipeline import analyze
+from src.vm import run_program, STACK_SIZE
+
+def program(*operations, declarations='x:byte, y:byte, t:Array[3]'):
+    lines = [f'{number}: {operation};' for number, operation in enumerate(operations)]
+    return 'Var\n' + declarations + '\nInstructions\n' + '\n'.join(lines) + '\n'
+
+def run(*operations, inputs=(), max_steps=None):
+    ast, symbol_table = analyze(program(*operations))
+    output = []
+    values = iter(inputs)
+    vm, _ = run_program(ast, symbol_table, lambda: next(values), output.append, max_steps)
+    return output, vm
+
+class VirtualMachineTest(unittest.TestCase):
+    def test_arithmetic_wraps_to_int16(self):
+        output, _ = run('mov x,32767', 'add x,1', 'print x',
+                        'mov x,300', 'mult x,300', 'print x',
+                        'mov x,0', 'sub x,32768', 'sub x,1', 'print x')
+        self.assertEqual(output, [-32768, 24464, 32767])
+
+    def test_division_truncates_toward_zero(self):
+        output, _ = run('mov x,0', 'sub x,7', 'mov y,x', 'div x,2', 'print x',
+                        'mov x,7', 'div x,y', 'print x', 'div y,y', 'print y')
+        self.assertEqual(output, [-3, -1, 1])
+
+    def test_bitwise_operations(self):
+        output, _ = run('mov x,12', 'and x,10', 'print x', 'or x,5', 'print x',
+                        'not x', 'print x', 'mov y,0', 'not y', 'print y')
+        self.assertEqual(output, [8, 13, -14, -1])
+
+    def test_flags_select_jumps(self):
+        # Chaque saut pris saute un print 99.
+        output, _ = run('mov x,3', 'sub x,3', 'jz 4', 'print 99',
+                        'sub x,1', 'js 7', 'print 99',
+                        'mov x,32767', 'add x,1', 'jo 11', 'print 99',
+                        'add x,1', 'jo 14', 'print 1',
+                        'mov y,5', 'sub y,2', 'jz 19', 'js 19', 'print y', 'halt')
+        self.assertEqual(output, [1, 3])
+
+    def test_flags_are_kept_by_mov(self):
+        output, _ = run('mov x,0', 'sub x,0', 'mov x,7', 'jz 5', 'print 99', 'print x')
+        self.assertEqual(output, [7])
+
+    def test_registers_and_arrays(self):
+        output, vm = run('mov AX,2', 'mov BX,AX', 'add BX,3', 'mov x,AX', 'mov t[x],BX', 'mov y,1',
+                         'mov t[y],t[x]', 'mov CX,t[1]', 'mov DX,CX', 'print DX', 'print t[2]')
+        self.assertEqual(output, [5, 5])
+        self.assertEqual(vm.read('t'), [0, 5, 5])
+
+    def test_input_wraps_and_reads_in_order(self):
+        output, _ = run('input x', 'input t[2]', 'print x', 'print t[2]', inputs=[70000, -5])
+        self.assertEqual(output, [4464, -5])
+
+    def test_stack_is_lifo_and_bounded(self):
+        output, _ = run('push 1', 'push 2', 'pop x', 'pop y', 'pop AX', 'print x', 'print y', 'print AX')
+        self.assertEqual(output, [2, 1, 0])
+        # Pile pleine: isFull met zf, un push de plus est ignoré.
+        output, vm = run('push x', 'add x,1', 'isFull', 'jz 5', 'jmp 0', 'push 99', 'pop y', 'print y', 'print x')
+        self.assertEqual(output, [STACK_SIZE - 1, STACK_SIZE])
+        self.assertEqual(len(vm.stack), STACK_SIZE - 1)
+
+    def test_halt_stops_execution(self):
+        output, vm = run('print 1', 'halt', 'print 2')
+        self.assertEqual(output, [1])
+        self.assertTrue(vm.halted)
+
+    def test_runtime_errors_name_the_instruction(self):
+        for operations, message in ((('mov x,0', 'mov y,1', 'div y,x'), "instruction 2: division par zéro"),
+                                    (('mov x,3', 'mov t[x],1'), "instruction 1: index 3 hors limites"),
+                                    (('mov x,0', 'sub x,1', 'print t[x]'), "instruction 2: index -1 hors limites")):
+            with self.subTest(operations=operations):
+                with self.assertRaisesRegex(Exception, "Erreur d'exécution à l'" + message):
+                    run(*operations)
+
+    def test_max_steps_pauses_and_resumes(self):
+        output, vm = run('add x,1', 'print x', 'jmp 0', max_steps=5)
+        self.assertEqual((output, vm.steps, vm.halted), ([1, 2], 5, False))
+        vm.run(3)
+        self.assertEqual(output, [1, 2, 3])
+        self.assertEqual(vm.read('x'), 3)